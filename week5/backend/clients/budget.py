@@ -0,0 +1,157 @@
+from typing import Dict, Optional, Tuple
+from pydantic import BaseModel
+from clients.deadline import Deadline, DeadlineExceeded
+import math
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+# Per-request budgets
+MAX_TOOL_TURNS = 10  # model turns, the first response included
+MAX_LLM_CALLS = 12
+MAX_TOKENS = 200_000  # prompt plus completion tokens
+MAX_COST = 0.05  # USD
+MAX_TOOL_SECONDS = 30  # summed duration of tool calls
+# Model used until the budget runs low, and the one used after
+DEFAULT_MODEL = "gemini-2.0-flash"
+CHEAP_MODEL = "gemini-2.0-flash-lite"
+# USD per million prompt and completion tokens
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+}
+# Share of the tightest budget left below which model turns get cheaper
+CHEAP_MODEL_BELOW = 0.5  # every model call uses CHEAP_MODEL
+SKIP_VALIDATION_BELOW = 0.3  # results the model would validate itself are passed on unvalidated
+
+
+class BudgetExceeded(DeadlineExceeded):
+    """Raised when a model call cannot be made because one of the request's budgets is used up."""
+
+
+class BudgetUsage(BaseModel):
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0  # estimated from MODEL_PRICES
+    tool_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    turns: int = 0
+    cheap_model_calls: int = 0  # model calls switched to CHEAP_MODEL
+    validations_skipped: int = 0
+    remaining: float = 1.0  # share of the tightest budget left
+    exhausted: Optional[str] = None  # the budget that ran out, if any
+
+
+class RunBudget:
+    def __init__(
+        self,
+        deadline: Deadline,
+        max_turns: int = MAX_TOOL_TURNS,
+        max_llm_calls: int = MAX_LLM_CALLS,
+        max_tokens: int = MAX_TOKENS,
+        max_cost: float = MAX_COST,
+        max_tool_seconds: float = MAX_TOOL_SECONDS,
+    ) -> None:
+        """
+        What one /chat request may spend on model and tool calls, and what it has spent.
+
+        Model calls, tokens, cost, tool time and wall time (the deadline) are
+        tracked against their limits; the tightest one sets how much is
+        `remaining`. As it runs down, model calls switch to a cheaper model,
+        self-validation turns are skipped, and the turn allowance shrinks to
+        what the turns so far say will still fit.
+
+        Args:
+            deadline: Wall-clock budget of the request
+            max_turns: Most model turns, the first response included
+            max_llm_calls: Most model calls
+            max_tokens: Most prompt plus completion tokens
+            max_cost: Most estimated model cost in USD
+            max_tool_seconds: Most summed tool call time
+        """
+        self.deadline = deadline
+        self.max_turns = max_turns
+        self.limits = {
+            "llm_calls": max_llm_calls,
+            "tokens": max_tokens,
+            "cost_usd": max_cost,
+            "tool_seconds": max_tool_seconds,
+            "wall_seconds": deadline.seconds,
+        }
+        self.usage = BudgetUsage()
+
+    def used(self) -> Dict[str, float]:
+        return {
+            "llm_calls": self.usage.llm_calls,
+            "tokens": self.usage.prompt_tokens + self.usage.completion_tokens,
+            "cost_usd": self.usage.cost_usd,
+            "tool_seconds": self.usage.tool_seconds,
+            "wall_seconds": self.deadline.seconds - self.deadline.remaining(),
+        }
+
+    def remaining(self) -> float:
+        used = self.used()
+        return max(min(1 - used[name] / limit for name, limit in self.limits.items()), 0.0)
+
+    def exhausted(self) -> Optional[str]:
+        used = self.used()
+        return next((name for name, limit in self.limits.items() if used[name] >= limit), None)
+
+    def start_llm_call(self) -> str:
+        """Count the next model call and pick its model; raises BudgetExceeded if a budget is used up."""
+        exhausted = self.exhausted()
+        if exhausted is not None:
+            raise BudgetExceeded(f"{exhausted} budget of {self.limits[exhausted]:g} exhausted")
+        self.usage.llm_calls += 1
+        if self.remaining() >= CHEAP_MODEL_BELOW:
+            return DEFAULT_MODEL
+        self.usage.cheap_model_calls += 1
+        logger.info(f"{self.remaining():.0%} of the request budget left, using {CHEAP_MODEL}")
+        return CHEAP_MODEL
+
+    def record_llm(self, model: str, prompt_tokens: int, completion_tokens: int) -> None:
+        prompt_price, completion_price = MODEL_PRICES.get(model, MODEL_PRICES[DEFAULT_MODEL])
+        self.usage.prompt_tokens += prompt_tokens
+        self.usage.completion_tokens += completion_tokens
+        self.usage.cost_usd += (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+    def record_tool(self, seconds: float) -> None:
+        self.usage.tool_seconds += seconds
+
+    def skip_validation(self) -> bool:
+        """Whether the model should not validate the latest result itself (counted as skipped) to save budget."""
+        if self.remaining() >= SKIP_VALIDATION_BELOW:
+            return False
+        self.usage.validations_skipped += 1
+        logger.info(f"{self.remaining():.0%} of the request budget left, skipping model validation")
+        return True
+
+    def turn_allowance(self) -> int:
+        """Turns the request may take in total, at most max_turns, given the average cost of the turns so far."""
+        turns = self.usage.turns
+        if self.exhausted() is not None:
+            return turns
+        if turns == 0:
+            return self.max_turns
+        used = self.used()
+        affordable = min(
+            math.floor((limit - used[name]) / (used[name] / turns)) if used[name] > 0 else self.max_turns
+            for name, limit in self.limits.items()
+        )
+        return min(self.max_turns, turns + affordable)
+
+    def start_turn(self) -> None:
+        self.usage.turns += 1
+
+    def report(self) -> BudgetUsage:
+        used = self.used()
+        return self.usage.model_copy(update={
+            "cost_usd": round(self.usage.cost_usd, 6),
+            "tool_seconds": round(self.usage.tool_seconds, 3),
+            "wall_seconds": round(used["wall_seconds"], 3),
+            "remaining": round(self.remaining(), 3),
+            "exhausted": self.exhausted(),
+        })
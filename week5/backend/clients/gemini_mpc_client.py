@@ -1,9 +1,19 @@
-from typing import List
+from typing import Dict, Hashable, List, Literal, Optional, Union
 from google import genai
 from google.genai import types
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from mcp import StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.types import CallToolResult
+from clients.session_pool import MCPSessionPool
+from clients.concurrency import ConcurrencyLimiter, ConcurrencyStats, ServerOverloadedError
+from clients.deadline import Deadline, DeadlineExceeded
+from clients.latency import LatencyWindow
+from clients.progress import ProgressCallback, ProgressClientSession
+from clients.result_cache import CACHEABLE_HINT, ResultCache, ResultCacheStats, tool_annotations
+from pydantic import BaseModel
+from functools import partial
 import os
+import time
 import asyncio
 from dotenv import load_dotenv
 import traceback
@@ -22,6 +32,41 @@ load_dotenv()
 # Session timeout
 SESSION_TIMEOUT = 10  # seconds
 
+
+class ServerStartupTiming(BaseModel):
+    server: str
+    status: Literal["ok", "timeout", "error"]
+    spawn_seconds: Optional[float] = None
+    initialize_seconds: Optional[float] = None
+    list_tools_seconds: Optional[float] = None
+    total_seconds: float
+    tool_count: int = 0
+    error: Optional[str] = None
+
+
+class StartupReport(BaseModel):
+    servers: List[ServerStartupTiming] = []
+    total_seconds: float = 0.0
+
+    @property
+    def failed(self) -> List[str]:
+        return [timing.server for timing in self.servers if timing.status != "ok"]
+
+    def log_lines(self) -> List[str]:
+        """Human readable lines, one per server, suitable for logging."""
+        def fmt(seconds: Optional[float]) -> str:
+            return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+        lines = [
+            f"{t.server}: {t.status} in {fmt(t.total_seconds)} "
+            f"(spawn={fmt(t.spawn_seconds)}, initialize={fmt(t.initialize_seconds)}, "
+            f"list_tools={fmt(t.list_tools_seconds)}, tools={t.tool_count})"
+            + (f" error={t.error}" if t.error else "")
+            for t in self.servers
+        ]
+        lines.append(f"startup completed in {fmt(self.total_seconds)}, {len(self.failed)} failed")
+        return lines
+
 class GeminiMCPClient:
     def __init__(self, model_name: str="gemini-2.0-flash")-> None:
         """
@@ -38,21 +83,66 @@ class GeminiMCPClient:
 
         self.available_tools = {}
         self.server_params = {}
+        # Streams tool progress and cancels abandoned calls on the server
+        self.session_pool = MCPSessionPool(session_class=ProgressClientSession)
+        # Bounds concurrent calls per server across all /chat requests
+        self.limiter = ConcurrencyLimiter()
+        # Recent call latencies per tool, from which per-tool timeouts are derived
+        self.tool_latency: Dict[str, LatencyWindow] = {}
+        # Results of tools their server declares cacheable
+        self.result_cache = ResultCache()
+        self.startup_report = StartupReport()
+        self._list_tools_seconds = {}
     
-    async def connect_to_multiple_servers(self, mcp_servers: dict=None) -> None:
-        """Connect to multiple MCP servers concurrently."""
+    async def connect_to_multiple_servers(self, mcp_servers: dict=None, timeout: float = SESSION_TIMEOUT) -> StartupReport:
+        """
+        Connect to multiple MCP servers concurrently.
+
+        `mcp_servers` maps a server name to a file path (spawned over stdio)
+        or to the http(s) SSE endpoint of a shared server, so several uvicorn
+        workers can use one server instance.
+
+        Every server gets its own `timeout` deadline, so total startup time is
+        bounded by the slowest server rather than the sum. Failures are
+        recorded in the returned report instead of aborting the other servers.
+        """
+        started = time.perf_counter()
+        timings = []
         if mcp_servers:
-            server_params = [self.create_server_params(filepath) for _, filepath in mcp_servers.items()]
-            
-            # Run connections with better error handling
-            for name, params in zip(mcp_servers.keys(), server_params):
-                try:
-                    await self.connect_to_server(name, params)
-                except Exception as e:
-                    logging.error(f"Error connecting to MCP server '{name}': {e}")
-                    logging.error(f"Exception details: {traceback.format_exc()}")
-            
+            timings = await asyncio.gather(*[
+                self._connect_with_timing(name, location, timeout)
+                for name, location in mcp_servers.items()
+            ])
             logging.info("All connection attempts completed")
+
+        self.startup_report = StartupReport(servers=list(timings), total_seconds=time.perf_counter() - started)
+        return self.startup_report
+
+    async def _connect_with_timing(self, server_name: str, location: str, timeout: float) -> ServerStartupTiming:
+        """Connect to one server and capture spawn/initialize/list_tools timings."""
+        started = time.perf_counter()
+        status, error = "ok", None
+        try:
+            if location.startswith(("http://", "https://")):
+                await self.connect_remote(server_name, location, timeout=timeout)
+            else:
+                await self.connect_to_server(server_name, self.create_server_params(location), timeout=timeout)
+        except asyncio.TimeoutError:
+            status, error = "timeout", f"no response within {timeout}s"
+        except Exception as e:
+            status, error = "error", str(e)
+
+        pool_timings = self.session_pool.startup_timings.get(server_name, {})
+        return ServerStartupTiming(
+            server=server_name,
+            status=status,
+            spawn_seconds=pool_timings.get("spawn_seconds"),
+            initialize_seconds=pool_timings.get("initialize_seconds"),
+            list_tools_seconds=self._list_tools_seconds.get(server_name),
+            total_seconds=time.perf_counter() - started,
+            tool_count=sum(1 for tool in self.available_tools.values() if tool["server"] == server_name),
+            error=error,
+        )
     
     def create_server_params(self, server_filepath: str) -> StdioServerParameters:
         """Create StdioServerParameters for a server."""
@@ -70,51 +160,54 @@ class GeminiMCPClient:
             # env=None,  # Optional environment variables
         )
     
-    async def connect_to_server(self, server_name: str, server_params: StdioServerParameters) -> None:
-        """Connect to an MCP server and register its tools using stdio_client."""
+    async def connect_to_server(self, server_name: str, server_params: StdioServerParameters, timeout: float = SESSION_TIMEOUT) -> None:
+        """Connect to an MCP server and register its tools, keeping the session in the pool."""
         # Store server parameters for later use
         self.server_params[server_name] = server_params
-        
+        self.session_pool.register(server_name, server_params)
+        await self._load_tools(server_name, timeout)
+
+    async def connect_remote(self, server_name: str, url: str, timeout: float = SESSION_TIMEOUT) -> None:
+        """Connect to a shared MCP server over SSE and register its tools, keeping the session in the pool."""
+        self.session_pool.register_transport(server_name, partial(sse_client, url, timeout=timeout))
+        await self._load_tools(server_name, timeout)
+
+    async def _load_tools(self, server_name: str, timeout: float) -> None:
+        """List the tools of a registered server through the pool and register them."""
         try:
             # Add a timeout to prevent hanging indefinitely
-            async with asyncio.timeout(SESSION_TIMEOUT):  # 10-second timeout
-                try:
-                    logger.info(f"Opening stdio client for {server_name}...")
-                    async with stdio_client(server_params) as (read, write):
-                        try:
-                            async with ClientSession(read, write) as session:
-                                try:
-                                    logger.info(f"Initializing session for {server_name}...")
-                                    await session.initialize()
-                                    
-                                    tools_result = await session.list_tools()
-                                    tools = tools_result.tools
-                                    
-                                    logger.info(f"Registering {len(tools)} tools from {server_name}...")
-                                    for tool in tools:
-                                        self.available_tools[tool.name] = {
-                                            "server": server_name,
-                                            "description": tool.description,
-                                            "parameters": tool.inputSchema
-                                        }
-        
-                                except Exception as e:
-                                    logger.error(f"Error in session for {server_name}: {e}")
-                                    logger.error(f"Session exception details: {traceback.format_exc()}")
-                                    raise
-                        except Exception as e:
-                            logger.error(f"Error creating ClientSession for {server_name}: {e}")
-                            raise
-                except Exception as e:
-                    logger.error(f"Error with stdio_client for {server_name}: {e}")
-                    raise
+            async with asyncio.timeout(timeout):  # per-server deadline
+                logger.info(f"Opening pooled session for {server_name}...")
+                async with self.session_pool.acquire(server_name) as session:
+                    started = time.perf_counter()
+                    tools_result = await session.list_tools()
+                    self._list_tools_seconds[server_name] = time.perf_counter() - started
+                    tools = tools_result.tools
+                    
+                    logger.info(f"Registering {len(tools)} tools from {server_name}...")
+                    for tool in tools:
+                        self.available_tools[tool.name] = {
+                            "server": server_name,
+                            "description": tool.description,
+                            "parameters": tool.inputSchema,
+                            "cacheable": bool((tool_annotations(tool) or {}).get(CACHEABLE_HINT)),
+                        }
         except asyncio.TimeoutError:
             logger.error(f"Timeout connecting to MCP server '{server_name}'")
             raise
         except Exception as e:
             logger.error(f"Error connecting to MCP server '{server_name}': {e}")
+            logger.error(f"Session exception details: {traceback.format_exc()}")
             raise
 
+    def concurrency_stats(self) -> Dict[str, ConcurrencyStats]:
+        """Limits, queue depth and wait times per server."""
+        return self.limiter.stats()
+
+    def cache_stats(self) -> ResultCacheStats:
+        """Hits, misses, shared in-flight calls and size of the result cache."""
+        return self.result_cache.snapshot()
+
     def get_tool_schemas(self)-> List[dict]:
         """Get tool schemas in the format expected by Gemini."""
         schemas = []
@@ -126,30 +219,78 @@ class GeminiMCPClient:
             })
         return schemas
 
-    async def execute_tool(self, tool_call: types.FunctionCall) -> str:
-        """Execute a tool call using the appropriate MCP server."""
+    async def execute_tool(self, tool_call: types.FunctionCall, caller: Hashable = None, deadline: Optional[Deadline] = None, on_progress: Optional[ProgressCallback] = None) -> Union[CallToolResult, str]:
+        """
+        Execute a tool call using the appropriate MCP server.
+
+        Calls are admitted per server; waiting calls are served round-robin
+        across `caller`s (chat sessions), and a call that cannot get a slot in
+        time is rejected with an error string instead of queueing without bound.
+
+        Every call is bounded by the remaining `deadline` budget (if given) and
+        by a per-tool timeout that follows the tool's observed p99 latency.
+        Progress reported by the server is passed to `on_progress`. A call
+        given up on is cancelled on the server; its session goes back to the
+        pool if the server confirms, and is discarded (stopping the busy
+        server process) if it does not.
+
+        Results of tools the server declares cacheable are served from an LRU
+        cache shared by all chat sessions, and identical calls in flight at the
+        same time share one execution.
+        """
         tool_name = tool_call.name
         arguments = tool_call.args
         
         if tool_name not in self.available_tools:
             return f"Error: Tool '{tool_name}' not found"
-        
+
+        call = partial(self._call_tool, tool_name, arguments, caller, deadline, on_progress)
+        if self.available_tools[tool_name]["cacheable"]:
+            return await self.result_cache.get_or_call(ResultCache.key(tool_name, arguments), call)
+        return await call()
+
+    async def _call_tool(self, tool_name: str, arguments: dict, caller: Hashable, deadline: Optional[Deadline], on_progress: Optional[ProgressCallback]) -> Union[CallToolResult, str]:
+        """Call a tool on its server; failures are returned as error strings."""
         server_name = self.available_tools[tool_name]["server"]
-        server_params = self.server_params[server_name]
+        latency = self.tool_latency.setdefault(tool_name, LatencyWindow())
+        call_timeout = latency.timeout(default=SESSION_TIMEOUT)
+        abandoned = None
         
         try:
-            async with asyncio.timeout(SESSION_TIMEOUT):  # 10 second timeout
-                async with stdio_client(server_params) as (read, write):
-                    async with ClientSession(read, write) as session:
-                        # Initialize the connection
-                        await session.initialize()                        
-                        # Call the tool using the MCP session
-                        result = await session.call_tool(
-                            name=tool_name,
-                            arguments=arguments
-                        )
-                        return result
+            budget = SESSION_TIMEOUT if deadline is None else deadline.budget(SESSION_TIMEOUT)
+            async with asyncio.timeout(budget):
+                async with self.limiter.slot(server_name, tool_name, caller, timeout=budget) as timing:
+                    async with self.session_pool.acquire(server_name) as session:
+                        # Call the tool using a pooled, already initialized session
+                        started = time.perf_counter()
+                        try:
+                            async with asyncio.timeout(call_timeout):
+                                result = await session.call_tool_with_progress(tool_name, arguments, on_progress)
+                        except BaseException as e:
+                            if isinstance(e, TimeoutError):
+                                # Count the timeout as a (slow) sample so a too tight timeout widens again
+                                latency.add(call_timeout)
+                            if not session.responsive:
+                                raise
+                            # Cancelled cleanly on the server: keep the session, re-raise outside the pool
+                            abandoned = e
+                        else:
+                            timing.seconds = time.perf_counter() - started
+                            latency.add(timing.seconds)
+                            return result
+                    raise abandoned
+        except ServerOverloadedError as e:
+            logger.warning(f"Rejected {tool_name}: {e}")
+            return f"Error: Tool '{tool_name}' rejected, server overloaded: {e}"
+        except DeadlineExceeded as e:
+            return f"Error: Tool '{tool_name}' not completed, {e}"
         except asyncio.TimeoutError:
+            if deadline is not None and deadline.expired:
+                return f"Error: Tool '{tool_name}' not completed, time budget of {deadline.seconds:g}s exhausted"
             return f"Tool execution timed out for '{tool_name}'"
         except Exception as e:
-            return f"Error executing tool '{tool_name}': {str(e)}"
\ No newline at end of file
+            return f"Error executing tool '{tool_name}': {str(e)}"
+
+    async def close(self) -> None:
+        """Shut down all pooled sessions and their server processes."""
+        await self.session_pool.close()
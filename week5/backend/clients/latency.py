@@ -0,0 +1,37 @@
+from collections import deque
+from typing import Deque, Optional
+
+
+# Adaptive timeout defaults
+LATENCY_WINDOW = 100  # most recent calls considered per tool
+MIN_SAMPLES = 20  # calls needed before the observed latency is trusted
+TIMEOUT_PERCENTILE = 0.99
+TIMEOUT_MULTIPLIER = 3  # headroom over the observed percentile
+MIN_TOOL_TIMEOUT = 1.0  # seconds; never time out faster than this
+
+
+class LatencyWindow:
+    def __init__(self, size: int = LATENCY_WINDOW) -> None:
+        """
+        Sliding window of call latencies for one tool, used to derive a
+        timeout from what the tool normally takes instead of a fixed value.
+
+        Args:
+            size: Number of most recent samples kept
+        """
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def timeout(self, default: float) -> float:
+        """TIMEOUT_MULTIPLIER x the observed p99, within [MIN_TOOL_TIMEOUT, default]; `default` until enough samples."""
+        if len(self.samples) < MIN_SAMPLES:
+            return default
+        return min(max(self.percentile(TIMEOUT_PERCENTILE) * TIMEOUT_MULTIPLIER, MIN_TOOL_TIMEOUT), default)
@@ -0,0 +1,102 @@
+from typing import Any, Callable, Dict, Optional
+from mcp import ClientSession
+import mcp.types as types
+import anyio
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+# Cancellation defaults
+CANCEL_ACK_TIMEOUT = 0.5  # seconds a server gets to confirm a cancelled call before its session is given up
+
+# Called with (progress, total) for every progress notification of a call
+ProgressCallback = Callable[[float, Optional[float]], None]
+
+
+class ProgressClientSession(ClientSession):
+    """
+    ClientSession whose tool calls stream progress and can be cancelled.
+
+    Every call carries a progress token, and the server's progress
+    notifications are handed to the caller's callback. When the caller stops
+    waiting (timeout, cancellation) the server is sent a cancellation for the
+    request so it stops the work, instead of computing a result nobody reads.
+
+    `responsive` turns False when a server did not confirm a cancellation in
+    time: it is busy with a call that ignores cancellation, so the session
+    (and the process behind it) should be discarded rather than reused.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.responsive = True
+        self._progress_callbacks: Dict[types.ProgressToken, ProgressCallback] = {}
+
+    async def _received_notification(self, notification: types.ServerNotification) -> None:
+        if isinstance(notification.root, types.ProgressNotification):
+            params = notification.root.params
+            callback = self._progress_callbacks.get(params.progressToken)
+            if callback is not None:
+                try:
+                    callback(params.progress, params.total)
+                except Exception as e:
+                    logger.warning(f"Progress callback failed: {e}")
+        await super()._received_notification(notification)
+
+    async def call_tool_with_progress(self, name: str, arguments: Optional[Dict[str, Any]] = None, on_progress: Optional[ProgressCallback] = None) -> types.CallToolResult:
+        """call_tool, reporting progress to `on_progress` and cancelling the request on the server if abandoned."""
+        # send_request takes the next id synchronously, before it first awaits,
+        # so this is the id of the request sent below
+        request_id = self._request_id
+        if on_progress is not None:
+            self._progress_callbacks[request_id] = on_progress
+        request = types.ClientRequest(
+            types.CallToolRequest(
+                method="tools/call",
+                params=types.CallToolRequestParams(
+                    name=name,
+                    arguments=arguments,
+                    _meta=types.RequestParams.Meta(progressToken=request_id),
+                ),
+            )
+        )
+        try:
+            return await self.send_request(request, types.CallToolResult)
+        except BaseException as e:
+            await self._cancel_request(request_id, f"{type(e).__name__}: client stopped waiting for {name}")
+            raise
+        finally:
+            self._progress_callbacks.pop(request_id, None)
+
+    async def _cancel_request(self, request_id: types.RequestId, reason: str) -> None:
+        """Tell the server to stop `request_id` and wait briefly for it to confirm."""
+        if request_id not in self._response_streams:
+            # The response already arrived; nothing is running on the server
+            return
+        # The abandoned send_request no longer reads its stream: route the
+        # server's "Request cancelled" answer to a stream of our own
+        ack, ack_reader = anyio.create_memory_object_stream(1)
+        self._response_streams[request_id] = ack
+        acknowledged = False
+        try:
+            with anyio.move_on_after(CANCEL_ACK_TIMEOUT, shield=True):
+                await self.send_notification(
+                    types.ClientNotification(
+                        types.CancelledNotification(
+                            method="notifications/cancelled",
+                            params=types.CancelledNotificationParams(requestId=request_id, reason=reason),
+                        )
+                    )
+                )
+                await ack_reader.receive()
+                acknowledged = True
+        except Exception as e:
+            logger.warning(f"Could not cancel request {request_id}: {e}")
+        finally:
+            self._response_streams.pop(request_id, None)
+            ack.close()
+            ack_reader.close()
+        if not acknowledged:
+            self.responsive = False
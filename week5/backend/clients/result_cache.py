@@ -0,0 +1,128 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from mcp.types import CallToolResult, Tool
+from pydantic import BaseModel
+import json
+import asyncio
+
+
+# Tool annotation with which a server declares a tool cacheable.
+# Must match servers/calculator/tool_hints.py on the server side.
+CACHEABLE_HINT = "cacheableHint"
+# Cache limits
+MAX_ENTRIES = 1024  # cached results
+MAX_BYTES = 32 * 1024 * 1024  # approximate total size of cached results
+MAX_ENTRY_BYTES = 4 * 1024 * 1024  # larger results are never cached
+
+
+def tool_annotations(tool: Tool) -> Optional[Dict[str, Any]]:
+    """A listed tool's annotations (such as cacheableHint): a field of Tool on newer mcp versions, an extra field on 1.6."""
+    annotations = getattr(tool, "annotations", None) or (tool.model_extra or {}).get("annotations")
+    if annotations is None or isinstance(annotations, dict):
+        return annotations
+    return annotations.model_dump(exclude_none=True)
+
+
+class ResultCacheStats(BaseModel):
+    entries: int = 0
+    size_bytes: int = 0
+    hits: int = 0
+    misses: int = 0
+    shared: int = 0  # calls that waited for an identical call in flight
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses + self.shared
+        return (self.hits + self.shared) / lookups if lookups else 0.0
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES, max_entry_bytes: int = MAX_ENTRY_BYTES) -> None:
+        """
+        LRU cache of tool results, shared by all /chat requests.
+
+        Results are keyed by tool name plus canonical arguments and evicted
+        least recently used first once either limit is exceeded. Identical
+        calls arriving while the first is still running wait for it instead of
+        reaching the server themselves (single flight).
+
+        Only successful results are cached or shared; calls waiting on one
+        that fails make their own call.
+
+        Args:
+            max_entries: Maximum number of cached results
+            max_bytes: Maximum approximate size of all cached results
+            max_entry_bytes: Results larger than this are not cached
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: "OrderedDict[str, Tuple[CallToolResult, int]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.stats = ResultCacheStats()
+
+    @staticmethod
+    def key(tool_name: str, arguments: Optional[Dict[str, Any]]) -> str:
+        """Tool name plus arguments in canonical form (sorted keys, no whitespace)."""
+        return f"{tool_name}:{json.dumps(arguments or {}, sort_keys=True, separators=(',', ':'), default=str)}"
+
+    def get(self, key: str) -> Optional[CallToolResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: str, result: CallToolResult) -> None:
+        size = len(result.model_dump_json())
+        if size > self.max_entry_bytes:
+            return
+        if key in self._entries:
+            self.stats.size_bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (result, size)
+        self.stats.size_bytes += size
+        while len(self._entries) > self.max_entries or self.stats.size_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.stats.size_bytes -= evicted_size
+            self.stats.evictions += 1
+        self.stats.entries = len(self._entries)
+
+    async def get_or_call(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        The cached result for `key`, the result of an identical call already
+        in flight, or else the result of `call()` (cached if it succeeded).
+        """
+        cached = self.get(key)
+        if cached is not None:
+            self.stats.hits += 1
+            return cached
+
+        while key in self._in_flight:
+            pending = self._in_flight[key]
+            result = await asyncio.shield(pending)
+            if result is not None:
+                self.stats.shared += 1
+                return result
+            # That call failed or was cancelled: make our own rather than inherit its error
+
+        self.stats.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        shareable = None
+        try:
+            result = await call()
+            if self._cacheable(result):
+                self.put(key, result)
+                shareable = result
+            return result
+        finally:
+            del self._in_flight[key]
+            future.set_result(shareable)
+
+    @staticmethod
+    def _cacheable(result: Any) -> bool:
+        return isinstance(result, CallToolResult) and not result.isError
+
+    def snapshot(self) -> ResultCacheStats:
+        return self.stats.model_copy()
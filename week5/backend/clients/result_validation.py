@@ -0,0 +1,164 @@
+from typing import Any, Callable, Dict, List, Literal, Optional
+from mcp.types import CallToolResult
+from pydantic import BaseModel
+import json
+import math
+import sys
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+# Relative difference tolerated between a float result and its recomputation
+REL_TOLERANCE = 1e-9
+# Largest inputs recomputed locally; bigger ones are left to the model to judge
+MAX_RECOMPUTE_N = 10_000  # factorial / fibonacci_numbers argument
+MAX_RECOMPUTE_BITS = 100_000  # estimated size of a power result
+
+
+class ValidationVerdict(BaseModel):
+    tool: str
+    status: Literal["valid", "invalid", "undecided"]
+    expected: Optional[str] = None
+    detail: Optional[str] = None
+
+    @property
+    def decided(self) -> bool:
+        return self.status != "undecided"
+
+
+class TooExpensive(ValueError):
+    """Raised by a recomputation whose inputs are too large to repeat locally."""
+
+
+Recompute = Callable[[Dict[str, Any]], Any]
+
+
+def _int(arguments: Dict[str, Any], name: str) -> int:
+    return int(arguments[name])
+
+
+def _bounded(n: int) -> int:
+    if n > MAX_RECOMPUTE_N:
+        raise TooExpensive(f"input {n} is larger than {MAX_RECOMPUTE_N}")
+    return n
+
+
+def _power(arguments: Dict[str, Any]) -> int:
+    a, b = _int(arguments, "a"), _int(arguments, "b")
+    if b > 0 and max(abs(a).bit_length(), 1) * b > MAX_RECOMPUTE_BITS:
+        raise TooExpensive(f"{a}**{b} is too large")
+    return a ** b
+
+
+def _fibonacci(arguments: Dict[str, Any]) -> List[int]:
+    n = _bounded(_int(arguments, "n"))
+    sequence = [0, 1]
+    for _ in range(2, n):
+        sequence.append(sequence[-1] + sequence[-2])
+    return sequence[:max(n, 0)]
+
+
+def _int_list(arguments: Dict[str, Any], name: str) -> List[int]:
+    values = arguments[name]
+    if isinstance(values, str):
+        values = json.loads(values)
+    return [int(value) for value in values]
+
+
+# Independent in-process implementations of the calculator tools
+CALCULATOR_RECOMPUTE: Dict[str, Recompute] = {
+    "add": lambda args: _int(args, "a") + _int(args, "b"),
+    "add_list": lambda args: sum(_int_list(args, "l")),
+    "subtract": lambda args: _int(args, "a") - _int(args, "b"),
+    "multiply": lambda args: _int(args, "a") * _int(args, "b"),
+    "divide": lambda args: _int(args, "a") / _int(args, "b"),
+    "power": _power,
+    "sqrt": lambda args: _int(args, "a") ** 0.5,
+    "cbrt": lambda args: _int(args, "a") ** (1 / 3),
+    "factorial": lambda args: math.factorial(_bounded(_int(args, "a"))),
+    "log": lambda args: math.log(_int(args, "a")),
+    "remainder": lambda args: _int(args, "a") % _int(args, "b"),
+    "sin": lambda args: math.sin(_int(args, "a")),
+    "cos": lambda args: math.cos(_int(args, "a")),
+    "tan": lambda args: math.tan(_int(args, "a")),
+    "mine": lambda args: _int(args, "a") - 2 * _int(args, "b"),
+    "strings_to_chars_to_int": lambda args: [ord(char) for char in str(args["string"])],
+    "int_list_to_exponential_sum": lambda args: sum(math.exp(value) for value in _int_list(args, "int_list")),
+    "fibonacci_numbers": _fibonacci,
+}
+
+
+def _too_long(value: Any) -> bool:
+    """Whether an int (or any int of a list) has more digits than this process parses from text."""
+    if isinstance(value, list):
+        return any(map(_too_long, value))
+    limit = sys.get_int_max_str_digits()
+    return isinstance(value, int) and limit > 0 and abs(value).bit_length() * math.log10(2) > limit - 1
+
+
+def _parse(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _same(expected: Any, actual: Any) -> bool:
+    if isinstance(expected, list):
+        return isinstance(actual, list) and len(expected) == len(actual) and all(map(_same, expected, actual))
+    if isinstance(expected, float) or isinstance(actual, float):
+        try:
+            return math.isclose(float(expected), float(actual), rel_tol=REL_TOLERANCE)
+        except (TypeError, ValueError, OverflowError):
+            return False
+    return expected == actual
+
+
+class LocalValidator:
+    def __init__(self, recompute: Optional[Dict[str, Recompute]] = None) -> None:
+        """
+        Checks tool results in-process instead of asking the model to validate them.
+
+        A result is recomputed with an independent local implementation of
+        the tool and compared with what the server returned. Tools without a
+        registered recomputation, and inputs too large to repeat cheaply,
+        get an "undecided" verdict, which leaves validation to the model.
+
+        Args:
+            recompute: Recomputation per tool name (the calculator tools by default)
+        """
+        self.recompute: Dict[str, Recompute] = dict(CALCULATOR_RECOMPUTE if recompute is None else recompute)
+
+    def register(self, tool_name: str, recompute: Recompute) -> None:
+        """Add (or replace) the local recomputation for a tool."""
+        self.recompute[tool_name] = recompute
+
+    def validate(self, tool_name: str, arguments: Dict[str, Any], result: CallToolResult) -> ValidationVerdict:
+        """Verdict on a successful tool result."""
+        recompute = self.recompute.get(tool_name)
+        if recompute is None:
+            return ValidationVerdict(tool=tool_name, status="undecided", detail="no local check for this tool")
+        try:
+            expected = recompute(arguments or {})
+        except TooExpensive as e:
+            return ValidationVerdict(tool=tool_name, status="undecided", detail=str(e))
+        except (KeyError, TypeError, ValueError, ArithmeticError) as e:
+            return ValidationVerdict(tool=tool_name, status="undecided", detail=f"could not recompute: {type(e).__name__}: {e}")
+        if _too_long(expected):
+            # The server's text of such a result cannot be parsed back here to compare
+            return ValidationVerdict(tool=tool_name, status="undecided", detail="result too long to compare")
+
+        # FastMCP returns list results as one content item per element
+        values = [_parse(content.text) for content in result.content if content.type == "text"]
+        actual = values if isinstance(expected, list) else (values[0] if len(values) == 1 else values)
+        if _same(expected, actual):
+            return ValidationVerdict(tool=tool_name, status="valid")
+        try:
+            expected_text = json.dumps(expected)
+        except ValueError:
+            # Integers too long to print
+            expected_text = None
+        logger.warning(f"Local validation of {tool_name} with {arguments} failed: expected {(expected_text or '?')[:200]}")
+        return ValidationVerdict(tool=tool_name, status="invalid", expected=expected_text, detail="result differs from the local recomputation")
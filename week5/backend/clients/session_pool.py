@@ -0,0 +1,219 @@
+from collections import deque
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import AsyncContextManager, AsyncIterator, Callable, Deque, Dict, Optional, Set, Type
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+import asyncio
+import time
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+# Pool defaults
+POOL_SIZE = 2  # max live sessions per server
+IDLE_TIMEOUT = 300  # seconds an idle session is kept alive
+HEALTH_CHECK_INTERVAL = 30  # seconds of idleness after which a session is pinged before reuse
+SESSION_TIMEOUT = 10  # seconds
+
+class PooledSession:
+    def __init__(self, server_name: str) -> None:
+        """
+        A single initialized MCP session owned by a background task.
+
+        The stdio transport and ClientSession are entered and exited inside
+        the same task (anyio cancel scopes require it), so the session is kept
+        open by parking that task on an event until the pool closes it.
+
+        Args:
+            server_name: Name of the server the session is connected to
+        """
+        self.server_name = server_name
+        self.session: Optional[ClientSession] = None
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self._task is not None and not self._task.done() and not self._closing.is_set()
+
+    async def close(self) -> None:
+        """Signal the owning task to tear down the session and wait for it."""
+        self._closing.set()
+        if self._task is None:
+            return
+        if self.session is None:
+            # Still spawning or initializing: nothing to shut down gracefully
+            self._task.cancel()
+        try:
+            async with asyncio.timeout(SESSION_TIMEOUT):
+                await asyncio.shield(self._task)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self._task.cancel()
+        except Exception:
+            pass
+
+
+class MCPSessionPool:
+    def __init__(
+        self,
+        size: int = POOL_SIZE,
+        idle_timeout: float = IDLE_TIMEOUT,
+        health_check_interval: float = HEALTH_CHECK_INTERVAL,
+        session_class: Type[ClientSession] = ClientSession,
+    ) -> None:
+        """
+        Keep up to `size` initialized sessions alive per server and hand them out to callers.
+
+        Args:
+            size: Maximum number of live sessions per server
+            idle_timeout: Seconds after which an unused session is closed
+            health_check_interval: Idle seconds after which a session is pinged before reuse
+            session_class: ClientSession (sub)class opened on every transport
+        """
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.session_class = session_class
+        self.server_params: Dict[str, StdioServerParameters] = {}
+        self._transports: Dict[str, Callable[[], AsyncContextManager]] = {}
+        self._idle: Dict[str, Deque[PooledSession]] = {}
+        self._live: Dict[str, Set[PooledSession]] = {}
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._reaper: Optional[asyncio.Task] = None
+        # Spawn/initialize timings of the first session opened per server
+        self.startup_timings: Dict[str, Dict[str, float]] = {}
+
+    def register(self, server_name: str, server_params: StdioServerParameters) -> None:
+        """Register the parameters used to spawn sessions for a server over stdio."""
+        self.server_params[server_name] = server_params
+        self.register_transport(server_name, partial(stdio_client, server_params))
+
+    def register_transport(self, server_name: str, transport: Callable[[], AsyncContextManager]) -> None:
+        """Register a transport factory yielding (read, write) streams for a server."""
+        self._transports[server_name] = transport
+        self._idle.setdefault(server_name, deque())
+        self._live.setdefault(server_name, set())
+        self._limits.setdefault(server_name, asyncio.Semaphore(self.size))
+
+    @asynccontextmanager
+    async def acquire(self, server_name: str) -> AsyncIterator[ClientSession]:
+        """
+        Check out an initialized session for `server_name`.
+
+        The session is returned to the pool when the block exits normally and
+        discarded if the block raises (including timeouts), since a request
+        may still be pending on it.
+        """
+        if server_name not in self._transports:
+            raise KeyError(f"Server '{server_name}' is not registered with the session pool")
+        self._ensure_reaper()
+
+        async with self._limits[server_name]:
+            pooled = await self._checkout(server_name)
+            try:
+                yield pooled.session
+            except BaseException:
+                logger.warning(f"Discarding session for {server_name} after failed call")
+                await pooled.close()
+                raise
+            else:
+                pooled.last_used = time.monotonic()
+                self._idle[server_name].append(pooled)
+
+    async def _checkout(self, server_name: str) -> PooledSession:
+        """Return a healthy idle session, or open a new one."""
+        idle = self._idle[server_name]
+        while idle:
+            # LIFO: reuse the most recently used session so older ones can age out
+            pooled = idle.pop()
+            if not pooled.alive:
+                continue
+            if time.monotonic() - pooled.last_used > self.health_check_interval:
+                if not await self._is_healthy(pooled):
+                    logger.warning(f"Session for {server_name} failed health check, replacing")
+                    await pooled.close()
+                    continue
+            return pooled
+        return await self._open(server_name)
+
+    async def _is_healthy(self, pooled: PooledSession) -> bool:
+        try:
+            async with asyncio.timeout(SESSION_TIMEOUT):
+                await pooled.session.send_ping()
+            return True
+        except Exception:
+            return False
+
+    async def _open(self, server_name: str) -> PooledSession:
+        """Spawn a server, initialize a session on it and wait until it is ready."""
+        pooled = PooledSession(server_name)
+        ready = asyncio.get_running_loop().create_future()
+        pooled._task = asyncio.create_task(self._hold(pooled, ready))
+        self._live[server_name].add(pooled)
+        try:
+            await ready
+        except BaseException:
+            await pooled.close()
+            raise
+        logger.info(f"Opened pooled session for {server_name}")
+        return pooled
+
+    async def _hold(self, pooled: PooledSession, ready: asyncio.Future) -> None:
+        """Own the transport and session for their whole lifetime."""
+        transport = self._transports[pooled.server_name]
+        started = time.perf_counter()
+        try:
+            async with transport() as (read, write):
+                spawned = time.perf_counter()
+                async with self.session_class(read, write) as session:
+                    await session.initialize()
+                    self.startup_timings.setdefault(pooled.server_name, {
+                        "spawn_seconds": spawned - started,
+                        "initialize_seconds": time.perf_counter() - spawned,
+                    })
+                    pooled.session = session
+                    ready.set_result(pooled)
+                    await pooled._closing.wait()
+        except BaseException as e:
+            if not ready.done():
+                ready.set_exception(e if isinstance(e, Exception) else RuntimeError(f"Session for {pooled.server_name} was cancelled"))
+            if not isinstance(e, Exception):
+                raise
+            logger.error(f"Session for {pooled.server_name} terminated: {e}")
+        finally:
+            pooled._closing.set()
+            self._live[pooled.server_name].discard(pooled)
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_idle())
+
+    async def _reap_idle(self) -> None:
+        """Periodically close sessions that have been idle for longer than `idle_timeout`."""
+        while True:
+            await asyncio.sleep(min(self.idle_timeout, self.health_check_interval))
+            now = time.monotonic()
+            # Snapshots: servers may be registered and sessions checked out while a close is awaited
+            for server_name, idle in list(self._idle.items()):
+                for pooled in list(idle):
+                    if not pooled.alive or now - pooled.last_used > self.idle_timeout:
+                        if pooled not in idle:
+                            continue  # checked out meanwhile
+                        idle.remove(pooled)
+                        logger.info(f"Evicting idle session for {server_name}")
+                        await pooled.close()
+
+    async def close(self) -> None:
+        """Stop the reaper and close every session, idle or checked out, shutting down its server."""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        for idle in self._idle.values():
+            idle.clear()
+        live = [pooled for sessions in self._live.values() for pooled in sessions]
+        await asyncio.gather(*(pooled.close() for pooled in live))
@@ -2,9 +2,14 @@ from typing import List, Dict, Optional, Tuple
 from google.genai import types
 import asyncio
 import logging
+import time
 from clients.gemini_mpc_client import GeminiMCPClient
+from clients.deadline import Deadline, DeadlineExceeded
+from clients.result_validation import LocalValidator, ValidationVerdict
+from clients.budget import BudgetUsage, RunBudget
 import os
 import json
+import uuid
 from prompts.agent_system import AGENT_SYSTEM_INSTRUCTIONS
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
@@ -31,9 +36,23 @@ app.add_middleware(
 
 class ChatMessage(BaseModel):
     content: str
+    session_id: Optional[str] = None
+    # Optional tighter time budget for this request (capped at CHAT_BUDGET)
+    deadline_seconds: Optional[float] = None
 
 class ChatResponse(BaseModel):
     response: str
+    # What the request spent of its model, token, cost and time budgets
+    budget: Optional[BudgetUsage] = None
+
+# Time budget of one /chat request, and the most a single model call may take of it
+CHAT_BUDGET = 60  # seconds
+LLM_TIMEOUT = 20  # seconds
+# Sampling temperature of turns in which the model validates a result itself; other turns are deterministic
+VALIDATION_TEMPERATURE = 1.0
+
+# Recomputes tool results in-process, so the model only validates what this cannot decide
+result_validator = LocalValidator()
 
 # Initialize MCP client and servers
 mcp_client = None
@@ -42,17 +61,27 @@ python_mcp_servers = {
     "keynote": os.path.join("servers", "keynote/mcp_server.py"),
     "email": os.path.join("servers", "email/mcp_server.py"),
 }
+# Share one server instance across workers, e.g. MCP_CALCULATOR_URL=http://127.0.0.1:8001/sse
+for server_name in python_mcp_servers:
+    python_mcp_servers[server_name] = os.getenv(f"MCP_{server_name.upper()}_URL", python_mcp_servers[server_name])
 
 @app.on_event("startup")
 async def startup_event():
     global mcp_client
     logger.info("Initializing Gemini MCP client")
     mcp_client = GeminiMCPClient()
-    await mcp_client.connect_to_multiple_servers(python_mcp_servers)
+    startup_report = await mcp_client.connect_to_multiple_servers(python_mcp_servers)
+    for line in startup_report.log_lines():
+        logger.info(f"MCP startup: {line}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if mcp_client:
+        logger.info("Closing pooled MCP sessions")
+        await mcp_client.close()
 
 @app.post("/chat", response_model=ChatResponse)
 async def chat(message: ChatMessage):
-    global mcp_client
     if not mcp_client:
         raise HTTPException(status_code=500, detail="MCP client not initialized")
     
@@ -63,17 +92,41 @@ async def chat(message: ChatMessage):
         
         # Process the message
         contents = [types.Content(role="user", parts=[types.Part(text=message.content)])]
-        response = await run_agent_loop(system_instruction, contents, mcp_client)
+        # Tool calls are queued fairly per conversation; anonymous requests each count as their own
+        caller = message.session_id or uuid.uuid4().hex
+        budget = RunBudget(Deadline(min(message.deadline_seconds or CHAT_BUDGET, CHAT_BUDGET)))
+        try:
+            response = await run_agent_loop(system_instruction, contents, mcp_client, caller=caller, budget=budget)
+        finally:
+            logger.info(f"Request budget: {budget.report().model_dump()}")
         
         if response:
-            return ChatResponse(response=response)
+            return ChatResponse(response=response, budget=budget.report())
         else:
-            return ChatResponse(response="No response generated")
+            return ChatResponse(response="No response generated", budget=budget.report())
             
     except Exception as e:
         logger.error(f"Error processing chat message: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/mcp/stats")
+async def mcp_stats():
+    """Per-server concurrency limits, queue depth and wait times, for sizing servers."""
+    if not mcp_client:
+        raise HTTPException(status_code=500, detail="MCP client not initialized")
+    return {
+        name: {**stats.model_dump(), "avg_wait_seconds": stats.avg_wait_seconds}
+        for name, stats in mcp_client.concurrency_stats().items()
+    }
+
+@app.get("/mcp/cache")
+async def mcp_cache():
+    """Hit ratio and size of the tool result cache."""
+    if not mcp_client:
+        raise HTTPException(status_code=500, detail="MCP client not initialized")
+    stats = mcp_client.cache_stats()
+    return {**stats.model_dump(), "hit_ratio": stats.hit_ratio}
+
 def parse_tool_call(tool_call_str: str) -> Tuple[Optional[str], Optional[Dict]]:
     """
     Parse a tool call string into its components.
@@ -109,10 +162,55 @@ def parse_tool_call(tool_call_str: str) -> Tuple[Optional[str], Optional[Dict]]:
         logger.error(f"Error parsing tool call: {str(e)}", exc_info=True)
         return None, None
 
+async def generate_with_deadline(
+    mcp_client: GeminiMCPClient,
+    contents: List[types.Content],
+    system_instruction: str,
+    temperature: float,
+    budget: RunBudget,
+) -> types.GenerateContentResponse:
+    """
+    Model call bounded by LLM_TIMEOUT and by what is left of the request's deadline.
+
+    The call and its tokens are counted against `budget`, which also picks
+    the model (a cheaper one once the budget runs low).
+    """
+    timeout = budget.deadline.budget(LLM_TIMEOUT)
+    model = budget.start_llm_call()
+    try:
+        async with asyncio.timeout(timeout):
+            response = await mcp_client.client.aio.models.generate_content(
+                model=model,
+                contents=contents,
+                config=types.GenerateContentConfig(
+                    system_instruction=system_instruction,
+                    temperature=temperature,
+                ),
+            )
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"model call did not finish within {timeout:.1f}s") from None
+    usage = response.usage_metadata
+    if usage:
+        budget.record_llm(model, usage.prompt_token_count or 0, usage.candidates_token_count or 0)
+    return response
+
+
+def best_partial_answer(contents: List[types.Content], reason: str) -> str:
+    """Best answer available when the loop cannot finish: the latest tool result, if any."""
+    for content in reversed(contents):
+        text = content.parts[0].text if content.parts else None
+        if content.role == "user" and text and text.startswith('{"result"'):
+            return f"{json.loads(text)['result']} (partial answer: {reason})"
+    return f"No answer could be produced in time ({reason})"
+
+
 async def run_agent_loop(
     system_instruction: str,
     contents: List[types.Content],
-    mcp_client: Optional[GeminiMCPClient] = None
+    mcp_client: Optional[GeminiMCPClient] = None,
+    caller: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+    budget: Optional[RunBudget] = None,
 ) -> Optional[types.Content]:
     """
     Execute the main agent loop for processing queries and tool interactions.
@@ -121,6 +219,10 @@ async def run_agent_loop(
         system_instruction (str): The system instructions for the agent.
         contents (List[types.Content]): The conversation history.
         mcp_client (Optional[GeminiMCPClient]): The MCP client instance.
+        caller (Optional[str]): Conversation id used for fair queueing of tool calls.
+        deadline (Optional[Deadline]): Time budget shared by all model and tool calls.
+        budget (Optional[RunBudget]): Model call, token, cost and time budgets (its deadline
+            takes the place of `deadline`). The number of turns adapts to what is left of it.
             
     Returns:
         Optional[types.Content]: The final response content, or None if an error occurs.
@@ -129,16 +231,17 @@ async def run_agent_loop(
         logger.error("MCP client not provided")
         return None
 
+    budget = budget or RunBudget(deadline or Deadline(CHAT_BUDGET))
+    deadline = budget.deadline
+
     # Initial model call
     logger.info("Making initial model call")
-    response = await mcp_client.client.aio.models.generate_content(
-        model=mcp_client.model,
-        contents=contents,
-        config=types.GenerateContentConfig(
-            system_instruction=system_instruction,
-            temperature=0,
-        ),
-    )
+    budget.start_turn()
+    try:
+        response = await generate_with_deadline(mcp_client, contents, system_instruction, 0, budget)
+    except DeadlineExceeded as e:
+        logger.warning(f"Stopping before the first model response: {e}")
+        return best_partial_answer(contents, str(e))
 
     # Process initial response
     contents.append(response.candidates[0].content)
@@ -156,45 +259,69 @@ async def run_agent_loop(
         validation_call = True
 
 
-    # Tool interaction loop
-    turn_count = 1
-    max_tool_turns = 10
+    # Local verdict on the latest tool result
+    last_verdict: Optional[ValidationVerdict] = None
 
-    while (function_call or validation_call) and turn_count < max_tool_turns:
-        turn_count += 1
+    # Tool interaction loop
+    # Turns allowed shrink with what the turns so far say the budget left will cover
+    while (function_call or validation_call) and budget.usage.turns < budget.turn_allowance():
+        budget.start_turn()
         if function_call:
-            logger.info(f"Tool turn {turn_count}/{max_tool_turns}")
+            logger.info(f"Tool turn {budget.usage.turns}/{budget.turn_allowance()}")
 
             # Process function call
             tool_name = function_call.name
             args = function_call.args or {}
             logger.info(f"Executing tool: '{tool_name}' with args: {args}")
+            last_verdict = None
 
+            started = time.monotonic()
             try:
-                tool_result = await mcp_client.execute_tool(function_call)
-                if tool_result.isError:
+                tool_result = await mcp_client.execute_tool(
+                    function_call,
+                    caller=caller,
+                    deadline=deadline,
+                    on_progress=lambda progress, total: logger.info(f"{tool_name} progress: {progress:g}/{total or '?'}"),
+                )
+                if isinstance(tool_result, str):
+                    # Rejected, timed out or failed before reaching the server
+                    tool_response = {"error": tool_result}
+                    logger.error(f"Tool execution failed: {tool_result}")
+                elif tool_result.isError:
                     tool_response = {"error": tool_result.content[0].text}
                     logger.error(f"Tool execution failed: {tool_result.content[0].text}")
                 else:
-                    tool_response = {"result": tool_result.content[0].text}
-                    logger.info("Tool execution successful")
+                    last_verdict = result_validator.validate(tool_name, args, tool_result)
+                    tool_response = {"result": tool_result.content[0].text, "validation": last_verdict.model_dump(exclude_none=True)}
+                    logger.info(f"Tool execution successful, local validation: {last_verdict.status}")
             except Exception as e:
                 tool_response = {"error": f"Tool execution failed: {type(e).__name__}: {str(e)}"}
                 logger.error(f"Tool execution error: {str(e)}", exc_info=True)
+            budget.record_tool(time.monotonic() - started)
 
             # Update conversation with tool response
             contents.append(types.Content(role="user", parts=[types.Part(text=json.dumps(tool_response))]))
+            temperature = 0
+        elif last_verdict is not None and last_verdict.decided:
+            # The model asked to validate a result that was already checked locally: answer with the verdict
+            logger.info(f"Answering validation step with the local verdict: {last_verdict.status}")
+            contents.append(types.Content(role="user", parts=[types.Part(text=json.dumps({"validation": last_verdict.model_dump(exclude_none=True)}))]))
+            temperature = 0
+        elif budget.skip_validation():
+            # Too little budget left for the model to validate the result itself: carry on without
+            contents.append(types.Content(role="user", parts=[types.Part(text=json.dumps({"validation": {"status": "skipped", "detail": "request budget running low"}}))]))
+            temperature = 0
+        else:
+            # Nothing checkable locally: the model validates
+            temperature = VALIDATION_TEMPERATURE
 
         # Get next model response
         logger.info("Requesting model response with tool results/validation")
-        response = await mcp_client.client.aio.models.generate_content(
-            model=mcp_client.model,
-            contents=contents,
-            config=types.GenerateContentConfig(
-                system_instruction=system_instruction,
-                temperature=1.0,
-            ),
-        )
+        try:
+            response = await generate_with_deadline(mcp_client, contents, system_instruction, temperature, budget)
+        except DeadlineExceeded as e:
+            logger.warning(f"Stopping after {budget.usage.turns} turns: {e}")
+            return best_partial_answer(contents, str(e))
 
         # Process response
         response_text = response.candidates[0].content.parts[0].text
@@ -213,8 +340,12 @@ async def run_agent_loop(
         if "FINAL_ANSWER" in response_text:
             break
 
-    if turn_count >= max_tool_turns and function_call:
-        logger.warning(f"Maximum tool turns ({max_tool_turns}) reached")
+    if (function_call or validation_call) and budget.usage.turns >= budget.turn_allowance():
+        # Stopped with a tool call or validation still pending: that is no answer
+        logger.warning(f"Turn allowance ({budget.turn_allowance()}) reached, {budget.exhausted() or 'no'} budget used up")
+        if budget.exhausted() is not None:
+            return best_partial_answer(contents, f"{budget.exhausted()} budget used up after {budget.usage.turns} turns")
+        return best_partial_answer(contents, f"turn allowance of {budget.turn_allowance()} reached")
 
     logger.info("Agent loop completed")
     output = contents[-1].parts[0].text
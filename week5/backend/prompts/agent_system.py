@@ -41,6 +41,9 @@ Response should EXACTLY contain one of the following:
     tool_name is the name of the tool.
     tool_args is a JSON object containing arguments.
 2. STEP_VALIDATION | validation result of the previous response from model/tool
+    Tool results come with a "validation" verdict computed locally. Do not validate a result whose
+    verdict is "valid" or "invalid"; use STEP_VALIDATION only for "undecided" results and your own reasoning.
+    A "skipped" validation reply means the request is running out of budget: continue without validating.
 3. FINAL_ANSWER | answer
     answer is the final answer to the user's question.
 
@@ -0,0 +1,31 @@
+from typing import Iterable
+from mcp.server.fastmcp import FastMCP
+from mcp.types import Tool
+
+# Tool annotation telling clients that a result depends on the arguments only,
+# so it may be cached and shared. Must match clients/result_cache.py on the backend side.
+CACHEABLE_HINT = "cacheableHint"
+
+
+def declare_cacheable(server: FastMCP, tool_names: Iterable[str]) -> None:
+    """
+    Advertise `tool_names` as pure functions in the server's tools/list.
+
+    They get the annotations readOnlyHint, idempotentHint and cacheableHint.
+    Clients that do not know these annotations ignore them.
+    """
+    cacheable = set(tool_names)
+    unknown = cacheable - {tool.name for tool in server._tool_manager.list_tools()}
+    if unknown:
+        raise ValueError(f"Cannot declare unknown tools cacheable: {', '.join(sorted(unknown))}")
+
+    def with_hints(tool: Tool) -> Tool:
+        # Merged into the dump: newer mcp versions have an annotations field of their own
+        fields = tool.model_dump(by_alias=True, exclude_none=True)
+        hints = {**(fields.get("annotations") or {}), "readOnlyHint": True, "idempotentHint": True, CACHEABLE_HINT: True}
+        return Tool(**{**fields, "annotations": hints})
+
+    async def list_tools() -> list[Tool]:
+        return [with_hints(tool) if tool.name in cacheable else tool for tool in await server.list_tools()]
+
+    server._mcp_server.list_tools()(list_tools)
@@ -54,5 +54,6 @@ def send_email_with_app_password(receiver: str, subject: str, body: str) -> str:
 
 
 if __name__ == "__main__":
-    # run the server
-    mcp.run()
\ No newline at end of file
+    # run the server: over stdio by default, or MCP_TRANSPORT=sse to serve it over HTTP
+    # (FASTMCP_HOST / FASTMCP_PORT) so several agent processes can share one instance
+    mcp.run(transport=os.getenv("MCP_TRANSPORT", "stdio"))
\ No newline at end of file
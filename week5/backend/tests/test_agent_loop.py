@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+from google.genai import types
+from mcp.types import CallToolResult, TextContent
+from clients.budget import RunBudget
+from clients.deadline import Deadline
+import main
+import asyncio
+
+
+def model_response(text: str) -> types.GenerateContentResponse:
+    return types.GenerateContentResponse(candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]))])
+
+
+def fake_client(texts):
+    """A client whose model answers with `texts` in turn (the last one from then on) and whose add tool works."""
+    texts = list(texts)
+
+    async def generate_content(**kwargs):
+        return model_response(texts.pop(0) if len(texts) > 1 else texts[0])
+
+    async def execute_tool(function_call, **kwargs):
+        args = function_call.args
+        return CallToolResult(content=[TextContent(type="text", text=str(args["a"] + args["b"]))], isError=False)
+
+    return SimpleNamespace(client=SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))), execute_tool=execute_tool)
+
+
+def run(texts, budget: RunBudget) -> str:
+    contents = [types.Content(role="user", parts=[types.Part(text="add 10 and 1, forever")])]
+    return asyncio.run(main.run_agent_loop("", contents, fake_client(texts), budget=budget))
+
+
+def test_final_answer_is_returned():
+    answer = run(['TOOL_CALL|add|{"a": 10, "b": 1}', "FINAL_ANSWER | [11]"], RunBudget(Deadline(60)))
+    assert answer == "[11]"
+
+
+def test_turn_allowance_reached_returns_the_latest_result():
+    answer = run(['TOOL_CALL|add|{"a": 10, "b": 1}'], RunBudget(Deadline(60), max_turns=3))
+    assert answer == "11 (partial answer: turn allowance of 3 reached)"
+
+
+def test_used_up_budget_returns_the_latest_result():
+    answer = run(['TOOL_CALL|add|{"a": 10, "b": 1}'], RunBudget(Deadline(60), max_llm_calls=2))
+    assert answer == "11 (partial answer: llm_calls budget used up after 2 turns)"
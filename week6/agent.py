@@ -1,17 +1,30 @@
 
 from google.genai import types
+from functools import partial
+from typing import Dict, List, Optional, Tuple
 import logging
 import json
+import time
 
 from src.utils.logger import configure_logger
 import asyncio
 import os
 from src.clients.mcp_servers import PythonMCPClient
+from src.clients.array_encoding import tool_result_value
 from src.components.memory import MemoryManager
-from src.models.agent_components import MemoryItem
+from src.components.artifacts import ArtifactStore
+from src.models.agent_components import MemoryItem, PerceptionResult, Plan
+from src.models.mcp_servers import MCPServerConfig
 from src.clients.gemini import GeminiClient
+from src.utils.deadline import Deadline, DeadlineExceeded
 
 from src.components.decision import generate_plan
+from src.components.planner import execute_plan, generate_dag_plan, render_final_answer
+from src.components.speculation import Speculation
+from src.components.fast_path import answer_directly
+from src.components.plan_templates import PlanTemplateCache, TraceEntry
+from src.components.call_history import CallHistory
+from src.components.budget import RunBudget
 from src.components.perception import extract_perception
 from src.models.agent_components import MemoryItem
 
@@ -25,19 +38,170 @@ logger = logging.getLogger(__name__)
 # Initialize MCP client and servers
 mcp_client = None
 python_mcp_servers = {
-    "calculator": os.path.join("servers", "calculator/mcp_server.py"),
-    "keynote": os.path.join("servers", "keynote/mcp_server.py"),
-    "email": os.path.join("servers", "email/mcp_server.py"),
+    # Calculator tools are trusted, pure and fast: serve them in-process over memory streams
+    "calculator": MCPServerConfig(
+        path=os.path.join("servers", "calculator/mcp_server.py"),
+        transport="inprocess",
+        # Pure functions: safe to retry and to hedge
+        idempotent_tools=["*"],
+        max_retries=2,
+        hedge_after=1.0,
+    ),
+    # Rarely used: advertised from the manifest cache, forked on first call, stopped when idle
+    # Side effects (files, mail): never served from the result cache, whatever the server declares
+    "keynote": MCPServerConfig(path=os.path.join("servers", "keynote/mcp_server.py"), transport="forkserver", lazy=True, idle_shutdown=120, cache_results=False),
+    "email": MCPServerConfig(path=os.path.join("servers", "email/mcp_server.py"), transport="forkserver", lazy=True, idle_shutdown=120, cache_results=False),
 }
+# Use a shared server instead of a private copy, e.g. MCP_CALCULATOR_URL=http://127.0.0.1:8001/sse
+for server_name in python_mcp_servers:
+    if os.getenv(f"MCP_{server_name.upper()}_URL"):
+        python_mcp_servers[server_name] = python_mcp_servers[server_name].model_copy(update={"transport": "sse", "url": os.getenv(f"MCP_{server_name.upper()}_URL")})
 
 from src.components.action import parse_function_call
 
-async def run_agent_loop(): 
+# Time budget of one agent run, and the most any single LLM step may take of it
+RUN_BUDGET = 120  # seconds
+PERCEPTION_TIMEOUT = 20  # seconds
+DECISION_TIMEOUT = 30  # seconds
+# Function calls of one decision step that are run concurrently; further ones are dropped
+MAX_PARALLEL_CALLS = 8
+# Answer plain arithmetic and direct calculator queries locally, without any LLM call
+FAST_PATH = True
+# Replay the tool sequence that solved a query of the same shape before (perceived intent and entity kinds)
+PLAN_TEMPLATES = True
+# Plan all tool calls in one LLM call first, going back to step-by-step decisions only when the plan cannot finish
+PLAN_AHEAD = True
+
+
+async def run_llm_step(step, budget: RunBudget, cap: float, **kwargs):
+    """Run a blocking LLM step in a worker thread, bounded by the run's deadline and counted against its budget."""
+    deadline = budget.deadline
+    timeout = deadline.budget(cap)
+    try:
+        async with asyncio.timeout(timeout):
+            return await asyncio.to_thread(step, timeout=timeout, budget=budget, **kwargs)
+    except (asyncio.TimeoutError, RuntimeError) as e:
+        if deadline.expired:
+            raise DeadlineExceeded(f"time budget of {deadline.seconds:g}s exhausted") from None
+        if isinstance(e, asyncio.TimeoutError):
+            # The step's own cap, not the run's deadline: a failed step, which callers fall back from
+            raise RuntimeError(f"{step.__name__} timed out after {timeout:g}s") from None
+        raise
+
+
+def log_tool_progress(tool_name: str, progress: float, total: Optional[float]) -> None:
+    """Log progress notifications of a long-running tool call."""
+    done = f"{progress:g}/{total:g}" if total else f"{progress:g}"
+    logger.info(f"{tool_name} progress: {done}", extra={"stage": "AGENT"})
+
+
+async def execute_function_call(mcp_client: PythonMCPClient, artifact_store: ArtifactStore, function_call: types.FunctionCall, deadline: Deadline, budget: Optional[RunBudget] = None) -> dict:
+    """Execute one tool call; returns {"result": ...} or {"error": ...} for memory and the next prompt."""
+    tool_name = function_call.name
+    started = time.monotonic()
+    try:
+        # Handles of stored results are passed to the tool as the full value
+        function_call = types.FunctionCall(name=tool_name, args=artifact_store.resolve(function_call.args or {}))
+        tool_result = await mcp_client.execute_tool(
+            function_call,
+            deadline=deadline,
+            on_progress=partial(log_tool_progress, tool_name),
+        )
+        if isinstance(tool_result, str):
+            # Client-side failure (unknown tool, timeout, transport error)
+            logger.error(f"Tool execution failed: {tool_result}")
+            return {"error": tool_result}
+        if tool_result.isError:
+            tool_response = {"error": tool_result_value(tool_result)}
+            logger.error(f"Tool execution failed: {tool_response['error']}")
+            return tool_response
+        logger.info("Tool execution successful")
+        # Decodes packed arrays and keeps every item of list results; large ones are stored by handle
+        return {"result": artifact_store.compact(tool_result_value(tool_result))}
+    except Exception as e:
+        logger.error(f"Tool execution error: {str(e)}", exc_info=True)
+        return {"error": f"Tool execution failed: {type(e).__name__}: {str(e)}"}
+    finally:
+        if budget is not None:
+            budget.record_tool(time.monotonic() - started)
+
+
+async def run_plan_steps(mcp_client: PythonMCPClient, artifact_store: ArtifactStore, plan: Plan, trace: List[TraceEntry], budget: RunBudget, call_history: Optional[CallHistory] = None) -> dict:
+    """Execute the steps of a plan, adding each finished call to `trace` (and `call_history`); returns the responses by step."""
+    async def run_step(step, args):
+        call = partial(execute_function_call, mcp_client, artifact_store, types.FunctionCall(name=step.tool_name, args=args), budget.deadline, budget)
+        response = await (call_history.run(call_history.fingerprint(step.tool_name, args), call) if call_history else call())
+        trace.append((step.tool_name, args, response))
+        return response
+    return await execute_plan(plan, run_step)
+
+
+async def replay_plan_template(mcp_client: PythonMCPClient, artifact_store: ArtifactStore, plan: Plan, budget: RunBudget) -> Optional[str]:
+    """Run a plan template filled in for this query; the final answer, or None if any step fails."""
+    for step in plan.steps:
+        if mcp_client.tool_unavailable(step.tool_name) is not None:
+            return None
+    responses = await run_plan_steps(mcp_client, artifact_store, plan, [], budget)
+    if len(responses) != len(plan.steps) or any("result" not in response for response in responses.values()):
+        logger.warning("Plan template replay failed, falling back to the LLM", extra={"stage": "AGENT"})
+        return None
+    answer = render_final_answer(plan, responses)
+    return artifact_store.expand(answer) if answer is not None else None
+
+
+async def run_plan_ahead(mcp_client: PythonMCPClient, artifact_store: ArtifactStore, memory_manager: MemoryManager, guidance_text: str, query: str, tool_schemas, budget: RunBudget, trace: List[TraceEntry], call_history: CallHistory, perception: Optional[PerceptionResult] = None) -> Tuple[Optional[str], str]:
     """
+    Plan the whole task as steps of tool calls and run them without further LLM calls.
+
+    Returns the final answer if the plan completed, otherwise None and the
+    query with the results so far for the step-by-step loop. Calls made are
+    added to `trace` and `call_history`. A `perception` of the query made
+    already (for the plan templates) is passed on to the planner.
     """
-    mcp_client = PythonMCPClient()
-    await mcp_client.connect_to_multiple_servers(python_mcp_servers)
+    try:
+        plan = await run_llm_step(generate_dag_plan, budget, DECISION_TIMEOUT, guidance_text=guidance_text, user_input=query, tool_descriptions=tool_schemas, perception=perception)
+    except (RuntimeError, ValueError) as e:
+        logger.warning(f"No usable plan, deciding step by step: {e}", extra={"stage": "AGENT"})
+        return None, query
+
+    memory_manager.add(message=MemoryItem(text=query, type='user'))
+    memory_manager.add(message=MemoryItem(text=plan.text, type='ai'))
+    for step in plan.steps:
+        circuit = mcp_client.tool_unavailable(step.tool_name)
+        if circuit is not None:
+            logger.warning(f"Stopping early, '{step.tool_name}' is unavailable: {circuit.model_dump()}", extra={"stage": "AGENT"})
+            return f"Unable to complete the task: tool '{step.tool_name}' is currently unavailable ({circuit.last_error}). Please retry in {circuit.retry_in_seconds:.0f}s.", query
+
+    responses = await run_plan_steps(mcp_client, artifact_store, plan, trace, budget, call_history)
+    step_lines = []
+    for step in plan.steps:
+        if step.step in responses:
+            tool_response_text = json.dumps(responses[step.step])
+            memory_manager.add(message=MemoryItem(text=tool_response_text, type='tool', tool_name=step.tool_name))
+        else:
+            tool_response_text = "not run (needs review)" if step.review else "not run (an earlier step failed)"
+        step_lines.append(f"STEP {step.step} {step.tool_name}: {tool_response_text}")
+
+    completed = len(responses) == len(plan.steps) and all("result" in response for response in responses.values())
+    answer = render_final_answer(plan, responses) if completed else None
+    if answer is not None:
+        return artifact_store.expand(answer), query
+
+    logger.info(f"Plan stopped after {len(responses)} of {len(plan.steps)} steps, continuing step by step", extra={"stage": "AGENT"})
+    results = "\n".join(step_lines)
+    return None, f"Original task: {query}\nResults of the planned steps:\n{results}\nWhat should I do next?"
 
+
+def best_partial_answer(memory_manager: MemoryManager, reason: str) -> str:
+    """Best answer available when the run cannot finish: the latest successful tool result, if any."""
+    for item in reversed(memory_manager.messages):
+        if item.type == "tool" and '"result"' in item.text:
+            return f"PARTIAL_ANSWER: {json.loads(item.text)['result']} (last result of '{item.tool_name}'; {reason})"
+    return f"PARTIAL_ANSWER: [unknown] ({reason})"
+
+
+async def run_task(mcp_client: PythonMCPClient, artifact_store: ArtifactStore, template_cache: PlanTemplateCache, budgets: List[RunBudget]) -> str:
+    """Ask for the guideline and query and work out the answer; the run budget is added to `budgets` once the query is in."""
     # mcp_client = # Initialize tool schemas and system instructions
     tool_schemas = mcp_client.get_tool_schemas()
     # if not mcp_client:
@@ -47,59 +211,202 @@ async def run_agent_loop():
     memory_manager = MemoryManager(guidance_text=guidance_text)
 
     query = input('Enter your query: ')
+    # The budget starts once the query is in: perception, decisions and tool calls all draw from it
+    deadline = Deadline(RUN_BUDGET)
+    budget = RunBudget(deadline)
+    budgets.append(budget)
 
     
-    max_tool_turns = 10
+    if FAST_PATH:
+        answer = await answer_directly(mcp_client, query, deadline, budget)
+        if answer is not None:
+            logger.info(f"✅ FINAL RESULT: {answer}")
+            return answer
+
+    # Tool calls of this run, stored as a plan template if the run succeeds
+    trace: List[TraceEntry] = []
+    task_perception = None
+    # Perceived once: after the template lookup the perception guides the planner, or stands in
+    # for the first step-by-step turn's perception, so it adds no LLM call of its own
+    if PLAN_TEMPLATES:
+        try:
+            task_perception = await run_llm_step(extract_perception, budget, PERCEPTION_TIMEOUT, user_input=query)
+        except DeadlineExceeded as e:
+            logger.warning(f"Stopping while perceiving the task: {e}", extra={"stage": "AGENT"})
+            return best_partial_answer(memory_manager, str(e))
+        except RuntimeError as e:
+            logger.warning(f"No perception for plan templates: {e}", extra={"stage": "AGENT"})
+        template = template_cache.lookup(task_perception) if task_perception is not None else None
+        if template is not None:
+            answer = await replay_plan_template(mcp_client, artifact_store, template, budget)
+            if answer is not None:
+                logger.info(f"✅ FINAL RESULT: {answer}")
+                return answer
+            template_cache.forget(task_perception)
+
+    def remember(answer: str) -> None:
+        if task_perception is not None:
+            template_cache.record(task_perception, trace, answer)
+
+    # Every call of this run by fingerprint, so repeats are answered from earlier results
+    call_history = CallHistory(mcp_client)
+
+    if PLAN_AHEAD:
+        try:
+            answer, query = await run_plan_ahead(mcp_client, artifact_store, memory_manager, guidance_text, query, tool_schemas, budget, trace, call_history, task_perception)
+        except DeadlineExceeded as e:
+            logger.warning(f"Stopping while planning: {e}", extra={"stage": "AGENT"})
+            return best_partial_answer(memory_manager, str(e))
+        if answer is not None:
+            remember(answer)
+            logger.info(f"✅ FINAL RESULT: {answer}")
+            return answer
+
+    # Turns allowed shrink with what the turns so far say the budget left will cover
     turn_count = 0
-    while turn_count < max_tool_turns:
+    perception = None
+    while turn_count < budget.turn_allowance():
         turn_count += 1
-        perception = extract_perception(query)
-        plan = generate_plan(guidance_text=guidance_text, perception=perception, memory_items=memory_manager.messages, tool_descriptions=tool_schemas)
+        budget.start_turn()
+        try:
+            if task_perception is not None and task_perception.user_input == query:
+                # Still the original query: perceived already for the plan templates
+                perception = task_perception
+            elif perception is not None and budget.skip_perception():
+                # Budget running low: a follow-up of the same task, keep what was perceived last
+                perception = perception.model_copy(update={"user_input": query})
+            else:
+                perception = await run_llm_step(extract_perception, budget, PERCEPTION_TIMEOUT, user_input=query)
+            # Overlap the hinted tool's start-up (and, for pure tools, its call) with the decision LLM call
+            speculation = Speculation(mcp_client, perception, deadline)
+            try:
+                plan = await run_llm_step(generate_plan, budget, DECISION_TIMEOUT, guidance_text=guidance_text, perception=perception, memory_items=memory_manager.messages, tool_descriptions=tool_schemas)
+            except BaseException:
+                await speculation.close()
+                raise
+        except DeadlineExceeded as e:
+            logger.warning(f"Stopping after {turn_count - 1} tool turns: {e}", extra={"stage": "AGENT"})
+            return best_partial_answer(memory_manager, str(e))
+        except RuntimeError as e:
+            # An LLM step failed or timed out: answer with what the turns so far produced
+            logger.warning(f"Stopping after {turn_count - 1} tool turns, LLM step failed: {e}", extra={"stage": "AGENT"})
+            return best_partial_answer(memory_manager, str(e))
         
         memory_manager.add(message=MemoryItem(text=query, type='user'))
         memory_manager.add(message=MemoryItem(text=plan, type='ai'))
 
-        if "FINAL_ANSWER" in plan:
+        if "FINAL_ANSWER" in plan and "FUNCTION_CALL" not in plan:
+            await speculation.close()
+            remember(plan)
+            plan = artifact_store.expand(plan)
             logger.info(f"✅ FINAL RESULT: {plan}")
             return plan
 
         if "FUNCTION_CALL" in plan:
-            tool_name, args = parse_function_call(plan)
-            function_call = types.FunctionCall(name=tool_name, args=args)
+            # Independent calls of one decision step run concurrently; results are kept in call order
+            calls = [parse_function_call(line) for line in plan.splitlines() if line.strip().startswith("FUNCTION_CALL:")]
+            if len(calls) > MAX_PARALLEL_CALLS:
+                logger.warning(f"Running the first {MAX_PARALLEL_CALLS} of {len(calls)} function calls", extra={"stage": "AGENT"})
+                calls = calls[:MAX_PARALLEL_CALLS]
+            # A matching speculative call is served from the result cache, anything else is dropped
+            await speculation.settle(calls)
 
-            logger.info(f"Tool turn {turn_count}/{max_tool_turns}")
-            # Process function call
-            tool_name = function_call.name
-            args = function_call.args or {}
-            logger.info(f"Executing tool: '{tool_name}' with args: {args}")
+            logger.info(f"Tool turn {turn_count}/{budget.turn_allowance()}")
+            for tool_name, args in calls:
+                circuit = mcp_client.tool_unavailable(tool_name)
+                if circuit is not None:
+                    # The server is known to be down: stop instead of spending more LLM turns on errors
+                    logger.warning(f"Stopping early, '{tool_name}' is unavailable: {circuit.model_dump()}", extra={"stage": "AGENT"})
+                    await speculation.close()
+                    return f"Unable to complete the task: tool '{tool_name}' is currently unavailable ({circuit.last_error}). Please retry in {circuit.retry_in_seconds:.0f}s."
+                logger.info(f"Executing tool: '{tool_name}' with args: {args}")
 
-            try:
-                tool_result = await mcp_client.execute_tool(function_call)
-                if tool_result.isError:
-                    tool_response = {"error": tool_result.content[0].text}
-                    logger.error(f"Tool execution failed: {tool_result.content[0].text}")
-                else:
-                    tool_response = {"result": tool_result.content[0].text}
-                    
-                    logger.info("Tool execution successful")
-            except Exception as e:
-                tool_response = {"error": f"Tool execution failed: {type(e).__name__}: {str(e)}"}
-                logger.error(f"Tool execution error: {str(e)}", exc_info=True)
-        memory_manager.add(message=MemoryItem(text=json.dumps(tool_response), type='tool', tool_name=tool_name))
-        # memory_manager.add(message=MemoryItem(text=tool_result.content[0].text, type='tool', tool_name=tool_name))
-        # Get next model response
-        query = f"Original task: {query}\nPrevious Tool response: {tool_result.content[0].text}\nWhat should I do next?"
-
-        if turn_count >= max_tool_turns and function_call:
-            logger.warning(f"Maximum tool turns ({max_tool_turns}) reached")
-            break
+            # Calls already made in this run are answered from its results instead of running again
+            fingerprints = [call_history.fingerprint(tool_name, args) for tool_name, args in calls]
+            repeated = call_history.repeats(fingerprints)
+            # Identical calls within the step run once and share the response
+            distinct: Dict[str, Tuple[str, dict]] = {}
+            for fingerprint, call in zip(fingerprints, calls):
+                distinct.setdefault(fingerprint, call)
+            distinct_responses = await asyncio.gather(*(
+                call_history.run(fingerprint, partial(execute_function_call, mcp_client, artifact_store, types.FunctionCall(name=tool_name, args=args), deadline, budget))
+                for fingerprint, (tool_name, args) in distinct.items()
+            ))
+            responses_by_fingerprint = dict(zip(distinct, distinct_responses))
+            tool_responses = [responses_by_fingerprint[fingerprint] for fingerprint in fingerprints]
+            call_history.end_turn(repeated)
+            await speculation.close()
+
+            tool_response_texts = []
+            for (tool_name, args), tool_response, repeat in zip(calls, tool_responses, repeated):
+                if not repeat:
+                    trace.append((tool_name, args, tool_response))
+                tool_response_text = json.dumps(tool_response)
+                memory_manager.add(message=MemoryItem(text=tool_response_text, type='tool', tool_name=tool_name))
+                tool_response_texts.append(f"{tool_name}: {tool_response_text}")
+            # The decision said how the answer follows from these results: no further LLM turn needed
+            final_template = next((line.strip() for line in plan.splitlines() if line.strip().startswith("FINAL_ANSWER:")), None)
+            if final_template is not None and all("result" in tool_response for tool_response in tool_responses):
+                answer = render_final_answer(Plan(text=plan, final_answer=final_template), dict(enumerate(tool_responses, 1)))
+                if answer is not None:
+                    remember(answer)
+                    answer = artifact_store.expand(answer)
+                    logger.info(f"✅ FINAL RESULT: {answer}")
+                    return answer
+
+            if call_history.looping:
+                logger.warning(f"Stopping early, the last {call_history.repeated_turns} decision steps only repeated earlier calls", extra={"stage": "AGENT"})
+                return best_partial_answer(memory_manager, f"stopped after {call_history.repeated_turns} steps repeating earlier tool calls")
 
+            # Get next model response
+            if len(calls) == 1:
+                query = f"Original task: {query}\nPrevious Tool response: {tool_response_text}\nWhat should I do next?"
+            else:
+                responses = "\n".join(tool_response_texts)
+                query = f"Original task: {query}\nPrevious Tool responses, in call order:\n{responses}\nWhat should I do next?"
+            if any(repeated):
+                repeats = ", ".join(tool_name for (tool_name, _), repeat in zip(calls, repeated) if repeat)
+                query += f"\nNote: {repeats} had already been called with the same parameters; the results above are the earlier ones. Do not call them again."
+        else:
+            # Neither a tool call nor an answer (malformed decision): the next turn speculates afresh
+            await speculation.close()
+
+    if budget.exhausted() is not None:
+        logger.warning(f"Stopping after {turn_count} tool turns, {budget.exhausted()} budget used up")
+        return best_partial_answer(memory_manager, f"{budget.exhausted()} budget used up after {turn_count} tool turns")
+    logger.warning(f"Turn allowance ({budget.turn_allowance()}) reached")
     logger.info("Agent loop completed")
-    # output = contents[-1].parts[0].text
-    if "FINAL_ANSWER" in output:
-        output = output.split("FINAL_ANSWER | ")[-1].strip()
+    return best_partial_answer(memory_manager, f"no final answer after {turn_count} tool turns")
+
+
+async def run_agent_loop(): 
+    """
+    """
+    # Keep one warm standby per server so a crashed server fails over without a cold start
+    mcp_client = PythonMCPClient(standby_sessions=1)
+    startup_report = await mcp_client.connect_to_multiple_servers(python_mcp_servers)
+    for line in startup_report.log_lines():
+        logger.info(f"MCP startup: {line}", extra={"stage": "AGENT"})
+    # Large tool results live here; memory and prompts only carry their handle and summary
+    artifact_store = ArtifactStore()
+    template_cache = PlanTemplateCache(is_commutative=mcp_client.is_commutative)
+    budgets: List[RunBudget] = []
 
-    return output
+    try:
+        return await run_task(mcp_client, artifact_store, template_cache, budgets)
+    finally:
+        for health in mcp_client.server_health().values():
+            logger.info(f"MCP server health: {health.model_dump()}", extra={"stage": "AGENT"})
+        for circuit in mcp_client.circuit_states().values():
+            logger.info(f"MCP circuit: {circuit.model_dump()}", extra={"stage": "AGENT"})
+        for stats in mcp_client.concurrency_stats().values():
+            logger.info(f"MCP concurrency: {stats.model_dump()}", extra={"stage": "AGENT"})
+        logger.info(f"MCP result cache: {mcp_client.cache_stats().model_dump()}", extra={"stage": "AGENT"})
+        for budget in budgets:
+            logger.info(f"Run budget: {budget.report().model_dump()}", extra={"stage": "AGENT"})
+        artifact_store.close()
+        # Shut down pooled sessions and their server processes
+        await mcp_client.close()
 
 
 
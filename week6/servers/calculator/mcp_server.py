@@ -1,9 +1,52 @@
 # basic import 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import FastMCP, Context
+from packed_arrays import pack_int_list
+from tool_hints import declare_cacheable
+import anyio
+import decimal
 import math
+import os
+import sys
+from pathlib import Path
+from typing import Union
+
+# Helpers shared by all servers live in servers/, which is only on sys.path while importing them
+servers_dir = str(Path(__file__).resolve().parent.parent)
+sys.path.insert(0, servers_dir)
+try:
+    from cancellation import enable_request_cancellation
+finally:
+    sys.path.remove(servers_dir)
 
 # instantiate an MCP server client
 mcp = FastMCP("Calculator") 
+enable_request_cancellation()
+
+
+def decimal_result(value: int) -> Union[int, str]:
+    """
+    `value`, or its decimal digits if it is too long for int-to-str conversion.
+
+    Results are sent as text, and Python refuses to convert ints of more than
+    sys.get_int_max_str_digits() digits (4300 by default), which the large
+    inputs of factorial, power and fibonacci_numbers exceed. Decimal converts
+    them without that limit, so it stays in place for the rest of the process.
+    """
+    limit = sys.get_int_max_str_digits()
+    # log2(10) > 3.3: fewer bits than this means fewer digits than the limit
+    if not limit or value.bit_length() < limit * 3.3:
+        return value
+    return str(decimal.Decimal(value))
+
+# Long-running tools report progress and yield to the event loop every PROGRESS_CHUNK steps;
+# that is also where a cancelled call stops
+PROGRESS_CHUNK = 2000
+
+
+async def checkpoint(ctx: Context, done: int, total: int) -> None:
+    """Report progress and let the server handle other messages, such as a cancellation of this call."""
+    await ctx.report_progress(done, total)
+    await anyio.sleep(0)
 
 # DEFINE TOOLS
 
@@ -82,7 +125,7 @@ def divide(a: int, b: int) -> float:
 
 # power tool
 @mcp.tool()
-def power(a: int, b: int) -> int:
+async def power(a: int, b: int, ctx: Context) -> Union[int, str]:
     """
     Calculate the power of a number raised to another.
 
@@ -91,9 +134,19 @@ def power(a: int, b: int) -> int:
         b (int): The exponent.
 
     Returns:
-        int: The result of raising the base to the exponent.
-    """
-    return int(a ** b)
+        int: The result of raising the base to the exponent (as a decimal string if very long).
+    """
+    if b < PROGRESS_CHUNK or abs(a) < 2:
+        return decimal_result(int(a ** b))
+    # Square-and-multiply over the exponent's bits, with a checkpoint per bit
+    bits = bin(b)[2:]
+    result = 1
+    for done, bit in enumerate(bits, 1):
+        result *= result
+        if bit == "1":
+            result *= a
+        await checkpoint(ctx, done, len(bits))
+    return decimal_result(result)
 
 # square root tool
 @mcp.tool()
@@ -125,7 +178,7 @@ def cbrt(a: int) -> float:
 
 # factorial tool
 @mcp.tool()
-def factorial(a: int) -> int:
+async def factorial(a: int, ctx: Context) -> Union[int, str]:
     """
     Calculate the factorial of a number.
 
@@ -133,9 +186,28 @@ def factorial(a: int) -> int:
         a (int): The number.
 
     Returns:
-        int: The factorial of the number.
-    """
-    return int(math.factorial(a))
+        int: The factorial of the number (as a decimal string if very long).
+    """
+    if a <= PROGRESS_CHUNK:
+        return decimal_result(int(math.factorial(a)))
+    # Products of consecutive ranges, then multiplied pairwise so the operands stay balanced
+    starts = range(1, a + 1, PROGRESS_CHUNK)
+    steps = 2 * len(starts) - 1
+    parts = []
+    for start in starts:
+        parts.append(math.prod(range(start, min(start + PROGRESS_CHUNK, a + 1))))
+        await checkpoint(ctx, len(parts), steps)
+    done = len(parts)
+    while len(parts) > 1:
+        merged = []
+        for i in range(0, len(parts) - 1, 2):
+            merged.append(parts[i] * parts[i + 1])
+            done += 1
+            await checkpoint(ctx, done, steps)
+        if len(parts) % 2:
+            merged.append(parts[-1])
+        parts = merged
+    return decimal_result(parts[0])
 
 # log tool
 @mcp.tool()
@@ -224,7 +296,7 @@ def mine(a: int, b: int) -> int:
     return int(a - b - b)
 
 @mcp.tool()
-def strings_to_chars_to_int(string: str) -> list[int]:
+def strings_to_chars_to_int(string: str, ctx: Context) -> list[int]:
     """
     Convert a string to a list of ASCII values of its characters.
 
@@ -234,7 +306,7 @@ def strings_to_chars_to_int(string: str) -> list[int]:
     Returns:
         list[int]: A list of ASCII values of the characters in the string.
     """
-    return [int(ord(char)) for char in string]
+    return pack_int_list([int(ord(char)) for char in string], ctx)
 
 @mcp.tool()
 def int_list_to_exponential_sum(int_list: list[int]) -> float:
@@ -250,7 +322,7 @@ def int_list_to_exponential_sum(int_list: list[int]) -> float:
     return sum(math.exp(i) for i in int_list)
 
 @mcp.tool()
-def fibonacci_numbers(n: int) -> list[int]:
+async def fibonacci_numbers(n: int, ctx: Context) -> list[int]:
     """
     Generate the first n Fibonacci numbers.
 
@@ -258,16 +330,29 @@ def fibonacci_numbers(n: int) -> list[int]:
         n (int): The number of Fibonacci numbers to generate.
 
     Returns:
-        list[int]: A list of the first n Fibonacci numbers.
+        list[int]: A list of the first n Fibonacci numbers (very long ones as decimal strings).
     """
     if n <= 0:
         return []
     fib_sequence = [0, 1]
-    for _ in range(2, n):
+    for i in range(2, n):
         fib_sequence.append(fib_sequence[-1] + fib_sequence[-2])
-    return fib_sequence[:n]
+        if i % PROGRESS_CHUNK == 0:
+            await checkpoint(ctx, i, n)
+    result = pack_int_list(fib_sequence[:n], ctx)
+    # Not packed: a plain list, whose numbers FastMCP converts to text one by one
+    return [decimal_result(value) for value in result] if isinstance(result, list) else result
+
+
+# Every calculator tool is a pure function of its arguments; only a few ignore their order
+declare_cacheable(mcp, [
+    "add", "add_list", "subtract", "multiply", "divide", "power", "sqrt", "cbrt", "factorial", "log",
+    "remainder", "sin", "cos", "tan", "mine", "strings_to_chars_to_int", "int_list_to_exponential_sum",
+    "fibonacci_numbers",
+], commutative=["add", "add_list", "multiply", "int_list_to_exponential_sum"])
 
 
 if __name__ == "__main__":
-    # run the server
-    mcp.run()
\ No newline at end of file
+    # run the server: over stdio by default, or MCP_TRANSPORT=sse to serve it over HTTP
+    # (FASTMCP_HOST / FASTMCP_PORT) so several agent processes can share one instance
+    mcp.run(transport=os.getenv("MCP_TRANSPORT", "stdio"))
\ No newline at end of file
@@ -0,0 +1,60 @@
+from array import array
+from typing import List, Optional, Union
+from mcp.server.fastmcp import Context
+from mcp.types import BlobResourceContents, EmbeddedResource
+import base64
+import sys
+
+# Experimental client capability announcing that packed arrays are understood.
+# Must match src/clients/array_encoding.py on the agent side.
+ARRAY_ENCODING_CAPABILITY = "packedArrays"
+ARRAY_MIME_TYPE = "application/x-packed-array"
+ARRAY_URI = "array://result"
+
+# Smallest element type first; signed/unsigned chosen from the value range
+_TYPECODES = "BbHhIiQq"
+
+
+def _typecode(values: List[int]) -> Optional[str]:
+    lo, hi = min(values), max(values)
+    for typecode in _TYPECODES:
+        bits = array(typecode).itemsize * 8
+        if typecode.isupper():
+            if lo >= 0 and hi < 1 << bits:
+                return typecode
+        elif -(1 << (bits - 1)) <= lo and hi < 1 << (bits - 1):
+            return typecode
+    return None
+
+
+def client_accepts_packed_arrays(ctx: Context) -> bool:
+    """Whether the calling client negotiated packed arrays during initialize."""
+    params = ctx.session.client_params
+    experimental = params.capabilities.experimental if params else None
+    return bool(experimental) and ARRAY_ENCODING_CAPABILITY in experimental
+
+
+def pack_int_list(values: List[int], ctx: Context) -> Union[List[int], EmbeddedResource]:
+    """
+    Return `values` as a packed little-endian array if the client supports it.
+
+    Other clients (and values that do not fit in 64 bits) get the plain list,
+    i.e. the standard FastMCP JSON response.
+    """
+    if not values or not client_accepts_packed_arrays(ctx):
+        return values
+    typecode = _typecode(values)
+    if typecode is None:
+        return values
+
+    packed = array(typecode, values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return EmbeddedResource(
+        type="resource",
+        resource=BlobResourceContents(
+            uri=ARRAY_URI,
+            mimeType=f"{ARRAY_MIME_TYPE}; typecode={typecode}",
+            blob=base64.b64encode(packed.tobytes()).decode("ascii"),
+        ),
+    )
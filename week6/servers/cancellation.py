@@ -0,0 +1,25 @@
+from importlib.metadata import version
+from mcp.shared.session import RequestResponder
+
+
+def _exit_request_scope(self, exc_type, exc_val, exc_tb):
+    try:
+        if self._completed:
+            self._on_complete(self)
+    finally:
+        self._entered = False
+    # Unlike mcp 1.6, report whether the scope swallowed the cancellation
+    return self._cancel_scope.__exit__(exc_type, exc_val, exc_tb)
+
+
+def enable_request_cancellation() -> None:
+    """
+    Let clients cancel running tool calls without taking the server down.
+
+    On notifications/cancelled mcp 1.6 cancels the request's cancel scope,
+    but RequestResponder.__exit__ drops the scope's result, so the
+    cancellation escapes the request handler and ends the whole server
+    session. Only that method is replaced, and only on 1.6.
+    """
+    if version("mcp").startswith("1.6."):
+        RequestResponder.__exit__ = _exit_request_scope
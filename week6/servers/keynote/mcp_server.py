@@ -1,22 +1,45 @@
 from pathlib import Path
 from mcp.server.fastmcp import FastMCP
-import subprocess
+import anyio
 from actions.create_file import getCreateFileScript
 from actions.create_shape import getCreateShapeScript
 import os
+import sys
 from typing import Any
 
 # Get path of parent directory
 base_dir = Path(__file__).resolve().parent.parent
 
+# Helpers shared by all servers live in servers/, which is only on sys.path while importing them
+sys.path.insert(0, str(base_dir))
+try:
+    from cancellation import enable_request_cancellation
+finally:
+    sys.path.remove(str(base_dir))
+
 # Create MCP server instance
 mcp = FastMCP("Keynote Editor")
+enable_request_cancellation()
 
 KEYNOTE_FILE_PATH = os.path.join(base_dir, "response.key")
 
 
+async def run_applescript(script: str) -> None:
+    """
+    Execute an AppleScript using the `osascript` command.
+
+    Runs without blocking the server, so a cancelled call is noticed and its
+    osascript process killed instead of being left to finish.
+    """
+    result = await anyio.run_process(['osascript', '-e', script], check=False)
+
+    # Check for errors during script execution
+    if result.returncode != 0:
+        raise Exception(f"Error executing AppleScript: {result.stderr.decode()}")
+
+
 @mcp.tool()
-def createKeynoteFile() -> str:
+async def createKeynoteFile() -> str:
     """
     Ensures the existence of a Keynote file at the specified path. 
     If the file does not exist, it creates a new Keynote file.
@@ -34,18 +57,13 @@ def createKeynoteFile() -> str:
         filePath=KEYNOTE_FILE_PATH
     )
 
-    # Execute the AppleScript using the `osascript` command
-    result = subprocess.run(['osascript', '-e', appleScript], capture_output=True, text=True)
-
-    # Check for errors during script execution
-    if result.returncode != 0:
-        raise Exception(f"Error executing AppleScript: {result.stderr}")
+    await run_applescript(appleScript)
     
     return "Keynote file exists or has been created successfully"
 
 
 @mcp.tool()
-def createShapeInKeyNote(answer: Any) -> None:
+async def createShapeInKeyNote(answer: Any) -> None:
     """
     Automates creating a shape in a Keynote file in Keynote File.
     The provided text (answer) will be placed in the shape within the Keynote file.
@@ -70,15 +88,11 @@ def createShapeInKeyNote(answer: Any) -> None:
         answer=answer,
     )
 
-    # Execute the AppleScript using the `osascript` command
-    result = subprocess.run(['osascript', '-e', appleScript], capture_output=True, text=True)
-
-    # Check for errors during script execution
-    if result.returncode != 0:
-        raise Exception(f"Error executing AppleScript: {result.stderr}")
+    await run_applescript(appleScript)
     
     return "Shape successfully created in Keynote file with the answer"
 
 if __name__ == "__main__":
-    # run the server
-    mcp.run()
\ No newline at end of file
+    # run the server: over stdio by default, or MCP_TRANSPORT=sse to serve it over HTTP
+    # (FASTMCP_HOST / FASTMCP_PORT) so several agent processes can share one instance
+    mcp.run(transport=os.getenv("MCP_TRANSPORT", "stdio"))
\ No newline at end of file
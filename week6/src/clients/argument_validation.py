@@ -0,0 +1,181 @@
+from typing import Any, Callable, Dict, List
+import re
+import json
+
+
+# Argument prefixes the LLM puts in front of parameter names (e.g. input.string=INDIA)
+ARGUMENT_PREFIXES = ("input.", "args.", "arguments.")
+_INTEGER_PATTERN = re.compile(r"[-+]?\d+")
+
+Validator = Callable[[Any, str], Any]
+
+
+class ArgumentError(ValueError):
+    """Raised when tool arguments do not match the tool's input schema."""
+
+
+def _describe(value: Any) -> str:
+    text = repr(value)
+    return text if len(text) <= 60 else f"{text[:57]}..."
+
+
+def _coerce_integer(value: Any, path: str) -> int:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and _INTEGER_PATTERN.fullmatch(value.strip()):
+        return int(value.strip())
+    raise ArgumentError(f"'{path}' must be an integer, got {_describe(value)}")
+
+
+def _coerce_number(value: Any, path: str) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            pass
+    raise ArgumentError(f"'{path}' must be a number, got {_describe(value)}")
+
+
+def _coerce_string(value: Any, path: str) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        # e.g. input.string=123, which parse_function_call turned into an int
+        return str(value)
+    raise ArgumentError(f"'{path}' must be a string, got {_describe(value)}")
+
+
+def _coerce_boolean(value: Any, path: str) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    raise ArgumentError(f"'{path}' must be true or false, got {_describe(value)}")
+
+
+def _compile(schema: Dict[str, Any], definitions: Dict[str, Any]) -> Validator:
+    """Turn one (sub)schema into a function coercing a value to it."""
+    if "$ref" in schema:
+        return _compile(definitions.get(schema["$ref"].rsplit("/", 1)[-1], {}), definitions)
+
+    if "anyOf" in schema:
+        options = [_compile(option, definitions) for option in schema["anyOf"]]
+
+        def validate_any_of(value: Any, path: str) -> Any:
+            errors = []
+            for option in options:
+                try:
+                    return option(value, path)
+                except ArgumentError as e:
+                    errors.append(str(e))
+            raise ArgumentError(" or ".join(errors))
+        return validate_any_of
+
+    schema_type = schema.get("type")
+    if schema_type == "integer":
+        return _coerce_integer
+    if schema_type == "number":
+        return _coerce_number
+    if schema_type == "string":
+        return _coerce_string
+    if schema_type == "boolean":
+        return _coerce_boolean
+    if schema_type == "null":
+        def validate_null(value: Any, path: str) -> None:
+            if value is not None:
+                raise ArgumentError(f"'{path}' must be null, got {_describe(value)}")
+        return validate_null
+    if schema_type == "array":
+        return _compile_array(schema, definitions)
+    if schema_type == "object":
+        return _compile_object(schema, definitions)
+
+    # No type (e.g. a parameter annotated Any): anything goes
+    return lambda value, path: value
+
+
+def _compile_array(schema: Dict[str, Any], definitions: Dict[str, Any]) -> Validator:
+    validate_item = _compile(schema.get("items", {}), definitions)
+
+    def validate_array(value: Any, path: str) -> List[Any]:
+        if isinstance(value, str):
+            # e.g. a list the LLM quoted
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        if isinstance(value, tuple):
+            value = list(value)
+        if not isinstance(value, list):
+            raise ArgumentError(f"'{path}' must be a list, got {_describe(value)}")
+        return [validate_item(item, f"{path}[{index}]") for index, item in enumerate(value)]
+    return validate_array
+
+
+def _compile_object(schema: Dict[str, Any], definitions: Dict[str, Any]) -> Validator:
+    properties = {name: _compile(prop, definitions) for name, prop in schema.get("properties", {}).items()}
+    required = list(schema.get("required", []))
+
+    def validate_object(value: Any, path: str) -> Dict[str, Any]:
+        if not isinstance(value, dict):
+            raise ArgumentError(f"'{path}' must be an object, got {_describe(value)}")
+        value = _nest_dotted_keys(value, properties)
+        prefix = f"{path}." if path else ""
+        unknown = [key for key in value if key not in properties]
+        if unknown and properties:
+            raise ArgumentError(f"unknown argument '{prefix}{unknown[0]}' (expected {', '.join(properties)})")
+        missing = [key for key in required if key not in value]
+        if missing:
+            raise ArgumentError(f"'{prefix}{missing[0]}' is required")
+        return {
+            key: properties[key](item, f"{prefix}{key}") if key in properties else item
+            for key, item in value.items()
+        }
+    return validate_object
+
+
+def _nest_dotted_keys(value: Dict[str, Any], properties: Dict[str, Validator]) -> Dict[str, Any]:
+    """Map `input.string`-style keys onto the schema's properties."""
+    if all(key in properties or "." not in key for key in value):
+        return value
+    mapped: Dict[str, Any] = {}
+    for key, item in value.items():
+        if key not in properties and "." in key:
+            head, rest = key.split(".", 1)
+            if head in properties:
+                # A genuinely nested object parameter
+                mapped.setdefault(head, {})[rest] = item
+                continue
+            for prefix in ARGUMENT_PREFIXES:
+                if key.startswith(prefix) and key[len(prefix):] in properties:
+                    key = key[len(prefix):]
+                    break
+        mapped[key] = item
+    return mapped
+
+
+def compile_validator(input_schema: Dict[str, Any]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Compile a tool's JSON input schema into a function that checks and
+    coerces call arguments.
+
+    Values are coerced to the declared types where that is lossless ("5" ->
+    5, 3.0 -> 3, 123 -> "123" for strings, a quoted list -> list), and
+    `input.string`-style keys are mapped onto the schema's parameters. Any
+    other mismatch raises ArgumentError naming the offending argument.
+
+    Args:
+        input_schema: The tool's inputSchema, as listed by its MCP server
+
+    Returns:
+        A function taking the arguments dict and returning the coerced one
+    """
+    validate = _compile(input_schema or {"type": "object"}, (input_schema or {}).get("$defs", {}))
+
+    def validate_arguments(arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return validate(arguments or {}, "")
+    return validate_arguments
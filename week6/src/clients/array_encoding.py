@@ -0,0 +1,77 @@
+from array import array
+from typing import Any, List, Union
+from mcp import ClientSession
+import mcp.types as types
+import base64
+import json
+import sys
+
+# Experimental client capability announcing that packed arrays are understood.
+# Must match servers/calculator/packed_arrays.py on the server side.
+ARRAY_ENCODING_CAPABILITY = "packedArrays"
+ARRAY_MIME_TYPE = "application/x-packed-array"
+
+
+class ArrayEncodingClientSession(ClientSession):
+    """
+    ClientSession that negotiates packed integer arrays with our own servers.
+
+    The capability is sent as an experimental client capability during
+    initialize; servers that do not know it ignore it and keep answering
+    with standard MCP JSON content.
+    """
+
+    async def send_request(self, request: types.ClientRequest, result_type):
+        if isinstance(request.root, types.InitializeRequest):
+            capabilities = request.root.params.capabilities
+            capabilities.experimental = {
+                **(capabilities.experimental or {}),
+                ARRAY_ENCODING_CAPABILITY: {"mimeType": ARRAY_MIME_TYPE},
+            }
+        return await super().send_request(request, result_type)
+
+
+def decode_packed_array(resource: types.BlobResourceContents) -> List[int]:
+    """Decode a packed little-endian array produced by a server."""
+    _, _, typecode = resource.mimeType.partition("typecode=")
+    values = array(typecode.strip())
+    values.frombytes(base64.b64decode(resource.blob))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tolist()
+
+
+def _text_value(text: str) -> Any:
+    """The value FastMCP encoded as JSON text, or the text itself if it is not JSON."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        # Plain text, or a number too long to convert to an int
+        return text
+
+
+def _content_value(content: Union[types.TextContent, types.ImageContent, types.EmbeddedResource]) -> Any:
+    if isinstance(content, types.TextContent):
+        return _text_value(content.text)
+    if (
+        isinstance(content, types.EmbeddedResource)
+        and isinstance(content.resource, types.BlobResourceContents)
+        and (content.resource.mimeType or "").startswith(ARRAY_MIME_TYPE)
+    ):
+        return decode_packed_array(content.resource)
+    return content.model_dump(exclude_none=True)
+
+
+def tool_result_value(result: types.CallToolResult) -> Any:
+    """
+    Turn a tool result into a plain python value.
+
+    Packed arrays are decoded to lists, and text items to the JSON value they
+    encode (or kept as text). A single item is returned as its value, and
+    multiple items (FastMCP's encoding of list results that are not packed)
+    as a list, so a list result has the same item types either way.
+    """
+    values = [_content_value(content) for content in result.content]
+    if len(values) == 1:
+        return values[0]
+    return values
@@ -0,0 +1,97 @@
+from src.models.mcp_servers import CircuitState
+import time
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+# Breaker defaults
+FAILURE_THRESHOLD = 3  # consecutive failed calls that open the circuit
+RESET_TIMEOUT = 10  # seconds the circuit stays open before a probe call is let through
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a server whose circuit is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, server_name: str, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT) -> None:
+        """
+        Per-server circuit breaker.
+
+        closed: calls go through; `failure_threshold` consecutive failures open
+        the circuit. open: calls fail immediately with CircuitOpenError until
+        `reset_timeout` has passed. half-open: a single probe call is let
+        through; its success closes the circuit, its failure opens it again.
+
+        Only transport failures and timeouts count; a tool returning an error
+        result means the server is healthy.
+
+        Args:
+            server_name: Server guarded by the breaker
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds before an open circuit lets a probe through
+        """
+        self.server_name = server_name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.trips = 0
+        self.last_error = None
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a probe through."""
+        if self.state != "open":
+            return 0.0
+        return max(self._opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def allow(self) -> None:
+        """Raise CircuitOpenError unless a call may go through now."""
+        if self.state == "open":
+            if self.retry_in() > 0:
+                raise CircuitOpenError(f"server '{self.server_name}' is unavailable (circuit open, retry in {self.retry_in():.1f}s): {self.last_error}")
+            self.state = "half_open"
+            logger.info(f"Circuit for {self.server_name} half-open, probing", extra={"stage": "MCP_SERVER"})
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                raise CircuitOpenError(f"server '{self.server_name}' is unavailable (circuit half-open, probe in flight)")
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            logger.info(f"Circuit for {self.server_name} closed", extra={"stage": "MCP_SERVER"})
+        self.state = "closed"
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self, error: str) -> None:
+        self.last_error = error
+        self._probe_in_flight = False
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self._trip()
+
+    def record_skipped(self) -> None:
+        """The admitted call never reached the server (e.g. rejected by admission control)."""
+        self._probe_in_flight = False
+
+    def _trip(self) -> None:
+        if self.state != "open":
+            self.trips += 1
+            logger.warning(f"Circuit for {self.server_name} opened after {self.failures} failures: {self.last_error}", extra={"stage": "MCP_SERVER"})
+        self.state = "open"
+        self._opened_at = time.monotonic()
+
+    def snapshot(self) -> CircuitState:
+        return CircuitState(
+            server=self.server_name,
+            state=self.state,
+            consecutive_failures=self.failures,
+            trips=self.trips,
+            retry_in_seconds=self.retry_in(),
+            last_error=self.last_error,
+        )
@@ -0,0 +1,241 @@
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Hashable, Optional
+from src.models.mcp_servers import ConcurrencyStats
+import asyncio
+import time
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+# Admission defaults
+MAX_CONCURRENCY = 2  # in-flight calls per server (matches the session pool size)
+MAX_QUEUE = 16  # calls allowed to wait per server before new ones are rejected
+QUEUE_TIMEOUT = 5  # seconds a call may wait for a slot before it is rejected
+LATENCY_TOLERANCE = 2.0  # latency (vs. the best observed) beyond which the limit backs off
+BACKOFF_RATIO = 0.7  # multiplicative decrease applied on overload
+LATENCY_SMOOTHING = 0.2  # weight of the newest sample in the latency moving average
+
+
+class ServerOverloadedError(Exception):
+    """Raised instead of queueing when a server (or tool) has no capacity left."""
+
+
+class ConcurrencyGate:
+    def __init__(self, name: str, max_concurrency: int, max_queue: int = MAX_QUEUE, adaptive: bool = True) -> None:
+        """
+        Admission control for one server or tool.
+
+        At most `limit` calls run at once; further calls wait in per-caller
+        FIFO queues that are served round-robin, so one busy conversation
+        cannot starve the others. When `max_queue` calls are already waiting
+        new calls are rejected immediately.
+
+        With `adaptive` the limit follows observed latency (AIMD): it grows by
+        roughly one slot per window of calls while latency stays close to the
+        best seen, and shrinks multiplicatively when latency degrades or calls
+        fail, never leaving [1, max_concurrency].
+
+        Args:
+            name: Server or "server/tool" name, used in errors and stats
+            max_concurrency: Upper bound of concurrent calls
+            max_queue: Maximum number of waiting calls
+            adaptive: Whether to adapt the limit to observed latency
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.adaptive = adaptive
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self._waiters: Dict[Hashable, Deque[asyncio.Future]] = {}
+        self._callers: Deque[Hashable] = deque()
+        self._queued = 0
+        self._baseline: Optional[float] = None
+        self._latency: Optional[float] = None
+        self.stats = ConcurrencyStats(name=name, limit=max_concurrency, max_concurrency=max_concurrency)
+
+    async def acquire(self, caller: Hashable = None, timeout: float = QUEUE_TIMEOUT, wait: bool = True) -> None:
+        """Take a slot, waiting up to `timeout` seconds in the caller's queue (not at all unless `wait`)."""
+        if self._queued == 0 and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            self._record_admission(0.0)
+            return
+        if not wait:
+            # Opportunistic call (e.g. a hedge): not a rejection of real demand
+            raise ServerOverloadedError(f"{self.name} has no free slot")
+        if self._queued >= self.max_queue:
+            self.stats.rejected += 1
+            raise ServerOverloadedError(f"{self.name} is overloaded ({self.in_flight} in flight, {self._queued} queued)")
+
+        future = asyncio.get_running_loop().create_future()
+        if caller not in self._waiters:
+            self._waiters[caller] = deque()
+            self._callers.append(caller)
+        self._waiters[caller].append(future)
+        self._queued += 1
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self._queued)
+
+        started = time.monotonic()
+        try:
+            async with asyncio.timeout(timeout):
+                await future
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # Granted just as we gave up: hand the slot on
+                self.release()
+            else:
+                future.cancel()
+                self._remove_waiter(caller, future)
+            if isinstance(e, TimeoutError):
+                self.stats.rejected += 1
+                raise ServerOverloadedError(f"{self.name} is overloaded (no slot within {timeout}s)") from None
+            raise
+        self._record_admission(time.monotonic() - started)
+
+    def release(self, latency: Optional[float] = None, failed: bool = False) -> None:
+        """Give a slot back, feeding the call's latency (or failure) into the adaptive limit."""
+        self.in_flight -= 1
+        if self.adaptive and (latency is not None or failed):
+            self._adapt(latency, failed)
+        self._grant()
+
+    def _remove_waiter(self, caller: Hashable, future: asyncio.Future) -> None:
+        waiters = self._waiters.get(caller)
+        if waiters and future in waiters:
+            waiters.remove(future)
+            self._queued -= 1
+            if not waiters:
+                del self._waiters[caller]
+                self._callers.remove(caller)
+
+    def _grant(self) -> None:
+        """Hand free slots to waiting callers, one caller at a time."""
+        while self._queued and self.in_flight < int(self.limit):
+            caller = self._callers.popleft()
+            waiters = self._waiters[caller]
+            future = waiters.popleft()
+            self._queued -= 1
+            if waiters:
+                self._callers.append(caller)
+            else:
+                del self._waiters[caller]
+            future.set_result(None)
+            self.in_flight += 1
+
+    def _adapt(self, latency: Optional[float], failed: bool) -> None:
+        if latency is not None:
+            self._latency = latency if self._latency is None else (1 - LATENCY_SMOOTHING) * self._latency + LATENCY_SMOOTHING * latency
+            self._baseline = latency if self._baseline is None else min(self._baseline, latency)
+            # Let the baseline drift up slowly so one lucky sample does not pin the limit down forever
+            self._baseline += (self._latency - self._baseline) * 0.01
+
+        if failed or self._latency > self._baseline * LATENCY_TOLERANCE:
+            self.limit = max(1.0, self.limit * BACKOFF_RATIO)
+        elif self.in_flight + 1 >= int(self.limit):
+            # Only grow while the current limit is actually being used
+            self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+
+    def _record_admission(self, waited: float) -> None:
+        stats = self.stats
+        stats.admitted += 1
+        stats.total_wait_seconds += waited
+        stats.max_wait_seconds = max(stats.max_wait_seconds, waited)
+
+    def snapshot(self) -> ConcurrencyStats:
+        """Current limit, queue depth and wait/latency statistics."""
+        return self.stats.model_copy(update={
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queue_depth": self._queued,
+            "latency_seconds": self._latency,
+        })
+
+
+class ConcurrencyLimiter:
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, max_queue: int = MAX_QUEUE, queue_timeout: float = QUEUE_TIMEOUT) -> None:
+        """
+        Per-server and per-tool admission control in front of the session pool.
+
+        Every call takes a slot on its tool's gate (if the tool has its own
+        limit) and then on its server's gate; gates are always taken in that
+        order, so calls cannot deadlock against each other.
+
+        Args:
+            max_concurrency: Default in-flight limit per server
+            max_queue: Default number of waiting calls per server
+            queue_timeout: Seconds a call may wait for a slot before it is rejected
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._gates: Dict[str, ConcurrencyGate] = {}
+
+    def configure(self, server_name: str, max_concurrency: Optional[int] = None, max_queue: Optional[int] = None, tool_limits: Optional[Dict[str, int]] = None) -> None:
+        """Set the limits of a server and, optionally, of some of its tools."""
+        self._gates[server_name] = ConcurrencyGate(
+            server_name,
+            max_concurrency or self.max_concurrency,
+            self.max_queue if max_queue is None else max_queue,
+        )
+        for tool_name, limit in (tool_limits or {}).items():
+            key = f"{server_name}/{tool_name}"
+            self._gates[key] = ConcurrencyGate(key, limit, self.max_queue if max_queue is None else max_queue)
+
+    def _gate(self, key: str, create: bool) -> Optional[ConcurrencyGate]:
+        if key not in self._gates and create:
+            self._gates[key] = ConcurrencyGate(key, self.max_concurrency, self.max_queue)
+        return self._gates.get(key)
+
+    @asynccontextmanager
+    async def slot(self, server_name: str, tool_name: Optional[str] = None, caller: Hashable = None, wait: bool = True, timeout: Optional[float] = None) -> AsyncIterator["CallTiming"]:
+        """
+        Hold a slot for one tool call.
+
+        Raises ServerOverloadedError if no slot frees up within the queue
+        timeout (or `timeout`, if shorter), or, without `wait`, if none is
+        free right now. The yielded
+        CallTiming can be given the call's own duration (excluding e.g. session
+        checkout); otherwise the duration of the whole block is used.
+        """
+        gates = [gate for gate in (
+            self._gate(f"{server_name}/{tool_name}", create=False) if tool_name else None,
+            self._gate(server_name, create=True),
+        ) if gate is not None]
+
+        acquired = []
+        try:
+            for gate in gates:
+                await gate.acquire(caller, self.queue_timeout if timeout is None else min(timeout, self.queue_timeout), wait)
+                acquired.append(gate)
+        except BaseException:
+            for gate in reversed(acquired):
+                gate.release()
+            raise
+
+        timing = CallTiming()
+        started = time.monotonic()
+        latency, failed = None, False
+        try:
+            yield timing
+            latency = timing.seconds if timing.seconds is not None else time.monotonic() - started
+        except Exception:
+            # Errors and timeouts count as overload; cancellation of the caller does not
+            failed = True
+            raise
+        finally:
+            for gate in reversed(acquired):
+                gate.release(latency, failed)
+
+    def stats(self) -> Dict[str, ConcurrencyStats]:
+        """Snapshot of every gate, keyed by server (or "server/tool")."""
+        return {key: gate.snapshot() for key, gate in self._gates.items()}
+
+
+class CallTiming:
+    """Duration of the protected call, filled in by the caller."""
+
+    def __init__(self) -> None:
+        self.seconds: Optional[float] = None
@@ -0,0 +1,243 @@
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, Optional
+import mcp.types as types
+import anyio
+import anyio.lowlevel
+import asyncio
+import importlib
+import json
+import os
+import runpy
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+# Modules imported once by the fork server and inherited by every forked server child
+FORKSERVER_PRELOAD = [
+    "mcp.server.fastmcp",
+    "mcp.server.stdio",
+    "pydantic",
+    "anyio",
+    "dotenv",
+]
+SHUTDOWN_TIMEOUT = 5  # seconds a child (or the fork server itself) gets to exit after SIGTERM
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024  # largest JSON-RPC line accepted from a child
+
+def forkserver_available() -> bool:
+    """Whether this platform can run the fork server (POSIX fork + fd passing)."""
+    return hasattr(os, "fork") and hasattr(socket, "send_fds")
+
+
+def _serve(control: socket.socket) -> None:
+    """
+    Fork server main loop (runs in the fork server process).
+
+    Each request carries a JSON spec and the child's end of a socket pair;
+    the server forks, the child takes over that socket as stdin/stdout and
+    runs the MCP server file, and the child's pid is sent back.
+    """
+    for name in FORKSERVER_PRELOAD:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+    # Children are reaped automatically; the client tracks them by pid
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    while True:
+        payload, fds, _, _ = socket.recv_fds(control, 65536, 1)
+        if not payload:
+            # Client went away: shut down
+            return
+        spec = json.loads(payload)
+        channel_fd = fds[0]
+        pid = os.fork()
+        if pid == 0:
+            control.close()
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            _run_server_child(spec["path"], channel_fd, spec.get("env"), spec.get("cwd"))
+            os._exit(0)
+        os.close(channel_fd)
+        control.sendall(json.dumps({"pid": pid}).encode() + b"\n")
+
+
+def _run_server_child(server_filepath: str, channel_fd: int, env: Optional[Dict[str, str]], cwd: Optional[str]) -> None:
+    """Entry point of a forked server: serve MCP over the channel as if it were stdin/stdout."""
+    os.dup2(channel_fd, 0)
+    os.dup2(channel_fd, 1)
+    os.close(channel_fd)
+
+    if env:
+        os.environ.update(env)
+    if cwd:
+        os.chdir(cwd)
+    path = Path(server_filepath).resolve()
+    sys.path.insert(0, str(path.parent))
+    sys.argv = [str(path)]
+    try:
+        runpy.run_path(str(path), run_name="__main__")
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        os._exit(1)
+
+
+class ForkServer:
+    def __init__(self) -> None:
+        """
+        Client handle for a zygote process that forks MCP server children.
+
+        The zygote imports the shared MCP server stack once at start-up, so a
+        child only has to fork and execute its own server module instead of
+        resolving the environment with `uv run`, starting an interpreter and
+        re-importing `mcp`/`pydantic` from scratch.
+        """
+        self._control: Optional[socket.socket] = None
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def _ensure_running(self) -> socket.socket:
+        if self._control is not None and self._process.poll() is None:
+            return self._control
+
+        parent_control, child_control = socket.socketpair()
+        code = f"import socket; from src.clients.forkserver import _serve; _serve(socket.socket(fileno={child_control.fileno()}))"
+        self._process = subprocess.Popen(
+            [sys.executable, "-c", code],
+            pass_fds=[child_control.fileno()],
+            stdin=subprocess.DEVNULL,
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(p for p in sys.path if p)},
+        )
+        child_control.close()
+        self._control = parent_control
+        logger.info(f"Started MCP fork server (pid {self._process.pid})", extra={"stage": "MCP_SERVER"})
+        return parent_control
+
+    def start(self) -> None:
+        """Start the fork server ahead of the first spawn."""
+        with self._lock:
+            self._ensure_running()
+
+    def spawn(self, server_filepath: str, channel: socket.socket, env: Optional[Dict[str, str]] = None, cwd: Optional[str] = None) -> int:
+        """Fork a server child serving MCP over `channel` and return its pid (blocking)."""
+        spec = json.dumps({"path": server_filepath, "env": env, "cwd": str(cwd) if cwd else None}).encode()
+        with self._lock:
+            control = self._ensure_running()
+            socket.send_fds(control, [spec], [channel.fileno()])
+            reply = b""
+            while not reply.endswith(b"\n"):
+                chunk = control.recv(4096)
+                if not chunk:
+                    raise RuntimeError("MCP fork server exited unexpectedly")
+                reply += chunk
+        return json.loads(reply)["pid"]
+
+    def close(self) -> None:
+        """Stop the fork server; already forked children are not affected."""
+        with self._lock:
+            if self._control is not None:
+                self._control.close()
+                self._control = None
+            if self._process is not None:
+                # Reap it, so it does not linger as a zombie
+                self._process.terminate()
+                try:
+                    self._process.wait(timeout=SHUTDOWN_TIMEOUT)
+                except subprocess.TimeoutExpired:
+                    self._process.kill()
+                    self._process.wait()
+                self._process = None
+
+
+_fork_server = ForkServer()
+
+def get_fork_server() -> ForkServer:
+    return _fork_server
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+
+
+async def _terminate(pid: int) -> None:
+    """SIGTERM a forked child, escalating to SIGKILL if it does not exit in time."""
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    with anyio.move_on_after(SHUTDOWN_TIMEOUT):
+        while _pid_alive(pid):
+            await asyncio.sleep(0.05)
+        return
+    logger.warning(f"Forked server {pid} did not exit, killing", extra={"stage": "MCP_SERVER"})
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+@asynccontextmanager
+async def forkserver_client(server_filepath: str, env: Optional[Dict[str, str]] = None, cwd: Optional[str] = None):
+    """
+    Client transport that forks a server child from the fork server.
+
+    Speaks the same newline-delimited JSON-RPC as `stdio_client` over a
+    socket pair and yields the same (read, write) stream pair.
+    """
+    parent_channel, child_channel = socket.socketpair()
+    try:
+        pid = await asyncio.to_thread(get_fork_server().spawn, server_filepath, child_channel, env, cwd)
+    finally:
+        child_channel.close()
+
+    reader, writer = await asyncio.open_connection(sock=parent_channel, limit=MAX_MESSAGE_BYTES)
+    read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
+
+    async def channel_reader():
+        try:
+            async with read_stream_writer:
+                while line := await reader.readline():
+                    try:
+                        message = types.JSONRPCMessage.model_validate_json(line)
+                    except Exception as exc:
+                        await read_stream_writer.send(exc)
+                        continue
+                    await read_stream_writer.send(message)
+        except anyio.ClosedResourceError:
+            await anyio.lowlevel.checkpoint()
+
+    async def channel_writer():
+        try:
+            async with write_stream_reader:
+                async for message in write_stream_reader:
+                    json_line = message.model_dump_json(by_alias=True, exclude_none=True)
+                    writer.write((json_line + "\n").encode())
+                    await writer.drain()
+        except anyio.ClosedResourceError:
+            await anyio.lowlevel.checkpoint()
+
+    try:
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(channel_reader)
+            tg.start_soon(channel_writer)
+            try:
+                yield read_stream, write_stream
+            finally:
+                tg.cancel_scope.cancel()
+    finally:
+        # Mirror stdio_client: close the channel, then terminate the child
+        writer.close()
+        await _terminate(pid)
@@ -1,20 +1,30 @@
 from google import genai
+from google.genai import types
+from typing import Callable, Optional
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+
+
 class GeminiClient:
-    def __init__(self, model_name: str="gemini-2.0-flash")-> None:
+    def __init__(self, model_name: str=DEFAULT_MODEL, timeout: Optional[float] = None, on_usage: Optional[Callable[[str, int, int], None]] = None)-> None:
         """
         Initialize Gemini client with MCP tool integration.
         
         Args:
             model_name: The Gemini model to use
+            timeout: Seconds after which a request is abandoned (no limit if None)
+            on_usage: Called with the model name, prompt tokens and completion tokens of each response
         """
         self.model = model_name
+        self.on_usage = on_usage
         self.client = genai.Client(
             api_key=os.getenv("GEMINI_API_KEY", None),
+            http_options=types.HttpOptions(timeout=int(timeout * 1000)) if timeout else None,
         )
     
     def __call__(self, prompt: str) -> str:
@@ -29,9 +39,12 @@ class GeminiClient:
         """
         try:
             response = self.client.models.generate_content(
-                model="gemini-2.0-flash",
+                model=self.model,
                 contents=prompt
             )
+            usage = response.usage_metadata
+            if self.on_usage and usage:
+                self.on_usage(self.model, usage.prompt_token_count or 0, usage.candidates_token_count or 0)
             return response.text
         except Exception as e:
             raise e
\ No newline at end of file
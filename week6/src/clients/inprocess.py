@@ -0,0 +1,88 @@
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_client_server_memory_streams
+import anyio
+import importlib.util
+import sys
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+# Server modules already imported, keyed by resolved file path
+_loaded_servers: Dict[str, FastMCP] = {}
+
+def load_fastmcp_server(server_filepath: str) -> FastMCP:
+    """
+    Import a bundled server module and return its module-level `mcp` instance.
+
+    The server's own directory is put on sys.path while importing so that
+    sibling imports (e.g. keynote's `actions` package) keep working. The
+    module's `__main__` block is not executed, so no stdio server is started.
+
+    Args:
+        server_filepath: Path to the server file defining `mcp = FastMCP(...)`
+
+    Returns:
+        The FastMCP instance defined by the module
+    """
+    path = Path(server_filepath).resolve()
+    if str(path) in _loaded_servers:
+        return _loaded_servers[str(path)]
+
+    module_name = f"_inprocess_mcp_{path.parent.name}_{path.stem}"
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load MCP server module from {server_filepath}")
+    module = importlib.util.module_from_spec(spec)
+
+    sys.modules[module_name] = module
+    sys.path.insert(0, str(path.parent))
+    try:
+        spec.loader.exec_module(module)
+    except Exception:
+        sys.modules.pop(module_name, None)
+        raise
+    finally:
+        sys.path.remove(str(path.parent))
+
+    server = getattr(module, "mcp", None)
+    if not isinstance(server, FastMCP):
+        raise ImportError(f"{server_filepath} does not define a FastMCP instance named 'mcp'")
+
+    _loaded_servers[str(path)] = server
+    logger.info(f"Loaded in-process MCP server '{server.name}' from {server_filepath}", extra={"stage": "MCP_SERVER"})
+    return server
+
+
+@asynccontextmanager
+async def inprocess_client(server: FastMCP):
+    """
+    Client transport that runs a FastMCP server in the current event loop.
+
+    Messages are exchanged over in-memory object streams, so there is no
+    subprocess, pipe or JSON encoding between client and server. Yields the
+    same (read, write) stream pair as `stdio_client`.
+
+    Note that synchronous tools run directly on the event loop, so only
+    fast, trusted tools should be served this way.
+    """
+    lowlevel_server = server._mcp_server
+    async with create_client_server_memory_streams() as (client_streams, server_streams):
+        server_read, server_write = server_streams
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(
+                lambda: lowlevel_server.run(
+                    server_read,
+                    server_write,
+                    lowlevel_server.create_initialization_options(),
+                    raise_exceptions=False,
+                )
+            )
+            try:
+                yield client_streams
+            finally:
+                tg.cancel_scope.cancel()
@@ -0,0 +1,77 @@
+from pathlib import Path
+from typing import List, Optional
+from mcp import StdioServerParameters
+import hashlib
+import json
+import os
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+# Cache location, relative to the working directory the agent is started from
+MANIFEST_CACHE_DIR = ".mcp_cache"
+MANIFEST_VERSION = 1
+
+class ToolManifestCache:
+    def __init__(self, cache_dir: str = MANIFEST_CACHE_DIR) -> None:
+        """
+        On-disk cache of the tools advertised by each MCP server.
+
+        Entries are keyed by a hash of the server's source files and the
+        parameters used to launch it, so editing a server (or how it is run)
+        makes its cached manifest stale automatically.
+
+        Args:
+            cache_dir: Directory the manifests are stored in
+        """
+        self.cache_dir = Path(cache_dir)
+
+    def key(self, server_filepath: str, server_params: StdioServerParameters) -> str:
+        """Hash the server sources and launch environment into a cache key."""
+        digest = hashlib.sha256()
+        digest.update(f"v{MANIFEST_VERSION}".encode())
+
+        # Hash every python file next to the server, since servers import sibling modules
+        server_dir = Path(server_filepath).resolve().parent
+        for source in sorted(server_dir.rglob("*.py")):
+            digest.update(str(source.relative_to(server_dir)).encode())
+            digest.update(source.read_bytes())
+
+        digest.update(json.dumps({
+            "command": server_params.command,
+            "args": server_params.args,
+            "env": server_params.env,
+            "cwd": str(server_params.cwd) if server_params.cwd else None,
+        }, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _path(self, server_name: str) -> Path:
+        return self.cache_dir / f"{server_name}.json"
+
+    def load(self, server_name: str, key: str) -> Optional[List[dict]]:
+        """Return the cached tools for `server_name`, or None if missing or stale."""
+        path = self._path(server_name)
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable tool manifest {path}: {e}", extra={"stage": "MCP_SERVER"})
+            return None
+
+        if manifest.get("key") != key:
+            logger.info(f"Tool manifest for {server_name} is stale", extra={"stage": "MCP_SERVER"})
+            return None
+        return manifest["tools"]
+
+    def store(self, server_name: str, key: str, tools: List[dict]) -> None:
+        """Atomically write the manifest for `server_name`."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(server_name)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"key": key, "tools": tools}, f, indent=2)
+        os.replace(tmp_path, path)
@@ -1,8 +1,25 @@
-from typing import List
+from typing import Callable, Dict, Hashable, List, Optional, Union
 from google.genai import types
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from mcp import StdioServerParameters
+from mcp.types import CallToolResult
+from mcp.client.sse import sse_client
+from src.clients.session_pool import MCPSessionPool
+from src.clients.concurrency import ConcurrencyLimiter, ServerOverloadedError
+from src.clients.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.clients.latency import LatencyWindow
+from src.clients.argument_validation import ArgumentError, compile_validator
+from src.clients.result_cache import CACHEABLE_HINT, ResultCache, tool_annotations
+from src.utils.deadline import Deadline, DeadlineExceeded
+from src.clients.progress import ProgressCallback, ProgressClientSession
+from src.clients.supervisor import MCPServerSupervisor, STANDBY_SESSIONS
+from src.clients.manifest_cache import ToolManifestCache
+from src.clients.inprocess import inprocess_client, load_fastmcp_server
+from src.clients.forkserver import forkserver_available, forkserver_client, get_fork_server
+from src.models.mcp_servers import CircuitState, ConcurrencyStats, MCPServerConfig, ResultCacheStats, ServerHealth, ServerStartupTiming, StartupReport
+from functools import partial
 import os
+import time
+import random
 import asyncio
 import traceback
 import logging
@@ -13,18 +30,46 @@ logger = logging.getLogger(__name__)
 
 # Session timeout
 SESSION_TIMEOUT = 10  # seconds
+# Retry backoff for idempotent calls (full jitter)
+RETRY_BACKOFF_BASE = 0.2  # seconds
+RETRY_BACKOFF_MAX = 2  # seconds
+# Tool annotation with which a server declares that a tool's result does not depend on
+# the order of its arguments. Must match servers/calculator/tool_hints.py on the server side.
+COMMUTATIVE_HINT = "commutativeHint"
 
 class PythonMCPClient:
-    def __init__(self, model_name: str="gemini-2.0-flash")-> None:
+    def __init__(self, model_name: str="gemini-2.0-flash", standby_sessions: int = STANDBY_SESSIONS)-> None:
         """
         Initialize Gemini client with MCP tool integration.
         
         Args:
             model_name: The Gemini model to use
             mcp_servers: List of MCP server names to connect to {"name": "filepath"}
+            standby_sessions: Warm idle sessions the supervisor keeps per server
         """
         self.available_tools = {}
         self.server_params = {}
+        # Negotiates packed integer arrays with the bundled servers (plain JSON with other peers),
+        # streams tool progress and cancels abandoned calls on the server
+        self.session_pool = MCPSessionPool(session_class=ProgressClientSession)
+        self.supervisor = MCPServerSupervisor(self.session_pool, standby=standby_sessions)
+        self.limiter = ConcurrencyLimiter()
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.server_configs: Dict[str, MCPServerConfig] = {}
+        # Recent call latencies per tool, from which per-tool timeouts are derived
+        self.tool_latency: Dict[str, LatencyWindow] = {}
+        # Argument validators compiled from each tool's input schema
+        self.tool_validators: Dict[str, Callable[[dict], dict]] = {}
+        # Results of tools their server declares cacheable
+        self.result_cache = ResultCache()
+        self.startup_report = StartupReport()
+        self.manifest_cache = ToolManifestCache()
+        self._list_tools_seconds = {}
+        self._background_tasks = set()
+        # Lazy servers advertised from a cached manifest that has not been checked against the live server yet
+        self._unverified_manifests = {}
+        # Non-default transport factories for subprocess servers (e.g. the fork server)
+        self._server_transports = {}
 
     def _create_server_params(self, server_filepath: str) -> StdioServerParameters:
         """Create StdioServerParameters for a server."""
@@ -42,68 +87,250 @@ class PythonMCPClient:
             # env=None,  # Optional environment variables
         )
     
-    async def connect_to_server(self, server_name: str, server_params: StdioServerParameters) -> None:
-        """Connect to an MCP server and register its tools using stdio_client."""
+    def _register_tools(self, server_name: str, tools: List[dict]) -> None:
+        """Register manifest entries ({name, description, inputSchema, annotations}) for a server."""
+        logger.info(f"Registering {len(tools)} tools from {server_name}...", extra={"stage": "MCP_SERVER"})
+        for tool in tools:
+            self.available_tools[tool["name"]] = {
+                "server": server_name,
+                "description": tool["description"],
+                "parameters": tool["inputSchema"],
+                "cacheable": bool((tool.get("annotations") or {}).get(CACHEABLE_HINT)),
+                "commutative": bool((tool.get("annotations") or {}).get(COMMUTATIVE_HINT)),
+            }
+            self.tool_validators[tool["name"]] = compile_validator(tool["inputSchema"])
+
+    async def connect_to_server(self, server_name: str, server_params: StdioServerParameters, timeout: float = SESSION_TIMEOUT) -> List[dict]:
+        """Connect to an MCP server and register its tools, keeping the session in the pool."""
         # Store server parameters for later use
         self.server_params[server_name] = server_params
-        
+        self.session_pool.register(server_name, server_params, transport=self._server_transports.get(server_name))
+        return await self._load_tools(server_name, timeout)
+
+    async def connect_in_process(self, server_name: str, server_filepath: str, timeout: float = SESSION_TIMEOUT) -> List[dict]:
+        """Import a bundled FastMCP server and register its tools, talking to it over memory streams."""
+        server = load_fastmcp_server(server_filepath)
+        self.session_pool.register_transport(server_name, partial(inprocess_client, server))
+        return await self._load_tools(server_name, timeout)
+
+    async def connect_remote(self, server_name: str, url: str, timeout: float = SESSION_TIMEOUT) -> List[dict]:
+        """Connect to a shared server over SSE and register its tools; pooled sessions stay connected between calls."""
+        self.session_pool.register_transport(server_name, partial(sse_client, url, timeout=timeout))
+        return await self._load_tools(server_name, timeout)
+
+    async def _load_tools(self, server_name: str, timeout: float) -> List[dict]:
+        """List the tools of a registered server through the pool and register them."""
         try:
             # Add a timeout to prevent hanging indefinitely
-            async with asyncio.timeout(SESSION_TIMEOUT):  # 10-second timeout
-                try:
-                    logger.info(f"Opening stdio client for {server_name}...", extra={"stage": "MCP_SERVER"})
-                    async with stdio_client(server_params) as (read, write):
-                        try:
-                            async with ClientSession(read, write) as session:
-                                try:
-                                    logger.info(f"Initializing session for {server_name}...", extra={"stage": "MCP_SERVER"})
-                                    await session.initialize()
-                                    
-                                    tools_result = await session.list_tools()
-                                    tools = tools_result.tools
-                                    
-                                    logger.info(f"Registering {len(tools)} tools from {server_name}...", extra={"stage": "MCP_SERVER"})
-                                    for tool in tools:
-                                        self.available_tools[tool.name] = {
-                                            "server": server_name,
-                                            "description": tool.description,
-                                            "parameters": tool.inputSchema
-                                        }
-        
-                                except Exception as e:
-                                    logger.error(f"Error in session for {server_name}: {e}", extra={"stage": "MCP_SERVER"})
-                                    logger.error(f"Session exception details: {traceback.format_exc()}", extra={"stage": "MCP_SERVER"})
-                                    raise
-                        except Exception as e:
-                            logger.error(f"Error creating ClientSession for {server_name}: {e}", extra={"stage": "MCP_SERVER"})
-                            raise
-                except Exception as e:
-                    logger.error(f"Error with stdio_client for {server_name}: {e}", extra={"stage": "MCP_SERVER"})
-                    raise
+            async with asyncio.timeout(timeout):  # per-server deadline
+                logger.info(f"Opening pooled session for {server_name}...", extra={"stage": "MCP_SERVER"})
+                async with self.session_pool.acquire(server_name) as session:
+                    started = time.perf_counter()
+                    tools_result = await session.list_tools()
+                    self._list_tools_seconds[server_name] = time.perf_counter() - started
+                    tools = [
+                        {
+                            "name": tool.name,
+                            "description": tool.description,
+                            "inputSchema": tool.inputSchema,
+                            # Hints such as cacheableHint
+                            "annotations": tool_annotations(tool),
+                        }
+                        for tool in tools_result.tools
+                    ]
+                    self._register_tools(server_name, tools)
+                    return tools
         except asyncio.TimeoutError:
             logger.error(f"Timeout connecting to MCP server '{server_name}'", extra={"stage": "MCP_SERVER"})
             raise
         except Exception as e:
             logger.error(f"Error connecting to MCP server '{server_name}': {e}", extra={"stage": "MCP_SERVER"})
+            logger.error(f"Session exception details: {traceback.format_exc()}", extra={"stage": "MCP_SERVER"})
             raise
 
 
-    async def connect_to_multiple_servers(self, mcp_servers: dict=None) -> None:
-        """Connect to multiple MCP servers concurrently."""
+    async def connect_to_multiple_servers(self, mcp_servers: dict=None, timeout: float = SESSION_TIMEOUT) -> StartupReport:
+        """
+        Connect to multiple MCP servers concurrently.
+
+        `mcp_servers` maps a server name to either a file path (run over stdio)
+        or an MCPServerConfig selecting the transport. Remote (SSE) servers are
+        routed through `available_tools` exactly like local ones.
+
+        Every server gets its own `timeout` deadline, so total startup time is
+        bounded by the slowest server rather than the sum. Failures are
+        recorded in the returned report instead of aborting the other servers.
+        Servers with a fresh on-disk tool manifest are registered from the
+        cache immediately and verified in the background.
+        """
+        started = time.perf_counter()
+        timings = []
         if mcp_servers:
-            server_params = [self._create_server_params(filepath) for _, filepath in mcp_servers.items()]
-            
-            # Run connections with better error handling
-            for name, params in zip(mcp_servers.keys(), server_params):
-                try:
-                    await self.connect_to_server(name, params)
-                except Exception as e:
-                    logger.error(f"Error connecting to MCP server '{name}': {e}", extra={"stage": "MCP_SERVER"})
-                    logger.error(f"Exception details: {traceback.format_exc()}", extra={"stage": "MCP_SERVER"})
-            
+            timings = await asyncio.gather(*[
+                self._connect_with_timing(name, server, timeout)
+                for name, server in mcp_servers.items()
+            ])
             logger.info("All connection attempts completed", extra={"stage": "MCP_SERVER"})
+
+        self.startup_report = StartupReport(servers=list(timings), total_seconds=time.perf_counter() - started)
+        self.supervisor.start()
+        return self.startup_report
+
+    async def _connect_with_timing(self, server_name: str, server: Union[str, MCPServerConfig], timeout: float) -> ServerStartupTiming:
+        """Connect to one server and capture spawn/initialize/list_tools timings."""
+        started = time.perf_counter()
+        config = server if isinstance(server, MCPServerConfig) else MCPServerConfig(path=server)
+        self.server_configs[server_name] = config
+        self.breakers[server_name] = CircuitBreaker(server_name)
+        self.limiter.configure(server_name, config.max_concurrency, config.max_queue, config.tool_concurrency)
+        if config.max_concurrency:
+            # Admission control sits in front of the pool, so the pool must never be the bottleneck
+            self.session_pool.sizes[server_name] = max(config.max_concurrency, self.session_pool.size)
+        if config.transport == "inprocess":
+            return await self._timed_connect(server_name, self.connect_in_process(server_name, config.path, timeout=timeout), timeout, started)
+        if config.transport == "sse":
+            # Shared server run by another process or node: its sources are not ours to hash for the manifest cache
+            return await self._timed_connect(server_name, self.connect_remote(server_name, config.url, timeout=timeout), timeout, started)
+
+        server_filepath = config.path
+        server_params = self._create_server_params(server_filepath)
+        cache_key = self._manifest_key(server_filepath, server_params)
+        if config.transport == "forkserver":
+            if forkserver_available():
+                self._server_transports[server_name] = partial(forkserver_client, server_filepath, server_params.env, server_params.cwd)
+            else:
+                logger.warning(f"Fork server unavailable on this platform, starting {server_name} over stdio", extra={"stage": "MCP_SERVER"})
+        if config.idle_shutdown is not None:
+            self.session_pool.idle_timeouts[server_name] = config.idle_shutdown
+        if config.lazy:
+            # Never keep warm standbys for a server that should only run on demand
+            self.session_pool.min_idle[server_name] = 0
+
+        cached_tools = self.manifest_cache.load(server_name, cache_key) if cache_key else None
+        if cached_tools is not None:
+            self.server_params[server_name] = server_params
+            self.session_pool.register(server_name, server_params, transport=self._server_transports.get(server_name))
+            self._register_tools(server_name, cached_tools)
+            if config.lazy:
+                # Verified on first use, once the server has been spawned for a real call
+                self._unverified_manifests[server_name] = (server_params, cache_key, cached_tools)
+            else:
+                self._spawn_background(self._refresh_manifest(server_name, server_params, cache_key, cached_tools, timeout))
+            return ServerStartupTiming(
+                server=server_name,
+                status="lazy" if config.lazy else "cached",
+                total_seconds=time.perf_counter() - started,
+                tool_count=len(cached_tools),
+            )
+
+        def store_manifest(tools: List[dict]) -> None:
+            if cache_key:
+                self.manifest_cache.store(server_name, cache_key, tools)
+
+        return await self._timed_connect(server_name, self.connect_to_server(server_name, server_params, timeout=timeout), timeout, started, on_tools=store_manifest)
+
+    async def _timed_connect(self, server_name: str, connect, timeout: float, started: float, on_tools=None) -> ServerStartupTiming:
+        """Await a connect coroutine and turn its outcome into a ServerStartupTiming."""
+        status, error = "ok", None
+        try:
+            tools = await connect
+            if on_tools:
+                on_tools(tools)
+        except asyncio.TimeoutError:
+            status, error = "timeout", f"no response within {timeout}s"
+        except Exception as e:
+            status, error = "error", str(e)
+
+        pool_timings = self.session_pool.startup_timings.get(server_name, {})
+        return ServerStartupTiming(
+            server=server_name,
+            status=status,
+            spawn_seconds=pool_timings.get("spawn_seconds"),
+            initialize_seconds=pool_timings.get("initialize_seconds"),
+            list_tools_seconds=self._list_tools_seconds.get(server_name),
+            total_seconds=time.perf_counter() - started,
+            tool_count=sum(1 for tool in self.available_tools.values() if tool["server"] == server_name),
+            error=error,
+        )
     
 
+    def _manifest_key(self, server_filepath: str, server_params: StdioServerParameters) -> Optional[str]:
+        try:
+            return self.manifest_cache.key(server_filepath, server_params)
+        except Exception as e:
+            logger.warning(f"Could not compute tool manifest key for {server_filepath}: {e}", extra={"stage": "MCP_SERVER"})
+            return None
+
+    async def _refresh_manifest(self, server_name: str, server_params: StdioServerParameters, cache_key: str, cached_tools: List[dict], timeout: float) -> None:
+        """Check a cached manifest against the live server and rewrite it if it drifted."""
+        try:
+            tools = await self.connect_to_server(server_name, server_params, timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Background manifest check for {server_name} failed, keeping cached tools: {e}", extra={"stage": "MCP_SERVER"})
+            return
+
+        if tools != cached_tools:
+            live_names = {tool["name"] for tool in tools}
+            for tool in cached_tools:
+                if tool["name"] not in live_names and self.available_tools.get(tool["name"], {}).get("server") == server_name:
+                    del self.available_tools[tool["name"]]
+            logger.info(f"Tool manifest for {server_name} changed, refreshed from live server", extra={"stage": "MCP_SERVER"})
+            self.manifest_cache.store(server_name, cache_key, tools)
+
+    def _spawn_background(self, coro) -> None:
+        self._track_background(asyncio.create_task(coro))
+
+    def _track_background(self, task: asyncio.Task) -> None:
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def server_health(self) -> Dict[str, ServerHealth]:
+        """Health, restart counts and time-to-recover for every supervised server."""
+        return dict(self.supervisor.health)
+
+    def concurrency_stats(self) -> Dict[str, ConcurrencyStats]:
+        """Limits, queue depth and wait times per server (and per limited tool)."""
+        return self.limiter.stats()
+
+    def cache_stats(self) -> ResultCacheStats:
+        """Hits, misses, shared in-flight calls and size of the result cache."""
+        return self.result_cache.snapshot()
+
+    def circuit_states(self) -> Dict[str, CircuitState]:
+        """Circuit breaker state of every server."""
+        return {name: breaker.snapshot() for name, breaker in self.breakers.items()}
+
+    def tool_unavailable(self, tool_name: str) -> Optional[CircuitState]:
+        """The open circuit of the server behind `tool_name`, or None if calls to it may go through."""
+        server_name = self.available_tools.get(tool_name, {}).get("server")
+        breaker = self.breakers.get(server_name)
+        if breaker is None or breaker.state != "open" or breaker.retry_in() == 0:
+            return None
+        return breaker.snapshot()
+
+    def caches_results(self, tool_name: str) -> bool:
+        """Whether results of `tool_name` are served from the result cache (pure tool, caching not disabled)."""
+        tool = self.available_tools.get(tool_name)
+        if tool is None or not tool["cacheable"]:
+            return False
+        config = self.server_configs.get(tool["server"])
+        return config is None or config.cache_results
+
+    def is_commutative(self, tool_name: str) -> bool:
+        """Whether the server of `tool_name` declares its result independent of the order of the arguments."""
+        return self.available_tools.get(tool_name, {}).get("commutative", False)
+
+    async def prewarm(self, tool_name: str) -> None:
+        """Open a session to the server behind `tool_name` ahead of a likely call, unless one is idle already."""
+        server_name = self.available_tools.get(tool_name, {}).get("server")
+        if server_name is None or self.session_pool.idle_sessions(server_name):
+            return
+        try:
+            if await self.session_pool.warm(server_name) is not None:
+                logger.info(f"Pre-warmed {server_name} for {tool_name}", extra={"stage": "MCP_SERVER"})
+        except Exception as e:
+            logger.warning(f"Could not pre-warm {server_name}: {e}", extra={"stage": "MCP_SERVER"})
+
     def get_tool_schemas(self)-> List[dict]:
         """Get tool schemas in the format expected by Gemini."""
         schemas = []
@@ -115,31 +342,184 @@ class PythonMCPClient:
             })
         return schemas
 
-    async def execute_tool(self, tool_call: types.FunctionCall) -> str:
-        """Execute a tool call using the appropriate MCP server."""
+    async def execute_tool(self, tool_call: types.FunctionCall, caller: Hashable = None, deadline: Optional[Deadline] = None, on_progress: Optional[ProgressCallback] = None) -> Union[CallToolResult, str]:
+        """
+        Execute a tool call using the appropriate MCP server.
+
+        Calls are admitted per server (and per tool, where configured); waiting
+        calls are served round-robin across `caller`s, and a call that cannot
+        get a slot in time is rejected with an error string instead of queueing
+        without bound. Servers whose circuit breaker is open are not called at
+        all. Idempotent tools are retried and hedged as configured for their
+        server.
+
+        Every call is bounded by the remaining `deadline` budget (if given) and
+        by a per-tool timeout that follows the tool's observed p99 latency.
+        Progress reported by the server is passed to `on_progress`; a call that
+        times out or is cancelled is cancelled on the server as well.
+
+        Arguments are checked against the tool's input schema and coerced to
+        the declared types first; invalid calls never reach the server.
+
+        Results of tools the server declares cacheable (unless its config
+        disables caching) are served from an LRU cache, and identical calls in
+        flight at the same time share one execution.
+        """
         tool_name = tool_call.name
-        arguments = tool_call.args
         
         if tool_name not in self.available_tools:
             return f"Error: Tool '{tool_name}' not found"
+
+        try:
+            arguments = self.tool_validators[tool_name](tool_call.args)
+        except ArgumentError as e:
+            logger.warning(f"Rejected {tool_name} call with invalid arguments: {e}", extra={"stage": "MCP_SERVER"})
+            return f"Error: Invalid arguments for tool '{tool_name}': {e}"
         
         server_name = self.available_tools[tool_name]["server"]
-        server_params = self.server_params[server_name]
-        
+        dispatch = partial(self._dispatch, server_name, tool_name, arguments, caller, deadline, on_progress)
+        if self.caches_results(tool_name):
+            return await self.result_cache.get_or_call(ResultCache.key(tool_name, arguments), dispatch)
+        return await dispatch()
+
+    async def _dispatch(self, server_name: str, tool_name: str, arguments: dict, caller: Hashable, deadline: Optional[Deadline], on_progress: Optional[ProgressCallback]) -> Union[CallToolResult, str]:
+        """Call a tool on its server behind the circuit breaker; failures are returned as error strings."""
+        breaker = self.breakers.setdefault(server_name, CircuitBreaker(server_name))
+        config = self.server_configs.get(server_name)
+
+        try:
+            breaker.allow()
+        except CircuitOpenError as e:
+            return f"Error: Tool '{tool_name}' not called, {e}"
+
         try:
-            async with asyncio.timeout(SESSION_TIMEOUT):  # 10 second timeout
-                async with stdio_client(server_params) as (read, write):
-                    async with ClientSession(read, write) as session:
-                        # Initialize the connection
-                        await session.initialize()                        
-                        # Call the tool using the MCP session
-                        result = await session.call_tool(
-                            name=tool_name,
-                            arguments=arguments
-                        )
-                        logger.info(f"{tool_call} executed successfully!", extra={"stage": "MCP_SERVER"})
-                        return result
+            if config is not None and config.is_idempotent(tool_name) and (config.max_retries or config.hedge_after):
+                result = await self._call_with_retries(server_name, tool_name, arguments, caller, config, breaker, deadline, on_progress)
+            else:
+                result = await self._call_once(server_name, tool_name, arguments, caller, deadline=deadline, on_progress=on_progress)
+            breaker.record_success()
+            logger.info(f"{tool_name} executed successfully!", extra={"stage": "MCP_SERVER"})
+            if server_name in self._unverified_manifests:
+                self._spawn_background(self._refresh_manifest(server_name, *self._unverified_manifests.pop(server_name), SESSION_TIMEOUT))
+            return result
+        except ServerOverloadedError as e:
+            breaker.record_skipped()
+            logger.warning(f"Rejected {tool_name}: {e}", extra={"stage": "MCP_SERVER"})
+            return f"Error: Tool '{tool_name}' rejected, server overloaded: {e}"
+        except DeadlineExceeded as e:
+            # The caller ran out of time; that says nothing about the server
+            breaker.record_skipped()
+            return f"Error: Tool '{tool_name}' not completed, {e}"
         except asyncio.TimeoutError:
+            breaker.record_failure("timed out")
             return f"Tool execution timed out for '{tool_name}'"
         except Exception as e:
-            return f"Error executing tool '{tool_name}': {str(e)}"
\ No newline at end of file
+            breaker.record_failure(str(e) or type(e).__name__)
+            return f"Error executing tool '{tool_name}': {str(e)}"
+        except BaseException:
+            breaker.record_skipped()
+            raise
+
+    async def _call_once(self, server_name: str, tool_name: str, arguments: dict, caller: Hashable, wait: bool = True, deadline: Optional[Deadline] = None, on_progress: Optional[ProgressCallback] = None) -> CallToolResult:
+        """
+        One admitted call on a pooled session.
+
+        Admission, session checkout and the call together get SESSION_TIMEOUT
+        (or what is left of `deadline`); the call itself additionally gets the
+        tool's adaptive timeout.
+
+        A call given up on is cancelled on the server. If the server confirms,
+        its session goes back to the pool; if not, the session is discarded,
+        which stops the server process still busy with the call.
+        """
+        budget = SESSION_TIMEOUT if deadline is None else deadline.budget(SESSION_TIMEOUT)
+        latency = self.tool_latency.setdefault(tool_name, LatencyWindow())
+        call_timeout = latency.timeout(default=SESSION_TIMEOUT)
+        abandoned = None
+        try:
+            async with asyncio.timeout(budget):
+                async with self.limiter.slot(server_name, tool_name, caller, wait=wait, timeout=budget) as timing:
+                    async with self.session_pool.acquire(server_name) as session:
+                        # Call the tool using a pooled, already initialized session
+                        started = time.perf_counter()
+                        try:
+                            async with asyncio.timeout(call_timeout):
+                                result = await session.call_tool_with_progress(tool_name, arguments, on_progress)
+                        except BaseException as e:
+                            if isinstance(e, TimeoutError):
+                                # Count the timeout as a (slow) sample so a too tight timeout widens again
+                                latency.add(call_timeout)
+                            if not session.responsive:
+                                raise
+                            # Cancelled cleanly on the server: keep the session, re-raise outside the pool
+                            abandoned = e
+                        else:
+                            timing.seconds = time.perf_counter() - started
+                            latency.add(timing.seconds)
+                            return result
+                    raise abandoned
+        except TimeoutError:
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceeded(f"time budget of {deadline.seconds:g}s exhausted") from None
+            raise
+
+    async def _call_with_retries(self, server_name: str, tool_name: str, arguments: dict, caller: Hashable, config: MCPServerConfig, breaker: CircuitBreaker, deadline: Optional[Deadline] = None, on_progress: Optional[ProgressCallback] = None) -> CallToolResult:
+        """Call an idempotent tool, retrying failures with jittered exponential backoff."""
+        for attempt in range(config.max_retries + 1):
+            try:
+                if config.hedge_after:
+                    return await self._call_hedged(server_name, tool_name, arguments, caller, config.hedge_after, deadline, on_progress)
+                return await self._call_once(server_name, tool_name, arguments, caller, deadline=deadline, on_progress=on_progress)
+            except (ServerOverloadedError, DeadlineExceeded):
+                raise
+            except Exception as e:
+                delay = random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** attempt))
+                if attempt == config.max_retries or breaker.state == "open" or (deadline is not None and deadline.remaining() <= delay):
+                    # Out of retries or time, or other calls already found the server down
+                    raise
+                logger.warning(f"Call to {tool_name} failed ({str(e) or type(e).__name__}), retry {attempt + 1}/{config.max_retries} in {delay:.2f}s", extra={"stage": "MCP_SERVER"})
+                await asyncio.sleep(delay)
+
+    async def _call_hedged(self, server_name: str, tool_name: str, arguments: dict, caller: Hashable, hedge_after: float, deadline: Optional[Deadline] = None, on_progress: Optional[ProgressCallback] = None) -> CallToolResult:
+        """
+        Call a tool and, if it has not answered after `hedge_after` seconds,
+        send the same call on a second session; the first success wins.
+
+        The losing call is cancelled, on the server too, so it does not keep
+        a worker busy; its cleanup finishes in the background.
+        """
+        primary = asyncio.create_task(self._call_once(server_name, tool_name, arguments, caller, deadline=deadline, on_progress=on_progress))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=hedge_after)
+            if not done:
+                logger.info(f"{tool_name} slower than {hedge_after}s, hedging on another session", extra={"stage": "MCP_SERVER"})
+                # Only hedge into spare capacity; queueing behind the slow call would gain nothing
+                pending.add(asyncio.create_task(self._call_once(server_name, tool_name, arguments, caller, wait=False, deadline=deadline)))
+
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        for loser in pending:
+                            loser.cancel()
+                            loser.add_done_callback(lambda t: t.cancelled() or t.exception())
+                            self._track_background(loser)
+                        pending = set()
+                        return task.result()
+                    # Prefer the primary's error; a rejected hedge says nothing about the server
+                    if task is primary or error is None:
+                        error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def close(self) -> None:
+        """Shut down all pooled sessions and their server processes."""
+        for task in list(self._background_tasks):
+            task.cancel()
+        await self.supervisor.stop()
+        await self.session_pool.close()
+        get_fork_server().close()
@@ -0,0 +1,164 @@
+from typing import Dict, Optional
+from src.clients.session_pool import MCPSessionPool, PooledSession, SESSION_TIMEOUT
+from src.models.mcp_servers import ServerHealth
+import asyncio
+import time
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+# Supervisor defaults
+PING_INTERVAL = 15  # seconds between health-check sweeps
+PING_TIMEOUT = 5  # seconds a server has to answer a ping
+STANDBY_SESSIONS = 0  # warm idle sessions kept per server
+RESTART_BACKOFF_INITIAL = 0.5  # seconds
+RESTART_BACKOFF_MAX = 30  # seconds
+
+class MCPServerSupervisor:
+    def __init__(
+        self,
+        session_pool: MCPSessionPool,
+        ping_interval: float = PING_INTERVAL,
+        ping_timeout: float = PING_TIMEOUT,
+        standby: int = STANDBY_SESSIONS,
+    ) -> None:
+        """
+        Watch every server in a session pool and keep it serviceable.
+
+        Each sweep pings the idle sessions of every server. Sessions that do
+        not answer (crashed or wedged processes) are discarded and replaced,
+        with exponential backoff between failed restart attempts. Optionally
+        keeps `standby` extra initialized sessions per server so a failover
+        does not pay cold-start cost.
+
+        Args:
+            session_pool: The pool whose servers are supervised
+            ping_interval: Seconds between health-check sweeps
+            ping_timeout: Seconds a server has to answer a ping
+            standby: Number of warm idle sessions to keep per server
+        """
+        self.session_pool = session_pool
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.standby = standby
+        self.health: Dict[str, ServerHealth] = {}
+        self._backoff: Dict[str, float] = {}
+        self._next_attempt: Dict[str, float] = {}
+        self._failed_at: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._pending = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the background supervision loop."""
+        for server_name in self.session_pool.servers:
+            self._health(server_name)
+            self.session_pool.min_idle.setdefault(server_name, self.standby)
+        self.session_pool.on_discard = self._on_discard
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the supervision loop and any in-flight recovery."""
+        for task in list(self._pending):
+            task.cancel()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_discard(self, server_name: str) -> None:
+        """Called by the pool when a session broke mid-call: treat the server as crashed and recover now."""
+        if server_name not in self._failed_at:
+            self._failed_at[server_name] = time.monotonic()
+            self._health(server_name).healthy = False
+            task = asyncio.create_task(self.check(server_name))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    def _health(self, server_name: str) -> ServerHealth:
+        if server_name not in self.health:
+            self.health[server_name] = ServerHealth(server=server_name)
+        return self.health[server_name]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.gather(*[self.check(name) for name in self.session_pool.servers], return_exceptions=True)
+            # Wake up early when a restart is due before the next sweep
+            now = time.monotonic()
+            delay = min([self.ping_interval] + [max(at - now, 0) for at in self._next_attempt.values()])
+            await asyncio.sleep(delay)
+
+    async def check(self, server_name: str) -> None:
+        """Ping the idle sessions of one server, then restart or top up as needed."""
+        async with self._locks.setdefault(server_name, asyncio.Lock()):
+            await self._check(server_name)
+
+    async def _check(self, server_name: str) -> None:
+        health = self._health(server_name)
+        failed = False
+        for pooled in self.session_pool.idle_sessions(server_name):
+            if not await self._ping(pooled):
+                failed = True
+                logger.warning(f"Server {server_name} did not answer ping, restarting", extra={"stage": "MCP_SERVER"})
+                await self.session_pool.discard(pooled)
+
+        if failed and server_name not in self._failed_at:
+            self._failed_at[server_name] = time.monotonic()
+            health.healthy = False
+
+        # Restart crashed servers, and keep the configured number of warm standbys
+        needs_restart = server_name in self._failed_at
+        standby = self.session_pool.min_idle.get(server_name, self.standby)
+        missing = standby - len(self.session_pool.idle_sessions(server_name))
+        if needs_restart or missing > 0:
+            await self._restart(server_name, max(missing, 1))
+
+        health.live_sessions = self.session_pool.live_count(server_name)
+        health.idle_sessions = len(self.session_pool.idle_sessions(server_name))
+
+    async def _ping(self, pooled: PooledSession) -> bool:
+        if not pooled.alive:
+            return False
+        try:
+            async with asyncio.timeout(self.ping_timeout):
+                await pooled.session.send_ping()
+            return True
+        except Exception:
+            return False
+
+    async def _restart(self, server_name: str, count: int) -> None:
+        """Open `count` sessions for a server, respecting the restart backoff."""
+        now = time.monotonic()
+        if now < self._next_attempt.get(server_name, 0):
+            return
+
+        health = self._health(server_name)
+        try:
+            for _ in range(count):
+                async with asyncio.timeout(SESSION_TIMEOUT):
+                    if await self.session_pool.warm(server_name) is None:
+                        # As many sessions as the pool allows are live already
+                        break
+        except Exception as e:
+            backoff = min(self._backoff.get(server_name, RESTART_BACKOFF_INITIAL / 2) * 2, RESTART_BACKOFF_MAX)
+            self._backoff[server_name] = backoff
+            self._next_attempt[server_name] = time.monotonic() + backoff
+            health.healthy = False
+            health.last_error = str(e) or type(e).__name__
+            logger.error(f"Restart of {server_name} failed, retrying in {backoff:.1f}s: {e}", extra={"stage": "MCP_SERVER"})
+            return
+
+        self._backoff.pop(server_name, None)
+        self._next_attempt.pop(server_name, None)
+        failed_at = self._failed_at.pop(server_name, None)
+        health.healthy = True
+        if failed_at is not None:
+            health.restarts += 1
+            health.last_recovery_seconds = time.monotonic() - failed_at
+            logger.info(f"Server {server_name} recovered in {health.last_recovery_seconds:.2f}s", extra={"stage": "MCP_SERVER"})
@@ -0,0 +1,169 @@
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from src.models.agent_components import ArtifactSummary
+import re
+import json
+import mmap
+import shutil
+import tempfile
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Tool results whose JSON encoding is longer than this are stored instead of kept in memory/prompts
+ARTIFACT_MIN_CHARS = 500
+SUMMARY_ITEMS = 3  # list elements shown at each end of a summary
+SUMMARY_CHARS = 20  # characters (or digits) shown at each end of a summary
+MAX_EXACT_DIGITS = 18  # min/max are only reported for lists of numbers this small
+HANDLE_PREFIX = "artifact://"
+_HANDLE_PATTERN = re.compile(re.escape(HANDLE_PREFIX) + r"\d+")
+_INTEGER_PATTERN = re.compile(r"-?\d+")
+_ARRAY_TYPECODE = "q"  # native signed 64-bit
+
+
+def _digits(value: Any) -> Optional[int]:
+    """Number of digits of an int or an integer string, None for anything else."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return len(str(abs(value)))
+    if isinstance(value, str) and _INTEGER_PATTERN.fullmatch(value):
+        return len(value.lstrip("-"))
+    return None
+
+
+def _clip(value: Any) -> Any:
+    """Shorten long strings (e.g. huge numbers) shown inside a summary."""
+    if isinstance(value, str) and len(value) > 2 * SUMMARY_CHARS:
+        return f"{value[:SUMMARY_CHARS]}...{value[-SUMMARY_CHARS:]} ({len(value)} chars)"
+    return value
+
+
+class ArtifactStore:
+    def __init__(self, root: Optional[str] = None, min_chars: int = ARTIFACT_MIN_CHARS) -> None:
+        """
+        Local store for large tool results, referenced by handle.
+
+        A large result is written to its own file and replaced, in memory and
+        prompts, by a handle and a compact summary (length, head/tail,
+        magnitude). Handles given back as tool arguments are resolved to the
+        stored value before the call, so data can pass from one tool to the
+        next without a trip through the LLM.
+
+        Integer lists that fit 64 bits are stored as raw arrays and text as
+        UTF-8, both read back through mmap; anything else is stored as JSON.
+
+        Args:
+            root: Directory for artifact files (a temporary directory, removed on close, by default)
+            min_chars: Length of a result's JSON encoding above which it is stored
+        """
+        self.min_chars = min_chars
+        self._owns_root = root is None
+        self.root = Path(root) if root else Path(tempfile.mkdtemp(prefix="agent-artifacts-"))
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._files: Dict[str, Tuple[Path, str]] = {}
+
+    @staticmethod
+    def is_handle(value: Any) -> bool:
+        return isinstance(value, str) and _HANDLE_PATTERN.fullmatch(value.strip()) is not None
+
+    def compact(self, value: Any) -> Any:
+        """`value` itself if it is small, otherwise the summary of the artifact it is stored as."""
+        if len(json.dumps(value)) <= self.min_chars:
+            return value
+        return self.put(value).model_dump(exclude_none=True)
+
+    def put(self, value: Any) -> ArtifactSummary:
+        """Store `value` and return its handle and summary."""
+        handle = f"{HANDLE_PREFIX}{len(self._files) + 1}"
+        path = self.root / str(len(self._files) + 1)
+        self._files[handle] = (path, self._write(path, value))
+        summary = self._summarize(handle, value)
+        logger.info(f"Stored tool result as {handle} ({summary.kind}, length {summary.length})", extra={"stage": "MEMORY"})
+        return summary
+
+    def get(self, handle: str) -> Any:
+        """Load the value stored under `handle`."""
+        handle = handle.strip()
+        if handle not in self._files:
+            raise KeyError(f"Unknown artifact handle: {handle}")
+        path, fmt = self._files[handle]
+        with open(path, "rb") as f:
+            if path.stat().st_size == 0:
+                return [] if fmt == "array" else ""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if fmt == "array":
+                    with memoryview(mapped) as raw, raw.cast(_ARRAY_TYPECODE) as values:
+                        return values.tolist()
+                if fmt == "text":
+                    return mapped[:].decode("utf-8")
+                return json.loads(mapped[:])
+
+    def resolve(self, arguments: Any) -> Any:
+        """Replace every handle in (nested) tool arguments by the stored value."""
+        if self.is_handle(arguments):
+            return self.get(arguments)
+        if isinstance(arguments, dict):
+            return {key: self.resolve(value) for key, value in arguments.items()}
+        if isinstance(arguments, list):
+            return [self.resolve(value) for value in arguments]
+        return arguments
+
+    def expand(self, text: str) -> str:
+        """Replace handles inside free text (e.g. a final answer) by the stored values."""
+        def value_text(match: re.Match) -> str:
+            if match.group(0) not in self._files:
+                return match.group(0)
+            value = self.get(match.group(0))
+            return value if isinstance(value, str) else json.dumps(value)
+        return _HANDLE_PATTERN.sub(value_text, text)
+
+    def close(self) -> None:
+        """Delete the artifact files (and the directory, if the store created it)."""
+        self._files.clear()
+        if self._owns_root:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def _write(self, path: Path, value: Any) -> str:
+        if isinstance(value, str):
+            path.write_bytes(value.encode("utf-8"))
+            return "text"
+        if isinstance(value, list) and all(isinstance(item, int) and not isinstance(item, bool) for item in value):
+            try:
+                path.write_bytes(array(_ARRAY_TYPECODE, value).tobytes())
+                return "array"
+            except OverflowError:
+                pass
+        path.write_text(json.dumps(value), encoding="utf-8")
+        return "json"
+
+    def _summarize(self, handle: str, value: Any) -> ArtifactSummary:
+        if isinstance(value, list):
+            digits = [_digits(item) for item in value]
+            numeric = bool(value) and None not in digits
+            exact = numeric and max(digits) <= MAX_EXACT_DIGITS
+            numbers: List[int] = [int(item) for item in value] if exact else []
+            return ArtifactSummary(
+                handle=handle,
+                kind="list",
+                length=len(value),
+                head=[_clip(item) for item in value[:SUMMARY_ITEMS]],
+                tail=[_clip(item) for item in value[-SUMMARY_ITEMS:]],
+                min=min(numbers) if numbers else None,
+                max=max(numbers) if numbers else None,
+                max_digits=max(digits) if numeric else None,
+            )
+
+        text = value if isinstance(value, str) else json.dumps(value)
+        digits = _digits(text.strip())
+        return ArtifactSummary(
+            handle=handle,
+            kind="number" if digits is not None else "text",
+            length=digits if digits is not None else len(text),
+            head=text[:SUMMARY_CHARS],
+            tail=text[-SUMMARY_CHARS:],
+            max_digits=digits,
+        )
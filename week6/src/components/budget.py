@@ -0,0 +1,153 @@
+from src.clients.gemini import DEFAULT_MODEL, GeminiClient
+from src.models.agent_components import BudgetUsage
+from src.utils.deadline import Deadline, DeadlineExceeded
+from typing import Dict, Optional, Tuple
+import math
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Per-run budgets
+MAX_TOOL_TURNS = 10  # step-by-step decision turns
+MAX_LLM_CALLS = 20
+MAX_TOKENS = 200_000  # prompt plus completion tokens
+MAX_COST = 0.05  # USD
+MAX_TOOL_SECONDS = 60  # summed duration of tool calls
+# Model the LLM steps switch to once the budget runs low
+CHEAP_MODEL = "gemini-2.0-flash-lite"
+# USD per million prompt and completion tokens
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+}
+# Share of the tightest budget left below which LLM steps get cheaper
+CHEAP_MODEL_BELOW = 0.5  # every LLM step uses CHEAP_MODEL
+SKIP_PERCEPTION_BELOW = 0.3  # follow-up turns reuse the previous perception instead of perceiving again
+
+
+class BudgetExceeded(DeadlineExceeded):
+    """Raised when a step cannot run because one of the run's budgets is used up."""
+
+
+class RunBudget:
+    def __init__(
+        self,
+        deadline: Deadline,
+        max_turns: int = MAX_TOOL_TURNS,
+        max_llm_calls: int = MAX_LLM_CALLS,
+        max_tokens: int = MAX_TOKENS,
+        max_cost: float = MAX_COST,
+        max_tool_seconds: float = MAX_TOOL_SECONDS,
+    ) -> None:
+        """
+        What one agent run may spend, and what it has spent so far.
+
+        LLM requests, tokens, cost, tool time and wall time (the deadline)
+        are tracked against their limits. The tightest of them sets how
+        much is `remaining`; as it runs down the LLM steps switch to a
+        cheaper model and follow-up turns skip perception, and the turn
+        allowance shrinks to what the turns so far say will still fit.
+
+        Args:
+            deadline: Wall-clock budget of the run
+            max_turns: Most step-by-step decision turns
+            max_llm_calls: Most LLM requests
+            max_tokens: Most prompt plus completion tokens
+            max_cost: Most estimated LLM cost in USD
+            max_tool_seconds: Most summed tool call time
+        """
+        self.deadline = deadline
+        self.max_turns = max_turns
+        self.limits = {
+            "llm_calls": max_llm_calls,
+            "tokens": max_tokens,
+            "cost_usd": max_cost,
+            "tool_seconds": max_tool_seconds,
+            "wall_seconds": deadline.seconds,
+        }
+        self.usage = BudgetUsage()
+
+    def used(self) -> Dict[str, float]:
+        return {
+            "llm_calls": self.usage.llm_calls,
+            "tokens": self.usage.prompt_tokens + self.usage.completion_tokens,
+            "cost_usd": self.usage.cost_usd,
+            "tool_seconds": self.usage.tool_seconds,
+            "wall_seconds": self.deadline.seconds - self.deadline.remaining(),
+        }
+
+    def remaining(self) -> float:
+        """Share of the tightest budget left (1 untouched, 0 used up)."""
+        used = self.used()
+        return max(min(1 - used[name] / limit for name, limit in self.limits.items()), 0.0)
+
+    def exhausted(self) -> Optional[str]:
+        """Name of a budget that is used up, if any."""
+        used = self.used()
+        return next((name for name, limit in self.limits.items() if used[name] >= limit), None)
+
+    @property
+    def model(self) -> str:
+        return CHEAP_MODEL if self.remaining() < CHEAP_MODEL_BELOW else DEFAULT_MODEL
+
+    def client(self, timeout: Optional[float] = None) -> GeminiClient:
+        """Client for the next LLM request: counts it, and picks the model for what is left of the budget."""
+        exhausted = self.exhausted()
+        if exhausted is not None:
+            raise BudgetExceeded(f"{exhausted} budget of {self.limits[exhausted]:g} exhausted")
+        model = self.model
+        if model != DEFAULT_MODEL:
+            self.usage.cheap_model_calls += 1
+            logger.info(f"{self.remaining():.0%} of the run budget left, using {model}", extra={"stage": "AGENT"})
+        self.usage.llm_calls += 1
+        return GeminiClient(model_name=model, timeout=timeout, on_usage=self.record_llm)
+
+    def record_llm(self, model: str, prompt_tokens: int, completion_tokens: int) -> None:
+        prompt_price, completion_price = MODEL_PRICES.get(model, MODEL_PRICES[DEFAULT_MODEL])
+        self.usage.prompt_tokens += prompt_tokens
+        self.usage.completion_tokens += completion_tokens
+        self.usage.cost_usd += (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+    def record_tool(self, seconds: float) -> None:
+        self.usage.tool_seconds += seconds
+
+    def skip_perception(self) -> bool:
+        """Whether the next perception should be skipped (and is counted as skipped) to save budget."""
+        if self.remaining() >= SKIP_PERCEPTION_BELOW:
+            return False
+        self.usage.perceptions_skipped += 1
+        logger.info(f"{self.remaining():.0%} of the run budget left, skipping perception", extra={"stage": "AGENT"})
+        return True
+
+    def turn_allowance(self) -> int:
+        """
+        Decision turns the run may take in total: MAX_TOOL_TURNS, less the
+        turns the budget left is not expected to cover at the average cost
+        of the turns so far (everything spent so far counts as turn cost).
+        """
+        turns = self.usage.turns
+        if self.exhausted() is not None:
+            return turns
+        if turns == 0:
+            return self.max_turns
+        used = self.used()
+        affordable = min(
+            math.floor((limit - used[name]) / (used[name] / turns)) if used[name] > 0 else self.max_turns
+            for name, limit in self.limits.items()
+        )
+        return min(self.max_turns, turns + affordable)
+
+    def start_turn(self) -> None:
+        self.usage.turns += 1
+
+    def report(self) -> BudgetUsage:
+        used = self.used()
+        return self.usage.model_copy(update={
+            "cost_usd": round(self.usage.cost_usd, 6),
+            "tool_seconds": round(self.usage.tool_seconds, 3),
+            "wall_seconds": round(used["wall_seconds"], 3),
+            "remaining": round(self.remaining(), 3),
+            "exhausted": self.exhausted(),
+        })
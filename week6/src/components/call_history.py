@@ -0,0 +1,93 @@
+from src.clients.mcp_servers import PythonMCPClient
+from src.clients.argument_validation import ArgumentError
+from src.clients.result_cache import ResultCache
+from typing import Any, Awaitable, Callable, Dict, List
+import asyncio
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Consecutive decision steps made only of calls already made in this run before the run is ended
+MAX_REPEATED_TURNS = 2
+
+
+class CallHistory:
+    def __init__(self, mcp_client: PythonMCPClient, max_repeated_turns: int = MAX_REPEATED_TURNS) -> None:
+        """
+        The tool calls of one agent run, by canonical fingerprint.
+
+        A call repeating an earlier successful one (same tool, same arguments
+        after schema coercion) is answered from this run's result table
+        instead of reaching the tool again, whatever the tool; identical
+        calls within one step run once. Decision steps that bring nothing but
+        repeats are counted, so a model going round in circles (A, A, ... or
+        A, B, A, B, ...) can be stopped early. Retrying a call that failed
+        is not a repeat.
+
+        Args:
+            mcp_client: Client whose tool schemas canonicalize the arguments
+            max_repeated_turns: Consecutive all-repeat steps after which `looping` is True
+        """
+        self.mcp_client = mcp_client
+        self.max_repeated_turns = max_repeated_turns
+        self.repeated_turns = 0
+        # Successful responses by fingerprint; failed calls are not recorded, so retrying them is no repeat
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def fingerprint(self, tool_name: str, arguments: Dict[str, Any]) -> str:
+        validate = self.mcp_client.tool_validators.get(tool_name)
+        try:
+            arguments = validate(arguments) if validate else arguments
+        except ArgumentError:
+            pass
+        return ResultCache.key(tool_name, arguments)
+
+    def seen(self, fingerprint: str) -> bool:
+        return fingerprint in self._results
+
+    def repeats(self, fingerprints: List[str]) -> List[bool]:
+        """For each call of one step, whether it repeats a successful call of the run or a call earlier in the step."""
+        seen = set(self._results)
+        repeated = []
+        for fingerprint in fingerprints:
+            repeated.append(fingerprint in seen)
+            seen.add(fingerprint)
+        return repeated
+
+    async def run(self, fingerprint: str, call: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """The earlier successful response for `fingerprint`, or else the response of `call()` (kept if successful)."""
+        if fingerprint in self._results:
+            logger.info(f"Serving repeated call {fingerprint[:80]} from this run's results", extra={"stage": "ACTION"})
+            return self._results[fingerprint]
+        if fingerprint in self._in_flight:
+            return await asyncio.shield(self._in_flight[fingerprint])
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[fingerprint] = future
+        try:
+            response = await call()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # retrieved here so an unawaited future does not log it
+            raise
+        finally:
+            del self._in_flight[fingerprint]
+        if "result" in response:
+            self._results[fingerprint] = response
+        future.set_result(response)
+        return response
+
+    def end_turn(self, repeated: List[bool]) -> None:
+        """Count a decision step whose calls were all `repeated`, or reset the count."""
+        if repeated and all(repeated):
+            self.repeated_turns += 1
+            logger.warning(f"Decision step repeated earlier calls ({self.repeated_turns} in a row)", extra={"stage": "ACTION"})
+        else:
+            self.repeated_turns = 0
+
+    @property
+    def looping(self) -> bool:
+        return self.repeated_turns >= self.max_repeated_turns
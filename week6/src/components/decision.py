@@ -3,6 +3,8 @@ from src.components.memory import MemoryItem
 from typing import List, Optional
 from dotenv import load_dotenv
 from src.clients.gemini import GeminiClient
+from src.components.budget import RunBudget
+from src.components.planner import REFERENCE_PATTERN
 import logging
 
 
@@ -12,9 +14,11 @@ def generate_plan(
     guidance_text: str, 
     perception: PerceptionResult,
     memory_items: List[MemoryItem],
-    tool_descriptions: Optional[str] = None
+    tool_descriptions: Optional[str] = None,
+    timeout: Optional[float] = None,
+    budget: Optional[RunBudget] = None,
 ) -> str:
-    """Generates a plan (tool call or final answer) using LLM based on structured perception and memory."""
+    """Generates a plan (tool calls, one per line, optionally with a final answer template, or final answer) using LLM based on structured perception and memory (abandoned after `timeout` seconds, counted against `budget`)."""
     memory_texts = "\n".join(f"{m.type}: {m.tool_name}:  {m.text}" for m in memory_items) or "None"
 
     tool_context = f"\nYou have access to the following tools:\n{tool_descriptions}" if tool_descriptions else ""
@@ -33,13 +37,17 @@ Always follow this loop:
 1. Think step-by-step about the problem.
 2. If a tool is needed, respond using the format.
    FUNCTION_CALL: tool_name|param1=value1|param2=value2
+   Calls that do not need each other's results may be given together, one FUNCTION_CALL per line; they run in parallel.
+   If the results of this step's calls will answer the request, add a FINAL_ANSWER line after them, formatted per the guidance,
+   with $1, $2, ... standing for the results of the calls in order. It is filled in without asking you again.
 3. When the final answer is known or available, always respond using the exact format below
    FINAL_ANSWER: [your final result]
 
 Guidelines:
-- Respond using EXACTLY ONE of the formats above per step.
+- Respond using EXACTLY ONE of the formats above per step (one or more FUNCTION_CALL lines, optionally followed by a FINAL_ANSWER using $1, $2, ...; or one FINAL_ANSWER).
 - Do NOT include extra text, explanation, or formatting.
 - Use nested keys (e.g., input.string) and square brackets for lists.
+- Large tool results are stored and shown as a summary with a handle (e.g., artifact://1). To use the full value, pass the handle as the parameter value instead of copying data.
 - You can reference these relevant memories of steps executed so far
 {memory_texts}
 
@@ -52,6 +60,13 @@ Input Summary:
 - FUNCTION_CALL: add|a=5|b=3
 - FUNCTION_CALL: strings_to_chars_to_int|input.string=INDIA
 - FUNCTION_CALL: int_list_to_exponential_sum|input.int_list=[73,78,68,73,65]
+- FUNCTION_CALL: int_list_to_exponential_sum|input.int_list=artifact://1
+- Two independent calls in one step:
+  FUNCTION_CALL: factorial|a=5
+  FUNCTION_CALL: fibonacci_numbers|n=10
+- Last call, whose result is the answer:
+  FUNCTION_CALL: int_list_to_exponential_sum|input.int_list=[73,78,68,73,65]
+  FINAL_ANSWER: [$1]
 - FINAL_ANSWER: [42]
 
 IMPORTANT:
@@ -63,18 +78,24 @@ IMPORTANT:
 - 💥 If unsure or no tool fits, skip to FINAL_ANSWER: [unknown]
 """
     
-    try:
-        # Initial Gemini Client
-        gemini_client = GeminiClient()
+    # Initial Gemini Client (the run budget picks its model, and raises BudgetExceeded when used up)
+    gemini_client = budget.client(timeout) if budget else GeminiClient(timeout=timeout)
 
+    try:
         # Get the response
         content = gemini_client(prompt)
         logger.info(f"Decision plan Generated for the user input", extra={"stage": "DECISION"})
 
-        # Identify any function in the response
-        for line in content.splitlines():
-            if line.strip().startswith("FUNCTION_CALL:") or line.strip().startswith("FINAL_ANSWER:"):
-                return line.strip()
+        # Identify the function calls (all of them, one per line, plus a final answer template over
+        # their results if given) or the final answer in the response
+        lines = [line.strip() for line in content.splitlines()]
+        function_calls = [line for line in lines if line.startswith("FUNCTION_CALL:")]
+        final_templates = [line for line in lines if line.startswith("FINAL_ANSWER:") and REFERENCE_PATTERN.search(line)]
+        for line in lines:
+            if line.startswith("FUNCTION_CALL:"):
+                return "\n".join(function_calls + final_templates[:1])
+            if line.startswith("FINAL_ANSWER:"):
+                return line
         return content
 
     except Exception as e:
@@ -0,0 +1,149 @@
+from src.clients.mcp_servers import PythonMCPClient
+from src.clients.array_encoding import tool_result_value
+from src.clients.argument_validation import ArgumentError
+from src.components.budget import RunBudget
+from src.utils.deadline import Deadline
+from google.genai import types
+from typing import Any, List, Optional, Tuple, Union
+import re
+import ast
+import json
+import operator
+import time
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Largest integer result (in bits) the local evaluator computes; bigger ones go to the LLM path
+MAX_RESULT_BITS = 10_000
+_QUESTION = r"(?:(?:what\s+is|what's|calculate|compute|evaluate|find|give\s+me)\s+)?(?:the\s+)?"
+_NUMBER = r"(\d+)"
+_WORD = r"['\"]?([A-Za-z]+)['\"]?"
+_RADIANS = r"\s*(?:radians?|rad)"
+_ASCII = r"ascii\s+values?\s+of\s+(?:the\s+)?(?:(?:characters|letters)\s+(?:in|of)\s+)?(?:the\s+)?(?:word\s+|string\s+)?"
+
+# Queries that map directly onto calculator tools: the captured value is the first tool's
+# parameter, and each further tool gets the previous tool's result
+_TOOL_QUERIES: List[Tuple[re.Pattern, List[Tuple[str, str]]]] = [
+    (re.compile(_QUESTION + r"factorial\s+of\s+" + _NUMBER, re.IGNORECASE), [("factorial", "a")]),
+    (re.compile(_QUESTION + _NUMBER + r"\s*!", re.IGNORECASE), [("factorial", "a")]),
+    (re.compile(_QUESTION + r"(?:square\s+root|sqrt)\s+of\s+" + _NUMBER, re.IGNORECASE), [("sqrt", "a")]),
+    (re.compile(_QUESTION + r"(?:cube\s+root|cbrt)\s+of\s+" + _NUMBER, re.IGNORECASE), [("cbrt", "a")]),
+    (re.compile(_QUESTION + r"natural\s+log(?:arithm)?\s+of\s+" + _NUMBER, re.IGNORECASE), [("log", "a")]),
+    # The tools take radians; "sin of 30" usually means degrees, so only explicit radians are answered here
+    (re.compile(_QUESTION + r"sine?\s+of\s+" + _NUMBER + _RADIANS, re.IGNORECASE), [("sin", "a")]),
+    (re.compile(_QUESTION + r"cos(?:ine)?\s+of\s+" + _NUMBER + _RADIANS, re.IGNORECASE), [("cos", "a")]),
+    (re.compile(_QUESTION + r"tan(?:gent)?\s+of\s+" + _NUMBER + _RADIANS, re.IGNORECASE), [("tan", "a")]),
+    (re.compile(_QUESTION + r"first\s+" + _NUMBER + r"\s+fibonacci\s+numbers", re.IGNORECASE), [("fibonacci_numbers", "n")]),
+    (re.compile(_QUESTION + _ASCII + _WORD, re.IGNORECASE), [("strings_to_chars_to_int", "string")]),
+    (
+        re.compile(_QUESTION + r"(?:sum\s+of\s+(?:the\s+)?exponentials|exponential\s+sum)\s+of\s+(?:the\s+)?" + _ASCII + _WORD, re.IGNORECASE),
+        [("strings_to_chars_to_int", "string"), ("int_list_to_exponential_sum", "int_list")],
+    ),
+]
+
+_ARITHMETIC = re.compile(_QUESTION + r"([\d\s+\-*/%^().]*\d[\d\s+\-*/%^().]*)", re.IGNORECASE)
+# Dates (2024-10-15, 10/15/2024) parse as arithmetic but are not meant as such
+_DATE = re.compile(r"\d+([-/])\d+\1\d+")
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+_UNARY_OPERATORS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+
+def _normalize(query: str) -> str:
+    # Trailing "!" is kept: it is the factorial operator
+    return query.strip().rstrip("?.= ").strip()
+
+
+def _evaluate(node: ast.AST) -> Union[int, float]:
+    """Evaluate a parsed arithmetic expression; raises ValueError for anything else."""
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        return _UNARY_OPERATORS[type(node.op)](_evaluate(node.operand))
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        left, right = _evaluate(node.left), _evaluate(node.right)
+        if isinstance(node.op, ast.Pow) and isinstance(left, int) and isinstance(right, int):
+            if right < 0 or max(left.bit_length(), 1) * right > MAX_RESULT_BITS:
+                raise ValueError("power too large to evaluate locally")
+        result = _BINARY_OPERATORS[type(node.op)](left, right)
+        if isinstance(result, int) and result.bit_length() > MAX_RESULT_BITS:
+            raise ValueError("result too large to evaluate locally")
+        if isinstance(result, complex):
+            raise ValueError("complex result")
+        return result
+    raise ValueError(f"unsupported expression element: {type(node).__name__}")
+
+
+def evaluate_expression(query: str) -> Optional[Union[int, float]]:
+    """The value of a query that is a plain arithmetic expression (e.g. "what is (2+3)*4?"), else None."""
+    match = _ARITHMETIC.fullmatch(_normalize(query))
+    if not match or not re.search(r"\d\s*[-+*/%^]", match.group(1)) or _DATE.search(match.group(1)):
+        return None
+    try:
+        return _evaluate(ast.parse(match.group(1).replace("^", "**"), mode="eval"))
+    except (SyntaxError, ValueError, ArithmeticError):
+        return None
+
+
+def match_tool_query(query: str) -> Optional[Tuple[List[Tuple[str, str]], str]]:
+    """The calculator tool chain and its input for a query that maps directly onto tools, else None."""
+    query = _normalize(query)
+    for pattern, chain in _TOOL_QUERIES:
+        match = pattern.fullmatch(query)
+        if match:
+            return chain, match.group(1)
+    return None
+
+
+def _answer(value: Any) -> str:
+    return f"FINAL_ANSWER: [{value if isinstance(value, str) else json.dumps(value)}]"
+
+
+async def answer_directly(mcp_client: PythonMCPClient, query: str, deadline: Optional[Deadline] = None, budget: Optional[RunBudget] = None) -> Optional[str]:
+    """
+    Answer pure arithmetic queries, and queries that map directly onto
+    calculator tools, without the LLM.
+
+    Expressions are evaluated in-process; tool queries are run through the
+    MCP client. Returns the answer in FINAL_ANSWER format, or None if the
+    query is not recognized, a tool is unavailable or a step fails; the
+    caller then takes the LLM path. Tool time is counted against `budget`.
+    """
+    value = evaluate_expression(query)
+    if value is not None:
+        logger.info(f"Evaluated arithmetic query locally: {value}", extra={"stage": "DECISION"})
+        return _answer(value)
+
+    matched = match_tool_query(query)
+    if matched is None:
+        return None
+    chain, value = matched
+    for tool_name, param in chain:
+        if tool_name not in mcp_client.available_tools or mcp_client.tool_unavailable(tool_name) is not None:
+            return None
+        try:
+            arguments = mcp_client.tool_validators[tool_name]({param: value})
+        except ArgumentError:
+            return None
+        started = time.monotonic()
+        result = await mcp_client.execute_tool(types.FunctionCall(name=tool_name, args=arguments), deadline=deadline)
+        if budget is not None:
+            budget.record_tool(time.monotonic() - started)
+        if isinstance(result, str) or result.isError:
+            logger.warning(f"Fast path {tool_name} call failed, falling back to the LLM: {result}", extra={"stage": "DECISION"})
+            return None
+        value = tool_result_value(result)
+    logger.info(f"Answered query with {' -> '.join(tool for tool, _ in chain)} without the LLM", extra={"stage": "DECISION"})
+    return _answer(value)
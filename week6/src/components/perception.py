@@ -1,7 +1,9 @@
 import re
+from typing import Optional
 # from src.clients.gemini import GeminiClient
 from src.models.agent_components import PerceptionResult
 from src.clients.gemini import GeminiClient
+from src.components.budget import RunBudget
 import logging
 from src.utils.logger import configure_logger
 import sys
@@ -11,8 +13,8 @@ import sys
 logger = logging.getLogger(__name__)
 
 
-def extract_perception(user_input: str="hello") -> PerceptionResult:
-    """Extracts intent, entities, and tool hints using LLM"""
+def extract_perception(user_input: str="hello", timeout: Optional[float] = None, budget: Optional[RunBudget] = None) -> PerceptionResult:
+    """Extracts intent, entities, and tool hints using LLM (the LLM request is abandoned after `timeout` seconds and counted against `budget`)"""
 
     prompt = f"""
 You are an AI that extracts structured facts from user input.
@@ -27,10 +29,10 @@ Return the response as a Python dictionary with keys:
 Output should be a valid json string dump with following schema: "{PerceptionResult.model_json_schema()}"
     """
 
-    try:
-        # Initial Gemini Client
-        gemini_client = GeminiClient()
+    # Initial Gemini Client (the run budget picks its model, and raises BudgetExceeded when used up)
+    gemini_client = budget.client(timeout) if budget else GeminiClient(timeout=timeout)
 
+    try:
         # Get the response
         content = gemini_client(prompt)
         logger.info(f"Perception Generated for the user input: {content}", extra={"stage": "PERCEPTION"})
@@ -0,0 +1,219 @@
+from src.components.planner import REFERENCE_PATTERN, reference_text, reference_value
+from src.models.agent_components import PerceptionResult, Plan, PlanStep
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import re
+import json
+import os
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Cache location, relative to the working directory the agent is started from
+TEMPLATE_CACHE_DIR = ".agent_cache"
+TEMPLATE_VERSION = 3
+MAX_TEMPLATES = 256  # least recently used templates are dropped beyond this
+_ENTITY_PATTERN = re.compile(r"<entity(\d+)>")
+_DIGITS = re.compile(r"\d")
+
+# A tool call of a finished run: tool name, arguments as decided, and its {"result": ...} or {"error": ...}
+TraceEntry = Tuple[str, Dict[str, Any], Dict[str, Any]]
+
+
+def _entity_kind(entity: str) -> str:
+    try:
+        value = json.loads(entity)
+    except ValueError:
+        return "word" if re.fullmatch(r"\w+", entity) else "text"
+    if isinstance(value, list):
+        return "list"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return "number"
+    return "text"
+
+
+def _same_value(value: Any, result: Any) -> bool:
+    """Whether an argument is a step result, possibly as the LLM re-typed it (120 for "120")."""
+    if value == result:
+        return True
+    return not isinstance(value, (dict, list, bool)) and str(value) == reference_text(result)
+
+
+def _entity_value(entity: str) -> Any:
+    try:
+        return json.loads(entity)
+    except ValueError:
+        return entity
+
+
+class PlanTemplateCache:
+    def __init__(
+        self,
+        cache_dir: str = TEMPLATE_CACHE_DIR,
+        max_templates: int = MAX_TEMPLATES,
+        is_commutative: Callable[[str], bool] = lambda tool_name: False,
+    ) -> None:
+        """
+        On-disk cache of tool sequences that solved a query, replayable for queries of the same shape.
+
+        Templates are keyed by the perceived intent and tool hint plus the
+        kinds of the perceived entities (number, word, list, text); the hint
+        keeps apart queries whose intent reads alike but which need another
+        tool ("add 3 and 4", "multiply 3 and 4"). Entities are replaced
+        by placeholders and results passed between steps by $N references,
+        so a replay substitutes the new query's entities and runs the steps
+        like a plan.
+
+        Entities are substituted by position, which says nothing about their
+        roles ("subtract 3 from 10", "10 minus 3"), so only templates in which
+        entities of the same kind are interchangeable are stored.
+
+        Args:
+            cache_dir: Directory the templates are stored in
+            max_templates: Number of templates kept
+            is_commutative: Whether a tool's result is independent of the order of its arguments
+        """
+        self.path = Path(cache_dir) / "plan_templates.json"
+        self.max_templates = max_templates
+        self.is_commutative = is_commutative
+        self._templates: Dict[str, dict] = self._load()
+
+    @staticmethod
+    def key(perception: PerceptionResult) -> Optional[str]:
+        """Normalized intent and tool hint plus entity kinds, or None if the perception has no intent or no tool hint."""
+        intent = " ".join(re.sub(r"[^\w\s]", " ", perception.intent or "").lower().split())
+        tool_hint = (perception.tool_hint or "").strip()
+        if not intent or not tool_hint:
+            return None
+        return f"v{TEMPLATE_VERSION}|{intent}|{tool_hint}|{','.join(_entity_kind(entity) for entity in perception.entities)}"
+
+    def lookup(self, perception: PerceptionResult) -> Optional[Plan]:
+        """The template for the perceived query shape with this query's entities filled in, if there is one."""
+        key = self.key(perception)
+        template = self._templates.get(key) if key else None
+        if template is None:
+            return None
+        self._templates[key] = self._templates.pop(key)
+
+        def fill(value: Any) -> Any:
+            if isinstance(value, dict):
+                return {name: fill(item) for name, item in value.items()}
+            if isinstance(value, list):
+                return [fill(item) for item in value]
+            if isinstance(value, str):
+                return _ENTITY_PATTERN.sub(lambda m: perception.entities[int(m.group(1))], value)
+            return value
+
+        steps = [PlanStep(**{**step, "args": fill(step["args"])}) for step in template["steps"]]
+        logger.info(f"Replaying plan template '{key}' ({len(steps)} steps)", extra={"stage": "DECISION"})
+        return Plan(text=f"template {key}", steps=steps, final_answer=fill(template["final_answer"]))
+
+    def record(self, perception: PerceptionResult, trace: List[TraceEntry], final_answer: str) -> bool:
+        """
+        Store the tool calls of a successful run as the template for its query shape.
+
+        Only runs whose every numeric argument and every number in the final
+        answer can be traced to a perceived entity or an earlier result are
+        stored; anything the LLM worked out by itself cannot be replayed.
+        Neither are runs that use two entities of the same kind other than as
+        the arguments of a single commutative call, since a query of the same
+        shape may list them in the other order.
+        """
+        key = self.key(perception)
+        # Failed calls left no result anything could depend on
+        trace = [entry for entry in trace if "result" in entry[2]]
+        if key is None or not trace:
+            return False
+        if perception.tool_hint.strip() not in {tool_name for tool_name, _, _ in trace}:
+            # The hint does not describe what solved the query, so it cannot tell such queries apart
+            logger.info(f"Not storing a plan template for '{key}': the hinted tool was not used", extra={"stage": "DECISION"})
+            return False
+
+        entities = [(index, _entity_value(entity), entity) for index, entity in enumerate(perception.entities)]
+        results: List[Any] = []
+
+        def generalize(value: Any) -> Any:
+            for step in range(len(results), 0, -1):
+                if _same_value(value, results[step - 1]):
+                    return f"${step}"
+            for index, parsed, raw in entities:
+                if value == parsed or (isinstance(value, str) and value.strip() == raw):
+                    return f"<entity{index}>"
+            if isinstance(value, dict):
+                return {name: generalize(item) for name, item in value.items()}
+            if isinstance(value, list):
+                return [generalize(item) for item in value]
+            if isinstance(value, (int, float)) or (isinstance(value, str) and _DIGITS.search(value)):
+                raise ValueError(f"untraceable argument {value!r}")
+            return value
+
+        steps = []
+        try:
+            for tool_name, args, response in trace:
+                generalized = generalize(args)
+                depends_on = sorted({int(ref) for ref in REFERENCE_PATTERN.findall(json.dumps(generalized))})
+                steps.append({"step": len(results) + 1, "tool_name": tool_name, "args": generalized, "depends_on": depends_on})
+                results.append(reference_value(response))
+        except ValueError as e:
+            logger.info(f"Not storing a plan template for '{key}': {e}", extra={"stage": "DECISION"})
+            return False
+        order_sensitive = self._order_sensitive_tool(perception, steps)
+        if order_sensitive is not None:
+            logger.info(f"Not storing a plan template for '{key}': its entities may swap roles in {order_sensitive}", extra={"stage": "DECISION"})
+            return False
+
+        # Write results (the latest step for equal ones) and entities back as references into the answer
+        references = {raw: f"<entity{index}>" for index, _, raw in entities if raw}
+        references.update({reference_text(result): f"${step}" for step, result in enumerate(results, 1) if reference_text(result)})
+        alternatives = "|".join(re.escape(text) for text in sorted(references, key=len, reverse=True))
+        answer = re.sub(rf"(?<![\w.])(?:{alternatives})(?![\w.])", lambda m: references[m.group(0)], final_answer) if alternatives else final_answer
+        if not REFERENCE_PATTERN.search(answer) or _DIGITS.search(REFERENCE_PATTERN.sub("", _ENTITY_PATTERN.sub("", answer))):
+            logger.info(f"Not storing a plan template for '{key}': the answer is not made of tool results", extra={"stage": "DECISION"})
+            return False
+
+        self._templates.pop(key, None)
+        self._templates[key] = {"steps": steps, "final_answer": answer}
+        while len(self._templates) > self.max_templates:
+            self._templates.pop(next(iter(self._templates)))
+        self._store()
+        logger.info(f"Stored plan template for '{key}' ({len(steps)} steps)", extra={"stage": "DECISION"})
+        return True
+
+    def _order_sensitive_tool(self, perception: PerceptionResult, steps: List[dict]) -> Optional[str]:
+        """The tools of the steps that entities of the same kind could fill in the other order, if any."""
+        uses = [(step["tool_name"], {int(index) for index in _ENTITY_PATTERN.findall(json.dumps(step["args"]))}) for step in steps]
+        kinds = [_entity_kind(entity) for entity in perception.entities]
+        for kind in set(kinds):
+            same_kind = {index for index, entity_kind in enumerate(kinds) if entity_kind == kind}
+            users = [(tool_name, used & same_kind) for tool_name, used in uses if used & same_kind]
+            if len(set().union(*(used for _, used in users))) < 2:
+                continue
+            if len(users) > 1 or not self.is_commutative(users[0][0]):
+                return ", ".join(dict.fromkeys(tool_name for tool_name, _ in users))
+        return None
+
+    def forget(self, perception: PerceptionResult) -> None:
+        """Drop the template for the perceived query shape (e.g. its replay failed)."""
+        key = self.key(perception)
+        if key and self._templates.pop(key, None) is not None:
+            self._store()
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable plan templates {self.path}: {e}", extra={"stage": "DECISION"})
+            return {}
+
+    def _store(self) -> None:
+        """Atomically write all templates."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._templates, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,196 @@
+from src.components.action import parse_function_call
+from src.components.artifacts import ArtifactStore
+from src.models.agent_components import PerceptionResult, Plan, PlanStep
+from src.clients.gemini import GeminiClient
+from src.components.budget import RunBudget
+from typing import Any, Awaitable, Callable, Dict, Optional
+import re
+import ast
+import json
+import asyncio
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+_STEP_PATTERN = re.compile(r"STEP\s+(\d+)\s*(\(REVIEW\))?\s*:\s*(.+)")
+REFERENCE_PATTERN = re.compile(r"\$(\d+)")
+
+
+def generate_dag_plan(
+    guidance_text: str,
+    user_input: str,
+    tool_descriptions: Optional[str] = None,
+    timeout: Optional[float] = None,
+    budget: Optional[RunBudget] = None,
+    perception: Optional[PerceptionResult] = None,
+) -> Plan:
+    """Generates the whole task up front as steps of tool calls referencing earlier results (abandoned after `timeout` seconds, counted against `budget`), guided by the query's `perception` if it was perceived already."""
+    tool_context = f"\nYou have access to the following tools:\n{tool_descriptions}" if tool_descriptions else ""
+    perception_context = ""
+    if perception is not None:
+        perception_context = f"""
+Input Summary:
+- Intent: {perception.intent}
+- Entities: {', '.join(perception.entities)}
+- Suggested tool: {perception.tool_hint or 'none'}
+"""
+
+    prompt = f"""
+You are a reasoning-driven AI agent with access to tools.
+You should strictly follow the guidance when giving final responses
+guidance text: {guidance_text}
+
+Your job is to plan ALL the tool calls needed to solve the user's request before any of them runs.
+{tool_context}
+
+Respond with the plan only, one step per line, followed by the final answer:
+STEP 1: tool_name|param1=value1|param2=value2
+STEP 2: tool_name|param1=$1
+FINAL_ANSWER: [$2]
+
+Guidelines:
+- $N as a parameter value (or inside a list, e.g. [$1,$2]) is the result of step N. Only reference earlier steps.
+- Steps that do not reference each other run in parallel; a step runs as soon as the steps it references are done.
+- Use nested keys (e.g., input.string) and square brackets for lists.
+- Write STEP N (REVIEW): instead of STEP N: when deciding on that step needs judging earlier results,
+  not just passing them on. Execution stops there and you will be asked again with the results.
+- If no tool is needed, respond with the FINAL_ANSWER line only.
+- Do NOT include extra text, explanation, or formatting.
+
+User input: "{user_input}"
+{perception_context}
+✅ Example (ASCII values of INDIA, then their exponential sum):
+STEP 1: strings_to_chars_to_int|input.string=INDIA
+STEP 2: int_list_to_exponential_sum|input.int_list=$1
+FINAL_ANSWER: [$2]
+
+IMPORTANT:
+- 🚫 Do NOT invent tools. Use only the tools listed above.
+- 🧮 If the question is mathematical or needs calculation, use the appropriate math tool.
+- 💥 If unsure or no tool fits, respond with FINAL_ANSWER: [unknown]
+"""
+
+    # Initial Gemini Client (the run budget picks its model, and raises BudgetExceeded when used up)
+    gemini_client = budget.client(timeout) if budget else GeminiClient(timeout=timeout)
+
+    try:
+        # Get the response
+        content = gemini_client(prompt)
+        logger.info(f"Plan generated for the user input: {content}", extra={"stage": "DECISION"})
+    except Exception as e:
+        err_msg = "⚠️ Plan generation failed"
+        logger.error(f"{err_msg}: {e}", extra={"stage": "DECISION"})
+        raise RuntimeError(err_msg) from e
+
+    return parse_plan(content)
+
+
+def parse_plan(content: str) -> Plan:
+    """Parses STEP lines and the FINAL_ANSWER template of a plan; raises ValueError if the plan is malformed."""
+    plan = Plan(text=content.strip())
+    for line in content.splitlines():
+        line = line.strip()
+        match = _STEP_PATTERN.fullmatch(line)
+        if match:
+            step, review, call = match.groups()
+            tool_name, args = parse_function_call(f"FUNCTION_CALL: {call}")
+            depends_on = sorted({int(ref) for ref in REFERENCE_PATTERN.findall(call)})
+            defined = {planned.step for planned in plan.steps}
+            if int(step) in defined:
+                raise ValueError(f"Step {step} is defined twice")
+            if any(ref not in defined for ref in depends_on):
+                raise ValueError(f"Step {step} references a step that is not defined before it")
+            plan.steps.append(PlanStep(step=int(step), tool_name=tool_name, args=args, depends_on=depends_on, review=bool(review)))
+        elif line.startswith("FINAL_ANSWER:"):
+            plan.final_answer = line
+            break
+
+    if not plan.steps and plan.final_answer is None:
+        raise ValueError("No STEP or FINAL_ANSWER line in the plan")
+    logger.info(f"Parsed plan with {len(plan.steps)} steps", extra={"stage": "DECISION"})
+    return plan
+
+
+def reference_value(response: Dict[str, Any]) -> Any:
+    """Value a $N reference stands for: the step's result, or the handle of a stored large result."""
+    result = response["result"]
+    if isinstance(result, dict) and ArtifactStore.is_handle(result.get("handle")):
+        return result["handle"]
+    return result
+
+
+def reference_text(value: Any) -> str:
+    """A step result as it is written into text (a final answer, a string argument)."""
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def bind_references(value: Any, results: Dict[int, Any]) -> Any:
+    """Replace $N references in (nested) arguments by the results of the referenced steps."""
+    if isinstance(value, dict):
+        return {key: bind_references(item, results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [bind_references(item, results) for item in value]
+    if not isinstance(value, str) or "$" not in value:
+        return value
+
+    match = REFERENCE_PATTERN.fullmatch(value.strip())
+    if match:
+        return results[int(match.group(1))]
+    if value.strip().startswith(("[", "{")):
+        # e.g. [$1,$2]: substitute literals, then parse like any other argument
+        text = REFERENCE_PATTERN.sub(lambda m: json.dumps(results[int(m.group(1))]), value)
+        try:
+            return ast.literal_eval(text)
+        except Exception:
+            return text
+    return REFERENCE_PATTERN.sub(lambda m: reference_text(results[int(m.group(1))]), value)
+
+
+def render_final_answer(plan: Plan, responses: Dict[int, Dict[str, Any]]) -> Optional[str]:
+    """The plan's final answer with references filled in, or None if a referenced step has no result."""
+    if plan.final_answer is None:
+        return None
+    references = {int(ref) for ref in REFERENCE_PATTERN.findall(plan.final_answer)}
+    if any("result" not in responses.get(ref, {}) for ref in references):
+        return None
+    results = {ref: reference_value(responses[ref]) for ref in references}
+    return REFERENCE_PATTERN.sub(lambda m: reference_text(results[int(m.group(1))]), plan.final_answer)
+
+
+async def execute_plan(
+    plan: Plan,
+    run_step: Callable[[PlanStep, Dict[str, Any]], Awaitable[Dict[str, Any]]],
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Run the steps of a plan, each as soon as the steps it references are done.
+
+    Steps that do not depend on each other run concurrently. `run_step` gets
+    the step and its arguments with references bound, and returns
+    {"result": ...} or {"error": ...}. Steps marked for review, and steps
+    depending on a failed or unreviewed step, are not run.
+
+    Returns:
+        The responses of the steps that ran, by step number
+    """
+    tasks: Dict[int, asyncio.Task] = {}
+
+    async def run(step: PlanStep) -> Optional[Dict[str, Any]]:
+        dependencies = {ref: await tasks[ref] for ref in step.depends_on}
+        if step.review or any(response is None or "result" not in response for response in dependencies.values()):
+            return None
+        results = {ref: reference_value(response) for ref, response in dependencies.items()}
+        logger.info(f"Running plan step {step.step}: {step.tool_name}", extra={"stage": "DECISION"})
+        return await run_step(step, bind_references(step.args, results))
+
+    # Steps only reference earlier ones, so every dependency has its task by the time it is awaited
+    for step in plan.steps:
+        tasks[step.step] = asyncio.create_task(run(step))
+    try:
+        responses = await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+    return {step: response for step, response in zip(tasks, responses) if response is not None}
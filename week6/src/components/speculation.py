@@ -0,0 +1,123 @@
+from src.clients.mcp_servers import PythonMCPClient
+from src.clients.argument_validation import ArgumentError
+from src.models.agent_components import PerceptionResult
+from src.utils.deadline import Deadline
+from google.genai import types
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import asyncio
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Parameter types arguments can be inferred for, by the kind of entity that fills them
+_ENTITY_KINDS = {"integer": "number", "number": "number", "array": "list", "string": "text"}
+
+
+def _entity_kind(entity: str) -> str:
+    try:
+        value = json.loads(entity)
+    except ValueError:
+        return "text"
+    if isinstance(value, list):
+        return "list"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return "number"
+    return "text"
+
+
+def infer_arguments(mcp_client: PythonMCPClient, tool_name: str, entities: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Arguments for `tool_name` taken from perceived entities, or None if they are ambiguous.
+
+    Required parameters are filled in order with the entities of matching
+    kind (numbers, lists, text), but only if there are exactly as many such
+    entities as parameters. Optional parameters are left out.
+    """
+    schema = mcp_client.available_tools[tool_name]["parameters"] or {}
+    properties = schema.get("properties", {})
+    required = schema.get("required", [])
+    kinds = [_ENTITY_KINDS.get(properties.get(name, {}).get("type")) for name in required]
+    if not required or None in kinds:
+        return None
+
+    candidates = {kind: [entity for entity in entities if _entity_kind(entity) == kind] for kind in set(kinds)}
+    if any(len(candidates[kind]) != kinds.count(kind) for kind in candidates):
+        return None
+    arguments = {name: candidates[kind].pop(0) for name, kind in zip(required, kinds)}
+    try:
+        return mcp_client.tool_validators[tool_name](arguments)
+    except ArgumentError:
+        return None
+
+
+class Speculation:
+    def __init__(self, mcp_client: PythonMCPClient, perception: PerceptionResult, deadline: Deadline) -> None:
+        """
+        Tool work started on the perception's tool hint while the decision LLM call runs.
+
+        The hinted tool's server is pre-warmed, and a pure tool whose
+        arguments can be inferred from the entities is called right away. Its
+        result lands in the client's result cache, so the decided call is
+        served from it (or joins it while still running); a speculative call
+        the decision does not make is cancelled. `close()` must be awaited
+        once the turn is over.
+        """
+        self.mcp_client = mcp_client
+        self.tool_name = perception.tool_hint if perception.tool_hint in mcp_client.available_tools else None
+        self.arguments = None
+        self._call: Optional[asyncio.Task] = None
+        self._prewarm: Optional[asyncio.Task] = None
+        if self.tool_name is None:
+            return
+
+        self._prewarm = asyncio.create_task(mcp_client.prewarm(self.tool_name))
+        if mcp_client.caches_results(self.tool_name) and mcp_client.tool_unavailable(self.tool_name) is None:
+            self.arguments = infer_arguments(mcp_client, self.tool_name, perception.entities)
+        if self.arguments is not None:
+            logger.info(f"Speculatively running {self.tool_name} with {self.arguments}", extra={"stage": "ACTION"})
+            function_call = types.FunctionCall(name=self.tool_name, args=self.arguments)
+            self._call = asyncio.create_task(mcp_client.execute_tool(function_call, deadline=deadline))
+
+    async def settle(self, calls: List[Tuple[str, Dict[str, Any]]]) -> bool:
+        """Keep the speculative call if the decision makes it, otherwise cancel it; True on a hit."""
+        if self._call is None:
+            return False
+        validate = self.mcp_client.tool_validators[self.tool_name]
+        for tool_name, args in calls:
+            if tool_name != self.tool_name:
+                continue
+            try:
+                if validate(args) == self.arguments:
+                    logger.info(f"Speculative {self.tool_name} call matches the decision", extra={"stage": "ACTION"})
+                    return True
+            except ArgumentError:
+                pass
+        await self._stop_call()
+        return False
+
+    async def close(self) -> None:
+        """
+        Cancel the speculative call and the pre-warm if still running and
+        wait for them; a session already pre-warmed is kept. Called at the end
+        of every decision turn, so no speculative work outlives its turn.
+        """
+        await self._stop_call()
+        await self._stop(self._prewarm)
+
+    async def _stop_call(self) -> None:
+        if self._call is not None and not self._call.done():
+            logger.info(f"Discarding speculative {self.tool_name} call", extra={"stage": "ACTION"})
+        await self._stop(self._call)
+
+    async def _stop(self, task: Optional[asyncio.Task]) -> None:
+        """Cancel `task` if still running and wait for it, logging its failure rather than losing it."""
+        if task is None:
+            return
+        task.cancel()
+        # The task's own cancellation is returned, a cancellation of the caller still propagates
+        [result] = await asyncio.gather(task, return_exceptions=True)
+        if isinstance(result, Exception):
+            logger.warning(f"Speculative work on {self.tool_name} failed: {result}", extra={"stage": "ACTION"})
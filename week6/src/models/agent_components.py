@@ -27,4 +27,43 @@ class MemoryItem(BaseModel):
 class ToolCallResult(BaseModel):
     tool_name: str = Field(..., description="The name of the tool that was invoked.")
     arguments: Dict[str, Any] = Field(..., description="The input arguments provided to the tool.")
-    result: Union[str, list, dict] = Field(..., description="The output returned by the tool. Can be a string, list, or dictionary.")
\ No newline at end of file
+    result: Union[str, list, dict] = Field(..., description="The output returned by the tool. Can be a string, list, or dictionary.")
+
+
+class ArtifactSummary(BaseModel):
+    handle: str = Field(..., description="Handle under which the full value is stored, e.g. artifact://1.")
+    kind: str = Field(..., description="Kind of value stored: list, number or text.")
+    length: int = Field(..., description="Number of elements (list), digits (number) or characters (text).")
+    head: Union[str, list] = Field(..., description="First elements or characters of the value.")
+    tail: Union[str, list] = Field(..., description="Last elements or characters of the value.")
+    min: Optional[Union[int, float]] = Field(None, description="Smallest element of a numeric list.")
+    max: Optional[Union[int, float]] = Field(None, description="Largest element of a numeric list.")
+    max_digits: Optional[int] = Field(None, description="Digits of the largest magnitude in a numeric value or list.")
+
+
+class PlanStep(BaseModel):
+    step: int = Field(..., description="Number of the step, referenced by later steps as $<step>.")
+    tool_name: str = Field(..., description="The tool the step calls.")
+    args: Dict[str, Any] = Field(default_factory=dict, description="Tool arguments, possibly containing $<step> references.")
+    depends_on: List[int] = Field(default_factory=list, description="Earlier steps whose results the arguments reference.")
+    review: bool = Field(False, description="Whether the LLM has to judge earlier results before this step runs.")
+
+
+class Plan(BaseModel):
+    text: str = Field(..., description="The plan as written by the LLM.")
+    steps: List[PlanStep] = Field(default_factory=list, description="Tool calls in the order they were planned.")
+    final_answer: Optional[str] = Field(None, description="Final answer template, possibly containing $<step> references.")
+
+
+class BudgetUsage(BaseModel):
+    llm_calls: int = Field(0, description="LLM requests made (perception, planning and decisions).")
+    prompt_tokens: int = Field(0, description="Prompt tokens reported by the model.")
+    completion_tokens: int = Field(0, description="Completion tokens reported by the model.")
+    cost_usd: float = Field(0.0, description="Estimated cost of the LLM requests, from the per-model token prices.")
+    tool_seconds: float = Field(0.0, description="Summed duration of the tool calls.")
+    wall_seconds: float = Field(0.0, description="Time since the run started.")
+    turns: int = Field(0, description="Step-by-step decision turns taken.")
+    cheap_model_calls: int = Field(0, description="LLM requests switched to the cheaper model because the budget ran low.")
+    perceptions_skipped: int = Field(0, description="Perception LLM requests skipped because the budget ran low.")
+    remaining: float = Field(1.0, description="Share of the tightest budget left, from 1 (untouched) to 0 (used up).")
+    exhausted: Optional[str] = Field(None, description="The budget that ran out, if any.")
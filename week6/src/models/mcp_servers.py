@@ -0,0 +1,124 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, Optional, List, Literal
+
+
+class MCPServerConfig(BaseModel):
+    path: Optional[str] = Field(None, description="Path to the server's python file (required unless the server is remote).")
+    url: Optional[str] = Field(None, description="SSE endpoint of an already running server, e.g. http://127.0.0.1:8000/sse.")
+    transport: Literal["stdio", "forkserver", "inprocess", "sse"] = Field(
+        "stdio",
+        description="'stdio' runs the server as an isolated child process via `uv run`; 'forkserver' forks the "
+                    "child from a pre-imported fork server (falls back to 'stdio' where fork is unavailable); "
+                    "'inprocess' imports the module and talks to its FastMCP instance over memory streams "
+                    "(trusted local tools only); 'sse' connects to a shared server at `url` over HTTP.",
+    )
+    lazy: bool = Field(
+        False,
+        description="Advertise tools from the cached manifest and only spawn the server on the first call "
+                    "to one of its tools (stdio servers with a cached manifest).",
+    )
+    idle_shutdown: Optional[float] = Field(None, description="Seconds of inactivity after which the server's sessions are shut down.")
+    max_concurrency: Optional[int] = Field(None, ge=1, description="Upper bound of concurrent tool calls on the server (adapted downwards under load).")
+    max_queue: Optional[int] = Field(None, ge=0, description="Calls allowed to wait for a slot before new calls are rejected.")
+    tool_concurrency: Dict[str, int] = Field(default_factory=dict, description="Concurrency limits of individual tools, on top of the server limit.")
+    idempotent_tools: List[str] = Field(default_factory=list, description="Tools that are safe to call more than once ('*' for all tools of the server); only these are retried or hedged.")
+    max_retries: int = Field(0, ge=0, description="Retries (with jittered exponential backoff) of idempotent calls that fail or time out.")
+    hedge_after: Optional[float] = Field(None, gt=0, description="Seconds after which a slow idempotent call is duplicated on another session; the first answer wins.")
+    cache_results: bool = Field(True, description="Whether results of tools the server declares cacheable may be cached; False never caches the server's tools.")
+
+    def is_idempotent(self, tool_name: str) -> bool:
+        return "*" in self.idempotent_tools or tool_name in self.idempotent_tools
+
+    @model_validator(mode="after")
+    def check_location(self) -> "MCPServerConfig":
+        if self.transport == "sse" and not self.url:
+            raise ValueError("transport 'sse' requires a url")
+        if self.transport != "sse" and not self.path:
+            raise ValueError(f"transport '{self.transport}' requires a path")
+        return self
+
+
+class ServerStartupTiming(BaseModel):
+    server: str = Field(..., description="Name of the MCP server.")
+    status: Literal["ok", "cached", "lazy", "timeout", "error"] = Field(..., description="Outcome of the connection attempt; 'cached' means tools were registered from the on-disk manifest, 'lazy' that the server was not spawned at all.")
+    spawn_seconds: Optional[float] = Field(None, description="Time taken to launch the server process.")
+    initialize_seconds: Optional[float] = Field(None, description="Time taken by the MCP initialize handshake (includes interpreter start-up and imports).")
+    list_tools_seconds: Optional[float] = Field(None, description="Time taken by the list_tools request.")
+    total_seconds: float = Field(..., description="Wall-clock time until the server was ready or failed.")
+    tool_count: int = Field(0, description="Number of tools registered from the server.")
+    error: Optional[str] = Field(None, description="Error message if the connection failed.")
+
+
+class StartupReport(BaseModel):
+    servers: List[ServerStartupTiming] = Field(default_factory=list, description="Per-server startup timings.")
+    total_seconds: float = Field(0.0, description="Wall-clock time until every server was ready or failed.")
+
+    @property
+    def failed(self) -> List[str]:
+        return [timing.server for timing in self.servers if timing.status not in ("ok", "cached", "lazy")]
+
+    def log_lines(self) -> List[str]:
+        """Human readable lines, one per server, suitable for logging."""
+        def fmt(seconds: Optional[float]) -> str:
+            return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+        lines = [
+            f"{t.server}: {t.status} in {fmt(t.total_seconds)} "
+            f"(spawn={fmt(t.spawn_seconds)}, initialize={fmt(t.initialize_seconds)}, "
+            f"list_tools={fmt(t.list_tools_seconds)}, tools={t.tool_count})"
+            + (f" error={t.error}" if t.error else "")
+            for t in self.servers
+        ]
+        lines.append(f"startup completed in {fmt(self.total_seconds)}, {len(self.failed)} failed")
+        return lines
+
+
+class ServerHealth(BaseModel):
+    server: str = Field(..., description="Name of the MCP server.")
+    healthy: bool = Field(True, description="Whether the last health check or restart succeeded.")
+    restarts: int = Field(0, description="Number of times the server was recovered after a failure.")
+    last_recovery_seconds: Optional[float] = Field(None, description="Time from detecting the last failure until a replacement session was ready.")
+    live_sessions: int = Field(0, description="Sessions currently alive for the server.")
+    idle_sessions: int = Field(0, description="Sessions currently parked idle (including warm standbys).")
+    last_error: Optional[str] = Field(None, description="Error from the last failed restart attempt.")
+
+
+class ConcurrencyStats(BaseModel):
+    name: str = Field(..., description="Server name, or 'server/tool' for a per-tool limit.")
+    limit: int = Field(..., description="Current (adaptive) concurrency limit.")
+    max_concurrency: int = Field(..., description="Configured upper bound of the limit.")
+    in_flight: int = Field(0, description="Calls currently running.")
+    queue_depth: int = Field(0, description="Calls currently waiting for a slot.")
+    max_queue_depth: int = Field(0, description="Deepest the wait queue has been.")
+    admitted: int = Field(0, description="Calls that got a slot.")
+    rejected: int = Field(0, description="Calls rejected because the queue was full or the wait timed out.")
+    total_wait_seconds: float = Field(0.0, description="Summed time admitted calls spent waiting for a slot.")
+    max_wait_seconds: float = Field(0.0, description="Longest time an admitted call waited for a slot.")
+    latency_seconds: Optional[float] = Field(None, description="Moving average of call latency.")
+
+    @property
+    def avg_wait_seconds(self) -> float:
+        return self.total_wait_seconds / self.admitted if self.admitted else 0.0
+
+
+class ResultCacheStats(BaseModel):
+    entries: int = Field(0, description="Results currently cached.")
+    size_bytes: int = Field(0, description="Approximate size of the cached results.")
+    hits: int = Field(0, description="Calls answered from the cache.")
+    misses: int = Field(0, description="Cacheable calls that had to reach the server.")
+    shared: int = Field(0, description="Calls that waited for an identical call already in flight instead of making their own.")
+    evictions: int = Field(0, description="Results dropped to stay within the entry and size limits.")
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses + self.shared
+        return (self.hits + self.shared) / lookups if lookups else 0.0
+
+
+class CircuitState(BaseModel):
+    server: str = Field(..., description="Name of the MCP server.")
+    state: Literal["closed", "open", "half_open"] = Field(..., description="'open' means calls fail fast without reaching the server.")
+    consecutive_failures: int = Field(0, description="Failed calls since the last success.")
+    trips: int = Field(0, description="Number of times the circuit has opened.")
+    retry_in_seconds: float = Field(0.0, description="Seconds until an open circuit lets a probe call through.")
+    last_error: Optional[str] = Field(None, description="Error of the last failed call.")
@@ -0,0 +1,40 @@
+from typing import Optional
+import time
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a step cannot run because the run's time budget is used up."""
+
+
+class Deadline:
+    def __init__(self, seconds: float) -> None:
+        """
+        Absolute point in time by which an agent run must finish.
+
+        Steps of the run (perception, decision, tool calls) derive their own
+        timeouts from what is left, so the run as a whole never exceeds its
+        budget no matter how many turns it takes.
+
+        Args:
+            seconds: Budget from now
+        """
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def budget(self, cap: Optional[float] = None, reserve: float = 0.0) -> float:
+        """
+        Timeout for the next step: what is left (minus `reserve`), at most `cap`.
+
+        Raises DeadlineExceeded if nothing is left.
+        """
+        remaining = self.remaining() - reserve
+        if remaining <= 0:
+            raise DeadlineExceeded(f"time budget of {self.seconds:g}s exhausted")
+        return remaining if cap is None else min(remaining, cap)
@@ -0,0 +1,26 @@
+from src.components.budget import RunBudget
+from src.utils.deadline import Deadline, DeadlineExceeded
+import agent
+import asyncio
+import time
+import pytest
+
+
+def slow_step(timeout=None, budget=None, seconds=0.5):
+    time.sleep(seconds)
+    return "done"
+
+
+def test_llm_step_within_its_cap_returns_the_result():
+    assert asyncio.run(agent.run_llm_step(slow_step, RunBudget(Deadline(120)), 5, seconds=0)) == "done"
+
+
+def test_llm_step_past_its_cap_fails_as_a_step():
+    # A RuntimeError, which plan-ahead and the template perception fall back from
+    with pytest.raises(RuntimeError, match="slow_step timed out after 0.2s"):
+        asyncio.run(agent.run_llm_step(slow_step, RunBudget(Deadline(120)), 0.2))
+
+
+def test_llm_step_past_the_run_deadline_ends_the_run():
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(agent.run_llm_step(slow_step, RunBudget(Deadline(0.2)), 5))
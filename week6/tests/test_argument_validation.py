@@ -0,0 +1,63 @@
+from src.clients.argument_validation import ArgumentError, compile_validator
+import pytest
+
+
+TWO_INTEGERS = {
+    "type": "object",
+    "properties": {"a": {"type": "integer"}, "b": {"type": "integer"}},
+    "required": ["a", "b"],
+}
+
+
+def test_coerces_lossless_values():
+    validate = compile_validator(TWO_INTEGERS)
+    assert validate({"a": "5", "b": 3.0}) == {"a": 5, "b": 3}
+
+
+def test_rejects_lossy_and_boolean_integers():
+    validate = compile_validator(TWO_INTEGERS)
+    with pytest.raises(ArgumentError, match="'b' must be an integer"):
+        validate({"a": 1, "b": 2.5})
+    with pytest.raises(ArgumentError, match="'a' must be an integer"):
+        validate({"a": True, "b": 2})
+
+
+def test_reports_missing_and_unknown_arguments():
+    validate = compile_validator(TWO_INTEGERS)
+    with pytest.raises(ArgumentError, match="'b' is required"):
+        validate({"a": 1})
+    with pytest.raises(ArgumentError, match="unknown argument 'c'"):
+        validate({"a": 1, "b": 2, "c": 3})
+
+
+def test_maps_prefixed_keys_and_stringifies_numbers():
+    validate = compile_validator({"type": "object", "properties": {"string": {"type": "string"}}, "required": ["string"]})
+    assert validate({"input.string": 123}) == {"string": "123"}
+
+
+def test_parses_quoted_lists():
+    validate = compile_validator({
+        "type": "object",
+        "properties": {"int_list": {"type": "array", "items": {"type": "integer"}}},
+    })
+    assert validate({"int_list": "[1, 2, \"3\"]"}) == {"int_list": [1, 2, 3]}
+    with pytest.raises(ArgumentError, match=r"'int_list\[1\]' must be an integer"):
+        validate({"int_list": [1, "x"]})
+
+
+def test_resolves_refs_and_any_of():
+    validate = compile_validator({
+        "type": "object",
+        "properties": {
+            "point": {"$ref": "#/$defs/Point"},
+            "scale": {"anyOf": [{"type": "integer"}, {"type": "null"}]},
+        },
+        "$defs": {"Point": {"type": "object", "properties": {"x": {"type": "number"}}}},
+    })
+    assert validate({"point.x": "1.5", "scale": None}) == {"point": {"x": 1.5}, "scale": None}
+    with pytest.raises(ArgumentError, match="'scale' must be an integer, got 'big' or 'scale' must be null"):
+        validate({"scale": "big"})
+
+
+def test_schemaless_tool_accepts_anything():
+    assert compile_validator({})({"anything": [1, "2"]}) == {"anything": [1, "2"]}
@@ -0,0 +1,41 @@
+from pathlib import Path
+from mcp.types import CallToolResult, TextContent
+from src.clients.array_encoding import ArrayEncodingClientSession, tool_result_value
+from src.clients.inprocess import inprocess_client, load_fastmcp_server
+import asyncio
+
+
+CALCULATOR = Path(__file__).resolve().parent.parent / "servers" / "calculator" / "mcp_server.py"
+
+
+def call_calculator(tool_name: str, arguments: dict):
+    async def call():
+        async with inprocess_client(load_fastmcp_server(str(CALCULATOR))) as (read, write):
+            async with ArrayEncodingClientSession(read, write) as session:
+                await session.initialize()
+                return tool_result_value(await session.call_tool(tool_name, arguments))
+    return asyncio.run(call())
+
+
+def text_result(*texts: str) -> CallToolResult:
+    return CallToolResult(content=[TextContent(type="text", text=text) for text in texts])
+
+
+def test_list_results_have_the_same_item_types_packed_or_not():
+    # 90 Fibonacci numbers fit a packed 64-bit array, 5000 do not and come as one text item each
+    small = call_calculator("fibonacci_numbers", {"n": 90})
+    large = call_calculator("fibonacci_numbers", {"n": 5000})
+    assert small[:5] == [0, 1, 1, 2, 3]
+    assert large[:90] == small
+    assert all(type(value) is int for value in large)
+
+
+def test_text_items_are_decoded_as_json():
+    assert tool_result_value(text_result("120")) == 120
+    assert tool_result_value(text_result("1", "2.5")) == [1, 2.5]
+
+
+def test_text_that_is_not_json_is_kept():
+    assert tool_result_value(text_result("INDIA")) == "INDIA"
+    # More digits than Python converts to an int by default
+    assert tool_result_value(text_result("9" * 5000)) == "9" * 5000
@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+from src.clients.argument_validation import compile_validator
+from src.components.call_history import CallHistory
+import asyncio
+
+
+def call_history(**kwargs) -> CallHistory:
+    add = compile_validator({
+        "type": "object",
+        "properties": {"a": {"type": "integer"}, "b": {"type": "integer"}},
+        "required": ["a", "b"],
+    })
+    return CallHistory(SimpleNamespace(tool_validators={"add": add}), **kwargs)
+
+
+def test_fingerprint_is_canonical_after_coercion():
+    history = call_history()
+    assert history.fingerprint("add", {"a": 1, "b": 2}) == history.fingerprint("add", {"b": "2", "a": 1.0})
+    assert history.fingerprint("add", {"a": 1, "b": 2}) != history.fingerprint("add", {"a": 2, "b": 1})
+
+
+def test_fingerprint_of_invalid_or_unknown_calls_uses_the_raw_arguments():
+    history = call_history()
+    assert history.fingerprint("add", {"a": "x"}) == 'add:{"a":"x"}'
+    assert history.fingerprint("echo", {"text": "hi"}) == 'echo:{"text":"hi"}'
+
+
+def test_repeats_within_a_step_and_across_steps():
+    history = call_history()
+    a, b = history.fingerprint("add", {"a": 1, "b": 2}), history.fingerprint("add", {"a": 3, "b": 4})
+    assert history.repeats([a, a, b]) == [False, True, False]
+
+    async def call():
+        return {"result": 3}
+
+    asyncio.run(history.run(a, call))
+    assert history.repeats([a, b]) == [True, False]
+
+
+def test_identical_calls_in_flight_share_one_call():
+    history = call_history()
+    fingerprint = history.fingerprint("add", {"a": 1, "b": 2})
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"result": 3}
+
+    async def main():
+        return await asyncio.gather(history.run(fingerprint, call), history.run(fingerprint, call))
+
+    assert asyncio.run(main()) == [{"result": 3}, {"result": 3}]
+    assert len(calls) == 1
+
+
+def test_only_successful_responses_are_reused():
+    history = call_history()
+    responses = iter([{"error": "timeout"}, {"result": 3}])
+
+    async def call():
+        return next(responses)
+
+    async def main():
+        return [await history.run("add:{}", call) for _ in range(3)]
+
+    assert asyncio.run(main()) == [{"error": "timeout"}, {"result": 3}, {"result": 3}]
+
+
+def test_looping_after_consecutive_all_repeat_steps():
+    history = call_history(max_repeated_turns=2)
+    history.end_turn([True])
+    history.end_turn([False, True])
+    history.end_turn([True, True])
+    assert not history.looping
+    history.end_turn([True])
+    assert history.looping
+
+
+def test_retry_of_a_failed_call_is_no_repeat():
+    history = call_history()
+    fingerprint = history.fingerprint("add", {"a": 1, "b": 2})
+    responses = iter([{"error": "timeout"}, {"result": 3}])
+
+    async def call():
+        return next(responses)
+
+    asyncio.run(history.run(fingerprint, call))
+    assert not history.seen(fingerprint)
+    assert history.repeats([fingerprint]) == [False]
+    asyncio.run(history.run(fingerprint, call))
+    assert history.seen(fingerprint)
+    assert history.repeats([fingerprint]) == [True]
@@ -0,0 +1,52 @@
+from src.components.fast_path import evaluate_expression, match_tool_query
+import pytest
+
+
+@pytest.mark.parametrize("query, value", [
+    ("(2+3)*4", 20),
+    ("what is 10 - 3 - 2?", 5),
+    ("calculate 2^10", 1024),
+    ("7 / 2", 3.5),
+    ("-3 * 4 =", -12),
+])
+def test_evaluates_arithmetic(query, value):
+    assert evaluate_expression(query) == value
+
+
+@pytest.mark.parametrize("query", [
+    "2024-10-15",
+    "what is 10/15/2024?",
+    "10-3-2",  # reads as a date: left to the LLM
+    "42",  # no operator
+    "2 ** 100000",  # too large to evaluate locally
+    "1 / 0",
+    "what is the capital of France?",
+])
+def test_leaves_everything_else_to_the_llm(query):
+    assert evaluate_expression(query) is None
+
+
+@pytest.mark.parametrize("query, chain, value", [
+    ("factorial of 5", [("factorial", "a")], "5"),
+    ("5!", [("factorial", "a")], "5"),
+    ("what is the square root of 16?", [("sqrt", "a")], "16"),
+    ("sin of 30 radians", [("sin", "a")], "30"),
+    ("cosine of 1 rad", [("cos", "a")], "1"),
+    ("ascii values of INDIA", [("strings_to_chars_to_int", "string")], "INDIA"),
+    (
+        "sum of exponentials of ascii values of the word 'INDIA'",
+        [("strings_to_chars_to_int", "string"), ("int_list_to_exponential_sum", "int_list")],
+        "INDIA",
+    ),
+])
+def test_matches_tool_queries(query, chain, value):
+    assert match_tool_query(query) == (chain, value)
+
+
+@pytest.mark.parametrize("query", [
+    "sin of 30",  # degrees, most likely, but the tools take radians
+    "tan of 45 degrees",
+    "factorial of x",
+])
+def test_ambiguous_tool_queries_do_not_match(query):
+    assert match_tool_query(query) is None
@@ -0,0 +1,40 @@
+from src.components.plan_templates import PlanTemplateCache
+from src.models.agent_components import PerceptionResult
+
+
+def template_cache(tmp_path) -> PlanTemplateCache:
+    return PlanTemplateCache(cache_dir=str(tmp_path), is_commutative=lambda tool_name: tool_name in {"add", "multiply"})
+
+
+def perception(intent: str, tool_hint: str, *entities: str) -> PerceptionResult:
+    return PerceptionResult(user_input=intent, intent=intent, tool_hint=tool_hint, entities=list(entities))
+
+
+def test_commutative_template_is_replayed_with_new_entities(tmp_path):
+    cache = template_cache(tmp_path)
+    assert cache.record(perception("add numbers", "add", "3", "4"), [("add", {"a": 3, "b": 4}, {"result": 7})], "[7]")
+
+    plan = PlanTemplateCache(cache_dir=str(tmp_path)).lookup(perception("add numbers", "add", "10", "20"))
+    assert [(step.tool_name, step.args) for step in plan.steps] == [("add", {"a": "10", "b": "20"})]
+    assert plan.final_answer == "[$1]"
+
+
+def test_order_sensitive_templates_are_not_stored(tmp_path):
+    cache = template_cache(tmp_path)
+    # "subtract 3 from 10" and "10 minus 3" perceive the same shape with the entities swapped
+    subtract = perception("subtract numbers", "subtract", "3", "10")
+    assert not cache.record(subtract, [("subtract", {"a": 10, "b": 3}, {"result": 7})], "[7]")
+    # A commutative tool does not help once its operands come from different steps
+    factorial_plus = perception("factorial plus number", "factorial", "5", "3")
+    trace = [("factorial", {"a": 5}, {"result": 120}), ("add", {"a": 120, "b": 3}, {"result": 123})]
+    assert not cache.record(factorial_plus, trace, "[123]")
+    assert cache.lookup(subtract) is None and cache.lookup(factorial_plus) is None
+
+
+def test_entities_of_different_kinds_cannot_swap(tmp_path):
+    cache = template_cache(tmp_path)
+    # The entity kinds are part of the key, so a word and a number keep their roles
+    repeat = perception("repeat word", "repeat", "echo", "3")
+    assert cache.record(repeat, [("repeat", {"text": "echo", "times": 3}, {"result": "echoechoecho"})], "$1")
+    plan = cache.lookup(perception("repeat word", "repeat", "ping", "2"))
+    assert plan.steps[0].args == {"text": "ping", "times": "2"}
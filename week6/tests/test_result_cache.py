@@ -0,0 +1,80 @@
+from mcp.types import CallToolResult, TextContent, Tool
+from src.clients.result_cache import CACHEABLE_HINT, ResultCache, tool_annotations
+import asyncio
+
+
+def text_result(text: str, is_error: bool = False) -> CallToolResult:
+    return CallToolResult(content=[TextContent(type="text", text=text)], isError=is_error)
+
+
+def test_key_is_canonical():
+    assert ResultCache.key("add", {"b": 2, "a": 1}) == ResultCache.key("add", {"a": 1, "b": 2}) == 'add:{"a":1,"b":2}'
+    assert ResultCache.key("add", None) == ResultCache.key("add", {}) == "add:{}"
+
+
+def test_key_keeps_tools_and_argument_types_apart():
+    assert ResultCache.key("add", {"a": 1}) != ResultCache.key("multiply", {"a": 1})
+    assert ResultCache.key("add", {"a": 1}) != ResultCache.key("add", {"a": "1"})
+
+
+def test_identical_calls_in_flight_share_one_call():
+    cache = ResultCache()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return text_result("3")
+
+    async def main():
+        key = ResultCache.key("add", {"a": 1, "b": 2})
+        return await asyncio.gather(*(cache.get_or_call(key, call) for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert (cache.stats.misses, cache.stats.shared, cache.stats.hits) == (1, 2, 0)
+
+
+def test_cached_result_is_served_without_a_call():
+    cache = ResultCache()
+
+    async def call():
+        return text_result("3")
+
+    async def main():
+        await cache.get_or_call("add:{}", call)
+        return await cache.get_or_call("add:{}", lambda: None)
+
+    assert asyncio.run(main()).content[0].text == "3"
+    assert cache.stats.hits == 1
+
+
+def test_failed_call_is_neither_cached_nor_shared():
+    cache = ResultCache()
+    outcomes = iter([text_result("boom", is_error=True), text_result("3")])
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return next(outcomes)
+
+    async def main():
+        return await asyncio.gather(cache.get_or_call("add:{}", call), cache.get_or_call("add:{}", call))
+
+    first, second = asyncio.run(main())
+    # The waiting caller makes its own call rather than inherit the error
+    assert len(calls) == 2
+    assert first.isError and not second.isError
+    assert cache.get("add:{}") is second
+
+
+def test_tool_annotations_reads_the_cacheable_hint():
+    tool = Tool.model_validate({
+        "name": "add",
+        "inputSchema": {"type": "object"},
+        "annotations": {CACHEABLE_HINT: True},
+    })
+    assert tool_annotations(tool)[CACHEABLE_HINT] is True
+    assert tool_annotations(Tool(name="add", inputSchema={"type": "object"})) is None
@@ -0,0 +1,52 @@
+from functools import partial
+from pathlib import Path
+from src.clients.inprocess import inprocess_client, load_fastmcp_server
+from src.clients.session_pool import MCPSessionPool
+import asyncio
+
+
+CALCULATOR = Path(__file__).resolve().parent.parent / "servers" / "calculator" / "mcp_server.py"
+
+
+def calculator_pool(**kwargs) -> MCPSessionPool:
+    pool = MCPSessionPool(**kwargs)
+    pool.register_transport("calculator", partial(inprocess_client, load_fastmcp_server(str(CALCULATOR))))
+    return pool
+
+
+def test_warm_sessions_count_against_the_pool_size():
+    async def main():
+        pool = calculator_pool(size=2)
+        try:
+            async with pool.acquire("calculator"):
+                assert await pool.warm("calculator") is not None
+                assert await pool.warm("calculator") is None
+                assert pool.live_count("calculator") == 2
+        finally:
+            await pool.close()
+
+    asyncio.run(main())
+
+
+def test_close_also_closes_checked_out_sessions():
+    async def main():
+        pool = calculator_pool()
+        checked_out = asyncio.Event()
+        release = asyncio.Event()
+
+        async def hold():
+            try:
+                async with pool.acquire("calculator"):
+                    checked_out.set()
+                    await release.wait()
+            except Exception:
+                pass
+
+        holder = asyncio.create_task(hold())
+        await checked_out.wait()
+        await pool.close()
+        assert pool.live_count("calculator") == 0
+        release.set()
+        await holder
+
+    asyncio.run(main())
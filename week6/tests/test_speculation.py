@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+from src.components.speculation import Speculation
+from src.models.agent_components import PerceptionResult
+from src.utils.deadline import Deadline
+import asyncio
+import logging
+
+
+def fake_client(prewarm):
+    # A tool whose results are not cached, so only the pre-warm runs
+    return SimpleNamespace(
+        available_tools={"add": {"server": "calculator"}},
+        prewarm=prewarm,
+        caches_results=lambda tool_name: False,
+    )
+
+
+def perception() -> PerceptionResult:
+    return PerceptionResult(user_input="add 1 and 2", entities=["1", "2"], tool_hint="add")
+
+
+def test_close_cancels_and_awaits_a_running_prewarm():
+    started, cancelled = asyncio.Event(), []
+
+    async def prewarm(tool_name):
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(tool_name)
+            raise
+
+    async def main():
+        speculation = Speculation(fake_client(prewarm), perception(), Deadline(60))
+        await started.wait()
+        await speculation.close()
+        assert speculation._prewarm.cancelled()
+
+    asyncio.run(main())
+    assert cancelled == ["add"]
+
+
+def test_close_reports_a_failed_prewarm(caplog):
+    async def prewarm(tool_name):
+        raise OSError("spawn failed")
+
+    async def main():
+        speculation = Speculation(fake_client(prewarm), perception(), Deadline(60))
+        await asyncio.sleep(0)
+        await speculation.close()
+
+    with caplog.at_level(logging.WARNING, logger="src.components.speculation"):
+        asyncio.run(main())
+    assert "Speculative work on add failed: spawn failed" in caplog.text